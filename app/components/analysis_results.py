@@ -1,131 +1,22 @@
 import streamlit as st
-import re
-from utils.db import save_analysis
+from utils.db import get_resume_history
+from utils.parsing import empty_analysis, load_analysis
 
-def parse_analysis_sections(analysis_text):
-    """Parse the analysis text into structured sections"""
-    sections = {
-        'match_score': 0,
-        'overall': [],
-        'qualifications': [],
-        'missing': [],
-        'improvements': []
-    }
-    
-    current_section = None
-    
-    # Debug
-    st.write("DEBUG - Starting parse of:", analysis_text)
-    
-    for line in analysis_text.split('\n'):
-        line = line.strip()
-        if not line:
-            continue
-            
-        # Debug
-        st.write(f"DEBUG - Processing line: {line}")
-        
-        # Check for section headers
-        if 'Match Score:' in line:
-            current_section = 'match_score'
-            match = re.search(r'(\d+)%', line)
-            if match:
-                sections['match_score'] = int(match.group(1))
-                st.write(f"DEBUG - Found match score: {sections['match_score']}")
-        elif 'Overall Assessment:' in line:
-            current_section = 'overall'
-            st.write("DEBUG - Switched to overall section")
-        elif 'Key Qualifications Match:' in line:
-            current_section = 'qualifications'
-            st.write("DEBUG - Switched to qualifications section")
-        elif 'Missing Skills/Experience:' in line:
-            current_section = 'missing'
-            st.write("DEBUG - Switched to missing section")
-        elif 'Suggested Resume Improvements:' in line:
-            current_section = 'improvements'
-            st.write("DEBUG - Switched to improvements section")
-        # Add content to current section if it starts with a bullet point
-        elif current_section and current_section != 'match_score' and line.startswith('•'):
-            line = line.lstrip('•').strip()
-            if line:
-                sections[current_section].append(line)
-                st.write(f"DEBUG - Added to {current_section}: {line}")
-    
-    # Debug final sections
-    st.write("DEBUG - Final sections:", sections)
-    
-    return sections
+def render_analysis_results(analysis, user_id=None):
+    """Renders the analysis results in a structured format.
 
-def parse_multiple_analyses(analysis_text):
-    """Parse multiple resume analyses"""
-    analyses = []
-    current_analysis = None
-    
-    # Debug
-    st.write("DEBUG - Starting parse of multiple analyses")
-    st.write("Raw text:", analysis_text[:200] + "...")  # Show first 200 chars
-    
-    for line in analysis_text.split('\n'):
-        line = line.strip()
-        if not line:
-            continue
-            
-        if line.startswith('===== RESUME'):
-            if current_analysis:
-                analyses.append(current_analysis)
-            current_analysis = {
-                'resume_name': line.split(' - ')[1].strip('= ') if ' - ' in line else 'Resume',
-                'match_score': 0,
-                'overall': [],
-                'qualifications': [],
-                'missing': [],
-                'improvements': []
-            }
-        elif not analyses and not current_analysis:
-            # If no resume sections found, treat as single analysis
-            current_analysis = {
-                'resume_name': 'Analysis',
-                'match_score': 0,
-                'overall': [],
-                'qualifications': [],
-                'missing': [],
-                'improvements': []
-            }
-            analyses.append(current_analysis)
-            
-            # Parse as single analysis
-            sections = parse_analysis_sections(analysis_text)
-            analyses[0].update(sections)
-            break
-            
-    if current_analysis and current_analysis not in analyses:
-        analyses.append(current_analysis)
-    
-    # Debug
-    st.write(f"DEBUG - Found {len(analyses)} analyses")
-    
-    return analyses or [{
-        'resume_name': 'Analysis',
-        'match_score': 0,
-        'overall': [],
-        'qualifications': [],
-        'missing': [],
-        'improvements': []
-    }]
-
-def render_analysis_results(analysis_text, user_id=None, resume_name=None, job_content=None):
-    """Renders the analysis results in a structured format"""
-    if not analysis_text:
+    ``analysis`` is a structured result from utils.analyze, or stored/legacy
+    text, which is parsed first. Rendering never saves it: the analysis is
+    saved once when it completes, not on every rerun. With a ``user_id``
+    each resume's tab can show its earlier analyses.
+    """
+    if not analysis:
         return
-        
-    # Save analysis to database if we have all required info
-    if user_id and resume_name and job_content:
-        save_analysis(user_id, resume_name, job_content, analysis_text)
     
     st.markdown("### Analysis Results")
     
-    # Parse all analyses
-    analyses = parse_multiple_analyses(analysis_text)
+    parsed = load_analysis(analysis)
+    analyses = parsed['analyses'] or [empty_analysis('Analysis')]
     
     # Create tabs for each analysis
     if len(analyses) > 1:
@@ -136,7 +27,7 @@ def render_analysis_results(analysis_text, user_id=None, resume_name=None, job_c
                 render_single_analysis(analysis)
                 
                 # Show history button
-                if st.button("📊 View Analysis History", key=f"history_{analysis['resume_name']}"):
+                if user_id and st.button("📊 View Analysis History", key=f"history_{analysis['resume_name']}"):
                     history = get_resume_history(user_id, analysis['resume_name'])
                     if history:
                         st.markdown("### Previous Analyses")
@@ -145,10 +36,14 @@ def render_analysis_results(analysis_text, user_id=None, resume_name=None, job_c
                                 st.markdown("**Job Description:**")
                                 st.text(job)
                                 st.markdown("**Analysis:**")
-                                st.markdown(result)
+                                render_single_analysis(result)
     else:
         # Single resume - use the original tab layout
         render_single_analysis(analyses[0])
+    
+    if parsed.get('comparison'):
+        st.markdown("#### Comparison")
+        st.markdown(parsed['comparison'])
 
 def render_single_analysis(analysis):
     """Render a single analysis result"""
@@ -0,0 +1,41 @@
+import numpy as np
+import pandas as pd
+import streamlit as st
+from utils import db
+
+def load_aggregates(user_id, top_skills=5):
+    """Weekly match-score aggregates and top missing skills as DataFrames"""
+    rows, skills = db.get_user_aggregates(user_id, top_skills=top_skills)
+    weekly = pd.DataFrame(rows, columns=['resume', 'week', 'analyses', 'score_sum', 'score_max'])
+    weekly['week'] = pd.to_datetime(weekly['week'])
+    weekly['mean_score'] = weekly['score_sum'] / weekly['analyses']
+    missing = pd.DataFrame(skills, columns=['resume', 'skill', 'mentions'])
+    return weekly, missing
+
+def render_dashboard():
+    """Match-score trends per resume, read from the pre-aggregated tables"""
+    st.markdown("### Insights")
+
+    weekly, missing = load_aggregates(st.session_state.user_id)
+    if weekly.empty:
+        st.info("Run an analysis to see how your resumes score over time")
+        return
+
+    counts = weekly['analyses'].to_numpy()
+    overall = np.average(weekly['mean_score'].to_numpy(), weights=counts)
+    cols = st.columns(3)
+    cols[0].metric("Analyses", int(counts.sum()))
+    cols[1].metric("Mean match score", f"{overall:.1f}")
+    cols[2].metric("Best match score", int(weekly['score_max'].max()))
+
+    st.markdown("#### Weekly mean match score")
+    st.line_chart(weekly.pivot(index='week', columns='resume', values='mean_score'))
+
+    summary = weekly.groupby('resume').agg(
+        analyses=('analyses', 'sum'), score_sum=('score_sum', 'sum'), best=('score_max', 'max'))
+    summary['mean'] = (summary['score_sum'] / summary['analyses']).round(1)
+    st.dataframe(summary[['analyses', 'mean', 'best']])
+
+    if not missing.empty:
+        st.markdown(f"#### Most frequently missing, last {db.SKILL_WEEKS} weeks")
+        st.dataframe(missing, hide_index=True)
@@ -0,0 +1,40 @@
+import streamlit as st
+from utils import db
+from utils.memory import process_rss, session_footprint
+from utils.scheduler import get_scheduler
+from utils.text_cache import resume_texts
+
+def render_memory_usage():
+    """Sidebar report of this session's state size and the process-wide memory"""
+    with st.sidebar.expander("Memory usage"):
+        session = session_footprint(st.session_state)
+        cache = resume_texts.usage()
+        lookups = cache['hits'] + cache['misses']
+        st.caption(f"This session: {session['keys']} keys, {session['bytes'] / 1024:.1f} KB")
+        st.caption(f"Shared resume text: {cache['entries']} texts, {cache['bytes'] / 2 ** 20:.1f} of "
+                   f"{cache['max_bytes'] / 2 ** 20:.0f} MB, "
+                   f"{cache['hits'] / lookups if lookups else 0:.0%} hits, {cache['evictions']} evicted")
+        st.caption(f"Process: {process_rss() / 2 ** 20:.0f} MB resident")
+
+def render_llm_queue():
+    """Sidebar report of requests waiting for and holding an API slot"""
+    with st.sidebar.expander("LLM queue"):
+        queue = get_scheduler().summary()
+        mine = st.session_state.get('user_id')
+        st.caption(f"{queue['in_flight']} of {get_scheduler().concurrency} requests in flight, "
+                   f"{queue['queued']} queued ({queue['queued_by_user'].get(mine, 0)} yours)")
+        if queue['wait_p50_s'] is not None:
+            st.caption(f"Wait for a slot: p50 {queue['wait_p50_s']:.2f} s, p95 {queue['wait_p95_s']:.2f} s "
+                       f"over {queue['granted']} requests")
+        if queue['tokens_available'] is not None:
+            st.caption(f"Tokens available this minute: {queue['tokens_available']:,}")
+
+def render_write_queue():
+    """Sidebar report of write-behind writes, including ones that failed"""
+    if not db.WRITE_BEHIND:
+        return
+    with st.sidebar.expander("Write queue"):
+        writes = db.write_stats()
+        st.caption(f"{writes['writes']} writes committed, {writes['pending']} queued")
+        if writes['failed']:
+            st.error(f"{writes['failed']} writes failed; latest: {writes['last_error']}")
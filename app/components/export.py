@@ -0,0 +1,41 @@
+import os
+import streamlit as st
+from utils import export
+from utils.errors import ExportError
+
+def _discard_export():
+    """Remove the prepared export file once it has been downloaded or replaced"""
+    prepared = st.session_state.pop('history_export', None)
+    if prepared is not None and os.path.exists(prepared['path']):
+        os.remove(prepared['path'])
+
+def render_export():
+    """Download of the user's analysis history as CSV, JSONL or Parquet"""
+    st.markdown("#### Export history")
+    cols = st.columns([2, 1])
+    fmt = cols[0].selectbox("Format", list(export.FORMATS), key='export_format',
+                            format_func=str.upper, label_visibility='collapsed')
+    if cols[1].button("Prepare export", key='prepare_export'):
+        _discard_export()
+        # Exports of sessions that ended without downloading them
+        export.remove_stale_exports()
+        try:
+            with st.spinner("Exporting analysis history..."):
+                path, rows = export.export_to_file(fmt, st.session_state.user_id)
+        except ExportError as e:
+            st.error(str(e))
+            return
+        st.session_state.history_export = {'path': path, 'format': fmt, 'rows': rows}
+
+    prepared = st.session_state.get('history_export')
+    if prepared is None or not os.path.exists(prepared['path']):
+        return
+    with open(prepared['path'], 'rb') as data:
+        st.download_button(
+            f"⬇️ Download {prepared['rows']} analyses ({os.path.getsize(prepared['path']) / 2 ** 20:.1f} MB)",
+            data=data,
+            file_name=f"applyai-history.{prepared['format']}",
+            mime=export.FORMATS[prepared['format']],
+            key='download_export',
+            on_click=_discard_export
+        )
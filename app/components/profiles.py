@@ -0,0 +1,59 @@
+import os
+import pandas as pd
+import streamlit as st
+from utils import profiler
+from utils.auth import current_username, is_admin
+
+def profiling_requested():
+    """Whether to profile this rerun.
+
+    Admins turn profiling on for their own session with ``?profile=1`` (off
+    with ``?profile=0``) or the sidebar toggle; users listed in
+    APPLYAI_PROFILE_USERS are always profiled.
+    """
+    if 'user_id' not in st.session_state:
+        return False
+    flag = st.query_params.get('profile')
+    if flag is not None and is_admin():
+        st.session_state.profile_session = flag.lower() not in ('0', 'false', 'off')
+        # Consumed; leaving it in the URL would override the toggle on every rerun
+        del st.query_params['profile']
+    return st.session_state.get('profile_session', False) or current_username() in profiler.PROFILE_USERS
+
+def render_profiler_toggle():
+    """Admin-only sidebar switch for profiling this session's reruns"""
+    if is_admin():
+        st.sidebar.checkbox("Profile this session", key='profile_session',
+                            help=f"Saves a stack profile of every rerun to {profiler.PROFILE_DIR}")
+
+def render_profiles():
+    """Admin viewer for recently saved rerun profiles"""
+    st.markdown("### Profiles")
+    profiles = profiler.recent_profiles()
+    if not profiles:
+        st.info("No profiles yet. Turn on \"Profile this session\" in the sidebar, open the app with "
+                "?profile=1, or list users in APPLYAI_PROFILE_USERS.")
+        return
+
+    st.dataframe(pd.DataFrame([
+        {'time': p['created_at'], 'user': p['username'], 'wall s': p['wall_s'], 'samples': p['samples'],
+         'hottest': p['hot_functions'][0][0] if p['hot_functions'] else ''}
+        for p in profiles
+    ]), hide_index=True)
+
+    by_id = {p['id']: p for p in profiles}
+    selected = by_id[st.selectbox("Profile", list(by_id), key='profile_id')]
+    samples = selected['samples'] or 1
+    st.caption(f"{selected['username']} at {selected['created_at']}: {selected['wall_s']:.2f} s, "
+               f"{selected['samples']} samples every {selected['interval_ms']:.0f} ms")
+    st.dataframe(pd.DataFrame([
+        {'function': label, 'self %': round(100 * own / samples, 1), 'total %': round(100 * total / samples, 1)}
+        for label, own, total in selected['hot_functions']
+    ]), hide_index=True)
+
+    path = profiler.collapsed_path(selected['id'])
+    if os.path.exists(path):
+        with open(path, 'rb') as data:
+            st.download_button("⬇️ Collapsed stacks", data=data, file_name=f"{selected['id']}.collapsed",
+                               mime='text/plain', key='download_profile',
+                               help="Open in speedscope.app or render with flamegraph.pl")
@@ -1,5 +1,10 @@
+import time
 import streamlit as st
-from utils import file_processing, db
+from utils import file_processing, db, bulk_import
+from utils.text_cache import content_hash, resume_texts
+
+# Seconds an editor must sit idle before its pending edits are written
+SAVE_DELAY = 2.0
 
 def render_resume_manager():
     """Component for managing resume uploads and edits"""
@@ -21,51 +26,176 @@ def render_resume_manager():
                 with st.spinner(f"Processing {uploaded_file.name}..."):
                     text = file_processing.extract_text_from_pdf(uploaded_file)
                     if text:
-                        if 'processed_files' not in st.session_state:
-                            st.session_state.processed_files = {}
                         # Auto-save on upload
-                        if db.save_resume(st.session_state.user_id, uploaded_file.name, text, uploaded_file.type):
-                            st.session_state.processed_files[uploaded_file.name] = {
-                                'text': text,
-                                'file_type': uploaded_file.type
-                            }
+                        if db.confirm_saved(db.save_resume(st.session_state.user_id, uploaded_file.name, text,
+                                                           uploaded_file.type)):
+                            remember_resume(uploaded_file.name, text, uploaded_file.type)
                             st.toast(f"✅ Saved {uploaded_file.name}")
+    
+    render_bulk_import()
+    
+    # Display all processed files in a table format
+    if st.session_state.get('processed_files'):
+        st.markdown("#### Processed Resumes")
+        
+        # Create columns for the table header
+        cols = st.columns([3, 1])
+        cols[0].markdown("**Filename**")
+        cols[1].markdown("**Actions**")
+        
+        st.markdown("---")
+        
+        # Each row is its own fragment, so editing one resume reruns only that row
+        for filename in st.session_state.processed_files:
+            render_resume_row(filename)
+
+def render_bulk_import():
+    """ZIP upload that imports many resumes in one batch"""
+    with st.expander("📦 Bulk import from ZIP"):
+        archive = st.file_uploader(
+            "ZIP archive",
+            type=['zip'],
+            key='zip_uploader',
+            help="A ZIP of PDF, DOCX and TXT resumes"
+        )
+        if archive is None or not st.button("Import", key='bulk_import'):
+            return
+        
+        status = st.empty()
+        pool = bulk_import.get_pool() if bulk_import.WORKERS > 1 else None
+        with st.spinner(f"Importing {archive.name}..."):
+            report = bulk_import.import_zip(
+                st.session_state.user_id, archive, lambda *args: db.confirm_saved(db.save_resumes(*args)), pool=pool,
+                progress=lambda done: status.caption(f"{done} files processed")
+            )
+        
+        for filename, text, file_type in report['imported']:
+            remember_resume(filename, text, file_type)
+        
+        status.caption(f"{report['files_per_s']:.1f} files/sec")
+        if report['imported']:
+            st.success(f"✅ Imported {len(report['imported'])} resumes in {report['seconds']:.1f}s")
+        if report['errors']:
+            st.warning(f"{len(report['errors'])} files could not be imported")
+            st.dataframe(
+                [{'File': name, 'Error': error} for name, error in report['errors']],
+                hide_index=True
+            )
+
+def remember_resume(filename, text, file_type):
+    """Track a saved resume in the session by content hash.
+
+    Session state keeps only the hash; the text itself lives in the shared,
+    size-bounded resume_texts cache.
+    """
+    key = content_hash(text)
+    resume_texts.put(key, text)
+    st.session_state.setdefault('processed_files', {})[filename] = {'hash': key, 'file_type': file_type}
+
+def resume_text(filename):
+    """Saved text of a processed resume, reloaded from the database if evicted"""
+    data = st.session_state.processed_files[filename]
+    text = resume_texts.get(data['hash'])
+    if text is None:
+        text = db.get_resume_content(st.session_state.user_id, filename) or ""
+        data['hash'] = content_hash(text)
+        resume_texts.put(data['hash'], text)
+    return text
+
+def _mark_dirty(filename):
+    """Record when an editor last changed; the write happens once edits settle"""
+    st.session_state[f'dirty_{filename}'] = time.monotonic()
+
+def _flush_edits(filename, notify=True):
+    """Write an editor's latest content if it differs from what was last
+    saved; returns whether anything was written"""
+    if st.session_state.pop(f'dirty_{filename}', None) is None:
+        return False
+    data = st.session_state.processed_files[filename]
+    edited_text = st.session_state.get(f'editor_{filename}')
+    if edited_text is not None and content_hash(edited_text) != data['hash']:
+        if db.confirm_saved(db.save_resume(st.session_state.user_id, filename, edited_text, data['file_type'])):
+            remember_resume(filename, edited_text, data['file_type'])
+            if notify:
+                st.toast(f"✅ Changes saved to {filename}")
+            return True
+    return False
+
+def flush_pending_edits():
+    """Save every editor with unsaved changes, e.g. before running an analysis"""
+    for filename in st.session_state.get('processed_files', {}):
+        _flush_edits(filename)
+
+def _render_save_status(filename):
+    if f'dirty_{filename}' in st.session_state:
+        st.caption("● Unsaved changes")
+    else:
+        st.caption("✓ Saved")
+
+@st.fragment(run_every=SAVE_DELAY)
+def _autosave(filename):
+    """Timer that writes pending edits once the editor has been idle for SAVE_DELAY.
+
+    Only rendered while the editor is dirty. The browser keeps the timer
+    until a run of the row (or the app) leaves it out, and a timer tick
+    can't rerun its row, so once the edits are written the app reruns
+    without it; otherwise an idle editor would keep ticking.
+    """
+    dirty_since = st.session_state.get(f'dirty_{filename}')
+    if dirty_since is not None and time.monotonic() - dirty_since >= SAVE_DELAY:
+        saved = _flush_edits(filename, notify=False)
+        # A toast sent right before a rerun may never show; the row shows it
+        st.session_state[f'saved_{filename}'] = saved
+        st.rerun()
+    _render_save_status(filename)
+
+@st.fragment
+def render_resume_row(filename):
+    """Filename, View/Edit toggle and editor for one processed resume"""
+    cols = st.columns([3, 1])
+    
+    # Filename and preview toggle in first column
+    cols[0].markdown(f"📄 {filename}")
+    
+    # Single action button in second column
+    if cols[1].button("👁️ View/Edit", key=f"view_{filename}"):
+        if st.session_state.get(f'editing_{filename}', False):
+            # Closing the editor saves right away instead of waiting for the
+            # timer, then drops the editor's copy of the text
+            _flush_edits(filename)
+            for key in ('editing', 'editor', 'dirty', 'version'):
+                st.session_state.pop(f'{key}_{filename}', None)
+        else:
+            st.session_state[f'editing_{filename}'] = True
+    
+    # Show editor if requested
+    if st.session_state.get(f'editing_{filename}', False):
+        st.text_area(
+            "Edit content",
+            value=resume_text(filename),
+            height=400,
+            key=f"editor_{filename}",
+            on_change=_mark_dirty,
+            args=(filename,)
+        )
         
-        # Display all processed files in a table format
-        if st.session_state.processed_files:
-            st.markdown("#### Processed Resumes")
-            
-            # Create columns for the table header
-            cols = st.columns([3, 1])
-            cols[0].markdown("**Filename**")
-            cols[1].markdown("**Actions**")
-            
-            st.markdown("---")
-            
-            # Display each file's info and controls
-            for filename, data in st.session_state.processed_files.items():
-                cols = st.columns([3, 1])
-                
-                # Filename and preview toggle in first column
-                cols[0].markdown(f"📄 {filename}")
-                
-                # Single action button in second column
-                if cols[1].button("👁️ View/Edit", key=f"view_{filename}"):
-                    st.session_state[f'editing_{filename}'] = not st.session_state.get(f'editing_{filename}', False)
-                
-                # Show editor if requested
-                if st.session_state.get(f'editing_{filename}', False):
-                    edited_text = st.text_area(
-                        "Edit content",
-                        value=data['text'],
-                        height=400,
-                        key=f"editor_{filename}"
-                    )
-                    
-                    # Auto-save when content changes
-                    if edited_text != data['text']:
-                        if db.save_resume(st.session_state.user_id, filename, edited_text, data['file_type']):
-                            st.session_state.processed_files[filename]['text'] = edited_text
-                            st.toast(f"✅ Changes saved to {filename}")
-                
-                st.markdown("---") 
\ No newline at end of file
+        if f'dirty_{filename}' in st.session_state:
+            _autosave(filename)
+        else:
+            _render_save_status(filename)
+        if st.session_state.pop(f'saved_{filename}', False):
+            st.toast(f"✅ Changes saved to {filename}")
+        
+        _render_version_history(filename)
+    
+    st.markdown("---")
+
+def _render_version_history(filename):
+    """Read-only view of earlier saved versions of a resume"""
+    versions = db.get_resume_versions(st.session_state.user_id, filename)
+    if len(versions) < 2:
+        return
+    with st.expander(f"Version history ({len(versions)} versions)"):
+        labels = {version: f"v{version} · {created_at}" for version, created_at, _, _ in versions}
+        version = st.selectbox("Version", list(labels), format_func=labels.get, key=f"version_{filename}")
+        st.text(db.get_resume_version(st.session_state.user_id, filename, version) or "")
@@ -63,15 +63,30 @@ def get_api_key():
     """Get Anthropic API key from environment or Streamlit secrets"""
     return os.getenv('ANTHROPIC_API_KEY') or st.secrets.get('ANTHROPIC_API_KEY')
 
+# Defaults for the model tiers; override with APPLYAI_FAST_MODEL / APPLYAI_LARGE_MODEL
+DEFAULT_MODELS = {
+    'fast': 'claude-3-5-haiku-20241022',
+    'large': 'claude-3-opus-20240229',
+}
+
+def get_model(tier='large'):
+    """Model name for a tier ('fast' or 'large') from the environment or the defaults"""
+    return os.getenv(f'APPLYAI_{tier.upper()}_MODEL', DEFAULT_MODELS[tier])
+
 def get_database_url():
     """
-    Retrieve database URL from Streamlit secrets.
+    Retrieve the database URL from the environment or Streamlit secrets.
+
+    See utils.db.parse_database_url for the format; None means the default
+    single-file database.
     """
+    url = os.getenv('DATABASE_URL')
+    if url:
+        return url
     try:
-        return st.secrets["DATABASE_URL"]
-    except KeyError:
-        st.error("Database URL is missing from Streamlit secrets.")
-        return "sqlite:///applyai.db"
+        return st.secrets.get("DATABASE_URL")
+    except FileNotFoundError:
+        return None
 
 def get_credentials():
     """
@@ -1,91 +1,132 @@
 """
 Main Streamlit application for ApplyAI.
 """
+import time
+from concurrent.futures import TimeoutError as FutureTimeout
 import streamlit as st
-import PyPDF2
-import io
-from utils.db import save_resume
-from utils.auth import check_auth
+from utils import cancellation, incremental, maintenance, profiler, warmup
+from utils.db import confirm_saved, save_analysis, get_user_resumes
+from utils.auth import check_auth, current_username, is_admin
+from utils.analyze import run_analysis
+from utils.errors import AnalysisError, DeadlineExceeded, ExtractionError
+from components.analysis_results import render_analysis_results
+from components.resume_manager import render_resume_manager, flush_pending_edits
+from components.dashboard import render_dashboard
+from components.export import render_export
+from components.diagnostics import render_llm_queue, render_memory_usage, render_write_queue
+from components.profiles import profiling_requested, render_profiler_toggle, render_profiles
 
-def extract_text_from_pdf(uploaded_file):
-    """Extract text from PDF files"""
-    try:
-        # Read PDF
-        pdf_reader = PyPDF2.PdfReader(io.BytesIO(uploaded_file.getvalue()))
-        text = ""
-        for page in pdf_reader.pages:
-            text += page.extract_text() + "\n"
-        return text
-    except Exception as e:
-        st.error(f"Error extracting text: {str(e)}")
-        return None
+def _warm_up_analysis():
+    """Start fetching and preparing the analysis as soon as the posting settles"""
+    job_input = st.session_state.get('job_posting', '')
+    resumes = get_user_resumes(st.session_state.user_id)
+    if job_input.strip() and resumes:
+        st.session_state.warmup = warmup.warm_up(st.session_state.user_id, job_input, resumes)
 
-def render_resume_section():
-    st.markdown("### Resume Management")
+def _render_keyword_preview():
+    future = st.session_state.get('warmup')
+    if future is None or not future.done() or future.exception() is not None:
+        return
+    scores = future.result()['keyword_scores']
+    st.caption("Keyword overlap: " + " · ".join(f"{name} {score}%" for name, score in scores.items()))
+
+def render_analysis_section():
+    st.markdown("### Job Analysis")
     
-    uploaded_files = st.file_uploader(
-        "Upload Resume(s)",
-        type=['pdf'],
-        accept_multiple_files=True,
-        key='pdf_uploader',
-        help="Upload one or more PDF files"
+    job_content = st.text_area(
+        "Job Posting",
+        height=250,
+        key='job_posting',
+        on_change=_warm_up_analysis,
+        help="Paste the job posting, or its URL, to analyze your resumes against"
     )
+    _render_keyword_preview()
     
-    if uploaded_files:
-        # Process all new uploads first
-        for uploaded_file in uploaded_files:
-            if uploaded_file.name not in st.session_state.get('processed_files', {}):
-                with st.spinner(f"Processing {uploaded_file.name}..."):
-                    text = extract_text_from_pdf(uploaded_file)
-                    if text:
-                        if 'processed_files' not in st.session_state:
-                            st.session_state.processed_files = {}
-                        # Auto-save on upload
-                        if save_resume(st.session_state.user_id, uploaded_file.name, text, uploaded_file.type):
-                            st.session_state.processed_files[uploaded_file.name] = {
-                                'text': text,
-                                'file_type': uploaded_file.type
-                            }
-                            st.toast(f"✅ Saved {uploaded_file.name}")
-        
-        # Display all processed files
-        if st.session_state.get('processed_files'):
-            st.markdown("#### Processed Resumes")
-            
-            # Create columns for the table header
-            cols = st.columns([3, 1])
-            cols[0].markdown("**Filename**")
-            cols[1].markdown("**Actions**")
-            
-            st.markdown("---")
-            
-            # Display each file's info and controls
-            for filename, data in st.session_state.processed_files.items():
-                cols = st.columns([3, 1])
-                
-                # Filename
-                cols[0].markdown(f"📄 {filename}")
-                
-                # View/Edit toggle
-                if cols[1].button("👁️ View/Edit", key=f"view_{filename}"):
-                    st.session_state[f'editing_{filename}'] = not st.session_state.get(f'editing_{filename}', False)
-                
-                # Show editor if requested
-                if st.session_state.get(f'editing_{filename}', False):
-                    edited_text = st.text_area(
-                        "Edit content",
-                        value=data['text'],
-                        height=400,
-                        key=f"editor_{filename}"
-                    )
-                    
-                    # Auto-save when content changes
-                    if edited_text != data['text']:
-                        if save_resume(st.session_state.user_id, filename, edited_text, data['file_type']):
-                            st.session_state.processed_files[filename]['text'] = edited_text
-                            st.toast(f"✅ Changes saved to {filename}")
-                
-                st.markdown("---")
+    if st.button("🔍 Analyze", key='analyze', type="primary"):
+        clicked = time.perf_counter()
+        flush_pending_edits()
+        resumes = get_user_resumes(st.session_state.user_id)
+        if not job_content.strip():
+            st.warning("Please paste a job posting first")
+        elif not resumes:
+            st.warning("Please upload at least one resume first")
+        else:
+            prepared = analysis = future = None
+            usage = {}
+            # Starting a new analysis cancels this session's previous one if it's still running
+            session = cancellation.session_key()
+            token = cancellation.begin(session, user=st.session_state.user_id)
+            with st.spinner("Analyzing resumes..."):
+                try:
+                    prepared = warmup.get_prepared(st.session_state.user_id, job_content, resumes)
+                    # Small edits since the last analysis of this posting only resend the diffs
+                    previous = incremental.previous_analysis(st.session_state.user_id,
+                                                             prepared['job_content'])
+                    changed = incremental.plan_update(previous, resumes, prepared['job_content'])
+                    if changed is None:
+                        future = cancellation.submit(usage, run_analysis, resumes, prepared['job_content'],
+                                                     prepared['prompt'], usage, token)
+                    else:
+                        future = cancellation.submit(usage, incremental.reanalyze, previous, resumes, changed,
+                                                     prepared['job_content'], usage, token)
+                    analysis = _wait_for_analysis(future, clicked)
+                    elapsed_ms = (time.perf_counter() - clicked) * 1000
+                except ExtractionError as e:
+                    st.error(str(e))
+                except DeadlineExceeded:
+                    st.error(f"The analysis took longer than {cancellation.ANALYSIS_DEADLINE:.0f} seconds "
+                             "and was stopped. Please try again.")
+                except AnalysisError:
+                    pass
+                finally:
+                    # A rerun or a closed session interrupts this script; don't
+                    # leave its request running
+                    if future is not None and not future.done():
+                        token.cancel('abandoned')
+                    cancellation.finish(session, token)
+            if analysis:
+                if usage:
+                    confirm_saved(save_analysis(st.session_state.user_id, prepared['job_content'], analysis, resumes))
+                st.session_state.analysis_result = analysis
+                st.session_state.analysis_report = _usage_report(changed, resumes, usage, elapsed_ms)
+    
+    if st.session_state.get('analysis_result'):
+        if st.session_state.get('analysis_report'):
+            st.caption(st.session_state.analysis_report)
+        render_analysis_results(st.session_state.analysis_result, st.session_state.user_id)
+
+def _wait_for_analysis(future, clicked):
+    """Wait for a background analysis while updating a status line.
+
+    Each update gives Streamlit a chance to stop this script when the user
+    changes an input or leaves, instead of blocking on the request.
+    """
+    status = st.empty()
+    while True:
+        try:
+            result = future.result(timeout=0.25)
+        except FutureTimeout:
+            # Not the builtin TimeoutError before Python 3.11
+            status.caption(f"Waiting for the model… {time.perf_counter() - clicked:.0f} s")
+            continue
+        status.empty()
+        return result
+
+def _usage_report(changed, resumes, usage, elapsed_ms):
+    """One-line summary of what the last analysis request cost"""
+    if changed is None:
+        scope = f"Full analysis of {len(resumes)} resume(s)"
+        if 'fast' in usage.get('tiers', {}):
+            scope += f", {usage.get('escalated', 0)} escalated to the large model"
+    elif not changed:
+        return "No resume changed since the last analysis; showing it again"
+    else:
+        scope = f"Updated {len(changed)} of {len(resumes)} resume(s) from the edits"
+    tokens = f"{usage.get('input_tokens', 0):,} input / {usage.get('output_tokens', 0):,} output tokens"
+    report = f"{scope} · {tokens} · {elapsed_ms / 1000:.1f} s"
+    if usage.get('queue_s', 0) >= 1:
+        report += f" ({usage['queue_s']:.1f} s waiting for a free slot)"
+    return report
 
 def run():
     """Main app entry point"""
@@ -102,14 +143,36 @@ def run():
     # Main app layout
     st.title("ApplyAI")
     
-    # Tabs for different sections
-    tab1, tab2 = st.tabs(["Resume Management", "Analysis Results"])
+    # Tabs for different sections; admins also get the profile viewer
+    names = ["Resume Management", "Analysis Results", "Insights"]
+    tabs = st.tabs(names + ["Profiles"] if is_admin() else names)
+    tab1, tab2, tab3 = tabs[:3]
     
     with tab1:
-        render_resume_section()
+        render_resume_manager()
         
     with tab2:
-        render_analysis_results()
+        render_analysis_section()
+    
+    with tab3:
+        render_dashboard()
+        render_export()
+    
+    if is_admin():
+        with tabs[3]:
+            render_profiles()
+    
+    render_memory_usage()
+    render_llm_queue()
+    render_write_queue()
+    render_profiler_toggle()
 
 if __name__ == "__main__":
-    run()
\ No newline at end of file
+    # Retention, ANALYZE and incremental vacuum in the background; a no-op
+    # after the first rerun in this process
+    maintenance.start_scheduler()
+    if profiling_requested():
+        with profiler.profiled(current_username(), cancellation.session_key()):
+            run()
+    else:
+        run()
\ No newline at end of file
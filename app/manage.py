@@ -0,0 +1,210 @@
+"""
+Command-line maintenance tasks for ApplyAI.
+
+Run from the repository root, against the database in DATABASE_URL or
+APPLYAI_DB_PATH (default app/applyai.db):
+
+    python app/manage.py stats
+    python app/manage.py migrate-storage
+    python app/manage.py import-resumes --user alice resumes.zip
+    python app/manage.py rebuild-aggregates
+    python app/manage.py dedupe-analyses
+    python app/manage.py export-history --format parquet -o history.parquet
+    python app/manage.py maintenance --vacuum-seconds 30
+    python app/manage.py set-retention --user alice --days 365
+    python app/manage.py bulk-analyze --user alice postings/
+    python app/manage.py batches --wait
+"""
+import argparse
+import os
+import sys
+from utils import db, batches, bulk_import, export, maintenance
+from utils.errors import ExportError
+
+def stats(args):
+    """Row counts and file sizes across the central database and all shards"""
+    with db.get_db() as conn:
+        users = conn.execute("SELECT COUNT(*) FROM users").fetchone()[0]
+    resumes = sum(count for count, in db.fan_out("SELECT COUNT(*) FROM resumes"))
+    analyses = sum(count for count, in db.fan_out("SELECT COUNT(*) FROM analysis_history"))
+    print(f"{users} users, {resumes} resumes, {analyses} analyses in {db.SHARDS} shard(s)")
+    paths = [db.DB_PATH] + [db.shard_path(i) for i in range(db.SHARDS) if db.shard_path(i) != db.DB_PATH]
+    for path in paths:
+        print(f"  {path}: {os.path.getsize(path) / 2 ** 20:.1f} MB")
+
+def migrate_storage(args):
+    """Deduplicate job postings and compress analysis text"""
+    migrated = db.migrate_analysis_storage(batch_size=args.batch_size)
+    if args.vacuum:
+        db.for_each_shard(lambda conn: conn.execute("VACUUM"), parallel=False)
+    print(f"Migrated {migrated} analyses")
+
+def dedupe_analyses(args):
+    """Delete repeated copies of the same analysis saved before analyses were keyed"""
+    deleted = db.dedupe_analysis_history(batch_size=args.batch_size)
+    if deleted:
+        db.rebuild_aggregates(batch_size=args.batch_size)
+    print(f"Deleted {deleted} duplicate analyses")
+
+def rebuild_aggregates(args):
+    """Recompute the match-score dashboard aggregates from analysis history"""
+    rebuilt = db.rebuild_aggregates(batch_size=args.batch_size)
+    print(f"Rebuilt aggregates from {rebuilt} analyses")
+
+def import_resumes(args):
+    """Bulk import PDF, DOCX and TXT resumes from a ZIP archive"""
+    with db.get_db() as conn:
+        row = conn.execute("SELECT id FROM users WHERE username = ?", (args.user,)).fetchone()
+    if row is None:
+        print(f"No such user: {args.user}")
+        return 1
+    pool = bulk_import.get_pool() if bulk_import.WORKERS > 1 else None
+    with open(args.archive, 'rb') as archive:
+        report = bulk_import.import_zip(row[0], archive, lambda *args: db.confirm_saved(db.save_resumes(*args)),
+                                        pool=pool)
+    for name, error in report['errors']:
+        print(f"  {name}: {error}")
+    print(f"Imported {len(report['imported'])} resumes, {len(report['errors'])} errors, "
+          f"{report['files_per_s']:.1f} files/sec")
+    return 1 if report['errors'] else 0
+
+def export_history(args):
+    """Export analysis history for one user, or all users, as CSV, JSONL or Parquet"""
+    user_id = None
+    if args.user:
+        with db.get_db() as conn:
+            row = conn.execute("SELECT id FROM users WHERE username = ?", (args.user,)).fetchone()
+        if row is None:
+            print(f"No such user: {args.user}")
+            return 1
+        user_id = row[0]
+    output = args.output or f"applyai-history.{args.format}"
+    try:
+        if output == '-':
+            rows = export.export_history(args.format, sys.stdout.buffer, user_id, args.chunk_size)
+        else:
+            with open(output, 'wb') as out:
+                rows = export.export_history(args.format, out, user_id, args.chunk_size)
+    except ExportError as e:
+        print(str(e), file=sys.stderr)
+        return 1
+    print(f"Exported {rows} analyses to {output}", file=sys.stderr)
+
+def run_maintenance(args):
+    """Delete history past its retention, refresh planner statistics and reclaim free pages"""
+    if args.convert_incremental:
+        maintenance.convert_to_incremental()
+    reports = maintenance.run_maintenance(retention=not args.skip_retention, vacuum_seconds=args.vacuum_seconds)
+    legacy = [report['path'] for report in reports if not report['incremental_vacuum']]
+    if legacy:
+        print(f"{len(legacy)} database file(s) predate incremental vacuum; free pages there are only "
+              f"reused, not returned. Run once with --convert-incremental while the app is stopped.")
+
+def set_retention(args):
+    """Set how many days of analysis history one user keeps"""
+    days = None if args.days < 0 else args.days
+    with db.get_db() as conn:
+        updated = conn.execute("UPDATE users SET retention_days = ? WHERE username = ?",
+                               (days, args.user)).rowcount
+    if not updated:
+        print(f"No such user: {args.user}")
+        return 1
+    print(f"{args.user}: " + ("default retention" if days is None else
+                              "keeps everything" if days == 0 else f"keeps {days} days"))
+
+def _posting_files(paths):
+    for path in paths:
+        if os.path.isdir(path):
+            yield from sorted(os.path.join(path, name) for name in os.listdir(path) if name.endswith('.txt'))
+        else:
+            yield path
+
+def _poll_batches(args):
+    remaining = batches.poll(wait=args.wait)
+    counts = batches.summary()
+    print(", ".join(f"{count} {status}" for status, count in counts.items()))
+    return remaining
+
+def bulk_analyze(args):
+    """Analyze a user's resumes against many job postings through the Message Batches API"""
+    with db.get_db() as conn:
+        row = conn.execute("SELECT id FROM users WHERE username = ?", (args.user,)).fetchone()
+    if row is None:
+        print(f"No such user: {args.user}")
+        return 1
+    postings = []
+    for path in _posting_files(args.postings):
+        with open(path, encoding='utf-8') as f:
+            postings.append(f.read())
+    batches.queue_analyses(row[0], [posting for posting in postings if posting.strip()])
+    batches.submit_queued()
+    _poll_batches(args)
+
+def check_batches(args):
+    """Submit queued bulk analyses and save the results of batches that have ended"""
+    if args.retry_failed:
+        print(f"Requeued {batches.requeue_failed()} failed analyses")
+    batches.submit_queued()
+    _poll_batches(args)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="ApplyAI maintenance tasks")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    commands.add_parser('stats', help=stats.__doc__).set_defaults(func=stats)
+
+    migrate = commands.add_parser('migrate-storage', help=migrate_storage.__doc__)
+    migrate.add_argument('--batch-size', type=int, default=5000)
+    migrate.add_argument('--vacuum', action='store_true', help="reclaim freed space afterwards")
+    migrate.set_defaults(func=migrate_storage)
+
+    rebuild = commands.add_parser('rebuild-aggregates', help=rebuild_aggregates.__doc__)
+    rebuild.add_argument('--batch-size', type=int, default=5000)
+    rebuild.set_defaults(func=rebuild_aggregates)
+
+    dedupe = commands.add_parser('dedupe-analyses', help=dedupe_analyses.__doc__)
+    dedupe.add_argument('--batch-size', type=int, default=5000)
+    dedupe.set_defaults(func=dedupe_analyses)
+
+    imports = commands.add_parser('import-resumes', help=import_resumes.__doc__)
+    imports.add_argument('--user', required=True, help="username to import for")
+    imports.add_argument('archive', help="path to a .zip file")
+    imports.set_defaults(func=import_resumes)
+
+    exports = commands.add_parser('export-history', help=export_history.__doc__)
+    exports.add_argument('--format', choices=list(export.FORMATS), default='csv')
+    exports.add_argument('--user', help="username to export for (default: all users)")
+    exports.add_argument('-o', '--output', help="output file, or - for stdout (default applyai-history.FORMAT)")
+    exports.add_argument('--chunk-size', type=int, default=export.CHUNK_ROWS)
+    exports.set_defaults(func=export_history)
+
+    maint = commands.add_parser('maintenance', help=run_maintenance.__doc__)
+    maint.add_argument('--vacuum-seconds', type=float, default=maintenance.VACUUM_SECONDS,
+                       help="time spent returning free pages per database file")
+    maint.add_argument('--skip-retention', action='store_true', help="don't delete old history")
+    maint.add_argument('--convert-incremental', action='store_true',
+                       help="first switch older database files to incremental vacuum (full VACUUM, blocks writers)")
+    maint.set_defaults(func=run_maintenance)
+
+    retention = commands.add_parser('set-retention', help=set_retention.__doc__)
+    retention.add_argument('--user', required=True)
+    retention.add_argument('--days', type=int, required=True,
+                           help="days kept; 0 keeps everything, -1 restores the APPLYAI_RETENTION_DAYS default")
+    retention.set_defaults(func=set_retention)
+
+    bulk = commands.add_parser('bulk-analyze', help=bulk_analyze.__doc__)
+    bulk.add_argument('--user', required=True, help="username whose resumes are analyzed")
+    bulk.add_argument('--wait', action='store_true', help="poll until the results are saved")
+    bulk.add_argument('postings', nargs='+', help="job posting .txt files, or directories of them")
+    bulk.set_defaults(func=bulk_analyze)
+
+    batch = commands.add_parser('batches', help=check_batches.__doc__)
+    batch.add_argument('--wait', action='store_true', help="poll until every batch has ended")
+    batch.add_argument('--retry-failed', action='store_true', help="queue failed analyses again first")
+    batch.set_defaults(func=check_batches)
+
+    args = parser.parse_args(argv)
+    return args.func(args) or 0
+
+if __name__ == '__main__':
+    sys.exit(main())
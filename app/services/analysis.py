@@ -7,6 +7,7 @@ import streamlit as st
 from datetime import datetime
 import sqlite3
 from .auth import get_connection
+from ..config import get_model
 
 def extract_text_from_url(url):
     """Extract text content from a URL"""
@@ -49,7 +50,7 @@ def analyze_job_posting(job_post, system_prompt, analysis_prompt, temperature=0.
         ]
         
         response = client.messages.create(
-            model="claude-3-sonnet-20240229",
+            model=get_model('fast'),
             max_tokens=2000,
             temperature=temperature,
             messages=messages
@@ -4,15 +4,13 @@ Resume processing services for ApplyAI.
 """
 
 import streamlit as st
-import PyPDF2
-import docx2txt
 from .auth import get_connection
+from ..utils.file_processing import pdf_text, docx_text
 
 def extract_text_from_pdf(pdf_file) -> str:
     """Extract text from a PDF file"""
     try:
-        pdf_reader = PyPDF2.PdfReader(pdf_file)
-        return " ".join(page.extract_text() for page in pdf_reader.pages)
+        return pdf_text(pdf_file)
     except Exception as e:
         st.error(f"Error reading PDF: {str(e)}")
         return None
@@ -20,7 +18,7 @@ def extract_text_from_pdf(pdf_file) -> str:
 def extract_text_from_docx(docx_file) -> str:
     """Extract text from a DOCX file"""
     try:
-        return docx2txt.process(docx_file)
+        return docx_text(docx_file)
     except Exception as e:
         st.error(f"Error reading DOCX: {str(e)}")
         return None
@@ -31,15 +29,14 @@ def extract_text_from_file(uploaded_file) -> tuple[str, bytes]:
     
     if uploaded_file.type == "application/pdf":
         try:
-            pdf_reader = PyPDF2.PdfReader(uploaded_file)
-            text_content = " ".join(page.extract_text() for page in pdf_reader.pages)
+            text_content = pdf_text(uploaded_file)
             return text_content, file_content
         except Exception as e:
             st.error(f"Error reading PDF: {str(e)}")
             return None, None
     elif uploaded_file.type == "application/vnd.openxmlformats-officedocument.wordprocessingml.document":
         try:
-            text_content = docx2txt.process(uploaded_file)
+            text_content = docx_text(uploaded_file)
             return text_content, file_content
         except Exception as e:
             st.error(f"Error reading DOCX: {str(e)}")
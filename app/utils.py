@@ -1,3 +1,5 @@
+from config import get_model
+
 def analyze_resume_for_job(resume_content, job_content):
     """
     Send resume and job posting to Claude for analysis
@@ -22,7 +24,7 @@ def analyze_resume_for_job(resume_content, job_content):
     # Make request to Claude API
     try:
         response = anthropic.messages.create(
-            model="claude-3-opus-20240229",
+            model=get_model('large'),
             max_tokens=4000,
             temperature=0,
             system="You are an expert career advisor and resume consultant.",
@@ -4,9 +4,20 @@ Utility module for Job Buddy application.
 This module provides package-level imports and initialization for utility functions.
 """
 
-from .errors import APIError, AnalysisError
+from .errors import (
+    APIError, AnalysisError, AnalysisSchemaError, AnalysisCancelled, DeadlineExceeded, StorageError,
+    WriteQueueFull, ExportError, ExtractionError, DocumentTooLarge
+)
 
 __all__ = [
     'APIError',
     'AnalysisError',
+    'AnalysisSchemaError',
+    'AnalysisCancelled',
+    'DeadlineExceeded',
+    'StorageError',
+    'WriteQueueFull',
+    'ExportError',
+    'ExtractionError',
+    'DocumentTooLarge',
 ]
\ No newline at end of file
@@ -1,22 +1,362 @@
+import os
+import statistics
+import threading
+import time
+from collections import deque
 import streamlit as st
-from anthropic import Anthropic
-from .errors import AnalysisError
+from anthropic import Anthropic, DefaultHttpxClient
+from config import DEFAULT_MODELS, get_model
+from . import llm_transport, scheduler
+from .errors import AnalysisError, AnalysisSchemaError, AnalysisCancelled
+from .segments import render_segments, segment_resume, select_segments
 
-def analyze_resume_for_job(resumes, job_content):
-    """Analyze multiple resumes against a job posting"""
+# 'structured' asks for JSON through a forced tool call; 'text' is the
+# original free-text template parsed by components.analysis_results
+ANALYSIS_MODE = os.getenv('APPLYAI_ANALYSIS_MODE', 'structured').lower()
+
+# Extra requests allowed when a structured response fails validation
+SCHEMA_RETRIES = 1
+
+# Quote only the resume sections relevant to the posting (utils.segments)
+# instead of each resume's full text
+SELECT_SECTIONS = os.getenv('APPLYAI_SELECT_SECTIONS', '1').lower() in ('1', 'true', 'yes')
+
+# Model tiers. With 'tiered' routing the fast model scores every resume and
+# only the ESCALATE_TOP best, plus any it marks low confidence, are analyzed
+# again by the large model; 'large' sends everything to the large model.
+MODELS = {tier: get_model(tier) for tier in DEFAULT_MODELS}
+ROUTING = os.getenv('APPLYAI_ROUTING', 'tiered').lower()
+ESCALATE_TOP = int(os.getenv('APPLYAI_ESCALATE_TOP', '1'))
+
+# Per-tier request counts, tokens and recent latencies since start-up
+_stats_lock = threading.Lock()
+tier_stats = {
+    tier: {'requests': 0, 'input_tokens': 0, 'output_tokens': 0, 'latencies': deque(maxlen=1000)}
+    for tier in MODELS
+}
+routing_stats = {'routed': 0, 'escalated': 0}
+
+SECTIONS = ('overall', 'qualifications', 'missing', 'improvements')
+
+_POINTS = {"type": "array", "items": {"type": "string"}, "maxItems": 6}
+
+ANALYSIS_TOOL = {
+    "name": "record_resume_analysis",
+    "description": "Record how well each resume matches the job posting.",
+    "input_schema": {
+        "type": "object",
+        "properties": {
+            "analyses": {
+                "type": "array",
+                "description": "One entry per resume, in the order given",
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "resume_name": {"type": "string"},
+                        "match_score": {"type": "integer", "minimum": 0, "maximum": 100},
+                        "overall": {**_POINTS, "description": "Overall assessment"},
+                        "qualifications": {**_POINTS, "description": "Qualifications the resume matches"},
+                        "missing": {**_POINTS, "description": "Missing skills or experience"},
+                        "improvements": {**_POINTS, "description": "Suggested resume improvements"},
+                        "confidence": {
+                            "type": "string",
+                            "enum": ["low", "medium", "high"],
+                            "description": "How confident you are in this assessment",
+                        },
+                    },
+                    "required": ["resume_name", "match_score", *SECTIONS],
+                },
+            },
+            "comparison": {
+                "type": "string",
+                "description": "Which resume fits best and why; empty for a single resume",
+            },
+        },
+        "required": ["analyses"],
+    },
+}
+
+def get_client():
+    """Create an Anthropic client from the environment or Streamlit secrets, on
+    the APPLYAI_LLM_TRANSPORT transport (see utils.llm_transport)"""
+    transport = llm_transport.get_transport()
+    if transport is None:
+        return Anthropic(api_key=os.getenv('ANTHROPIC_API_KEY') or st.secrets['ANTHROPIC_API_KEY'])
+    # Replayed and synthetic responses need no key
+    api_key = os.getenv('ANTHROPIC_API_KEY') or ('offline' if llm_transport.LLM_TRANSPORT != 'record'
+                                                 else st.secrets['ANTHROPIC_API_KEY'])
+    return Anthropic(api_key=api_key, http_client=DefaultHttpxClient(transport=transport))
+
+def validate_analysis(data, resume_names):
+    """Check a structured analysis against ANALYSIS_TOOL's schema and normalize it.
+
+    Returns ``{'analyses': [...], 'comparison': str}``; raises
+    AnalysisSchemaError describing the first problem found.
+    """
+    if not isinstance(data, dict) or not isinstance(data.get('analyses'), list):
+        raise AnalysisSchemaError("'analyses' must be a list")
+    if len(data['analyses']) != len(resume_names):
+        raise AnalysisSchemaError(
+            f"Expected {len(resume_names)} analyses (one per resume), got {len(data['analyses'])}"
+        )
+    analyses = []
+    for idx, (item, name) in enumerate(zip(data['analyses'], resume_names)):
+        if not isinstance(item, dict):
+            raise AnalysisSchemaError(f"analyses[{idx}] must be an object")
+        score = item.get('match_score')
+        if isinstance(score, str) and score.rstrip('%').strip().isdigit():
+            score = int(score.rstrip('%'))
+        if not isinstance(score, (int, float)) or isinstance(score, bool) or not 0 <= score <= 100:
+            raise AnalysisSchemaError(f"analyses[{idx}].match_score must be a number from 0 to 100")
+        analysis = {'resume_name': name, 'match_score': int(score)}
+        for section in SECTIONS:
+            points = item.get(section)
+            if not isinstance(points, list) or not all(isinstance(p, str) for p in points):
+                raise AnalysisSchemaError(f"analyses[{idx}].{section} must be a list of strings")
+            analysis[section] = [p.strip().lstrip('•').strip() for p in points if p.strip()]
+        if item.get('confidence') in ('low', 'medium', 'high'):
+            analysis['confidence'] = item['confidence']
+        analyses.append(analysis)
+    comparison = data.get('comparison') or ""
+    if not isinstance(comparison, str):
+        raise AnalysisSchemaError("'comparison' must be a string")
+    return {'analyses': analyses, 'comparison': comparison.strip()}
+
+def _tool_call(response):
+    return next((block for block in response.content
+                 if block.type == 'tool_use' and block.name == ANALYSIS_TOOL['name']), None)
+
+def resume_excerpt(content, job_content, segments=None):
+    """A resume as quoted for this posting: the relevant sections only, when
+    SELECT_SECTIONS is on. ``segments`` are the ones stored at ingest, if loaded."""
+    if not SELECT_SECTIONS:
+        return content
+    if segments is None:
+        segments = segment_resume(content)
+    return render_segments(*select_segments(segments, job_content)) if segments else content
+
+def resume_context(resumes, job_content, segments=None):
+    """The resumes as they are quoted in the analysis prompt.
+
+    ``segments`` maps filenames to their stored segments (see
+    db.get_resume_segments); resumes not in it are segmented here.
+    """
+    segments = segments or {}
+    return "".join(
+        f"\nResume {idx + 1} - {name}:\n{resume_excerpt(content, job_content, segments.get(name))}\n"
+        for idx, (name, content, *_) in enumerate(resumes)
+    )
+
+def build_prompt(resumes, job_content, mode=None, segments=None):
+    """The analysis prompt for ``mode`` (default ANALYSIS_MODE)"""
+    if (mode or ANALYSIS_MODE) == 'text':
+        return _text_prompt(resumes, job_content, segments)
+    return f"""As an AI career advisor, analyze each of these resumes against the job posting.
+Give each resume a match score and 3-5 concise points per section. If there are
+several resumes, say in the comparison which is best suited for this position.
+{resume_context(resumes, job_content, segments)}
+JOB POSTING:
+{job_content}"""
+
+def _add_usage(usage, response, tier, seconds):
+    """Record a response's tokens and latency in tier_stats and in ``usage``, if given"""
+    with _stats_lock:
+        stats = tier_stats[tier]
+        stats['requests'] += 1
+        stats['input_tokens'] += response.usage.input_tokens
+        stats['output_tokens'] += response.usage.output_tokens
+        stats['latencies'].append(seconds)
+    if usage is not None:
+        for scope in (usage, usage.setdefault('tiers', {}).setdefault(tier, {})):
+            scope['requests'] = scope.get('requests', 0) + 1
+            scope['input_tokens'] = scope.get('input_tokens', 0) + response.usage.input_tokens
+            scope['output_tokens'] = scope.get('output_tokens', 0) + response.usage.output_tokens
+
+def _partial_usage(usage, stream):
+    """Add what an aborted stream had used so far to ``usage``"""
     try:
-        client = Anthropic(api_key=st.secrets['ANTHROPIC_API_KEY'])
-        
-        # Build resume context
-        resume_context = ""
-        for idx, (name, content, file_type, created_at, updated_at) in enumerate(resumes):
-            resume_context += f"\nResume {idx + 1} - {name}:\n{content}\n"
-        
-        prompt = f"""
+        snapshot = stream.current_message_snapshot
+    except Exception:
+        return  # Aborted before the first event
+    if usage is not None:
+        output_chars = sum(len(getattr(block, 'text', '') or str(getattr(block, 'input', '') or ''))
+                           for block in snapshot.content)
+        usage['input_tokens'] = usage.get('input_tokens', 0) + snapshot.usage.input_tokens
+        usage['output_tokens'] = usage.get('output_tokens', 0) + max(snapshot.usage.output_tokens, output_chars // 4)
+
+def _stream(client, token, usage, **request):
+    """Stream a request that the token can abort, timed out at its deadline.
+
+    A token cancelled before the response headers arrive closes the stream
+    as soon as it opens.
+    """
+    token.check()
+    stream = None
+    try:
+        with client.messages.stream(timeout=token.remaining(), **request) as stream:
+            remove = token.on_cancel(stream.close)
+            try:
+                for _ in stream:
+                    if token.cancelled:
+                        break
+            finally:
+                remove()
+            if not token.cancelled:
+                return stream.get_final_message()
+    except Exception:
+        # Closing the stream from another thread surfaces as a read error,
+        # and the deadline as a timeout
+        if not token.cancelled and token.remaining() > 0:
+            raise
+    if stream is not None:
+        _partial_usage(usage, stream)
+    token.check()
+
+def send(client, tier, usage=None, token=None, **request):
+    """One request to the ``tier`` model, recorded with _add_usage.
+
+    With a CancelToken the response is streamed so cancelling the token, or
+    reaching its deadline, aborts the HTTP request. The request first waits
+    its turn in utils.scheduler, queued for the token's user.
+    """
+    user = token.user if token is not None else None
+    with scheduler.get_scheduler().slot(user, scheduler.estimate_tokens(request), token) as slot:
+        if usage is not None:
+            usage['queue_s'] = usage.get('queue_s', 0.0) + slot['waited_s']
+        start = time.perf_counter()
+        if token is None:
+            response = client.messages.create(model=MODELS[tier], **request)
+        else:
+            response = _stream(client, token, usage, model=MODELS[tier], **request)
+        slot['used'] = response.usage.input_tokens + response.usage.output_tokens
+    _add_usage(usage, response, tier, time.perf_counter() - start)
+    return response
+
+def routing_summary():
+    """Per-tier requests, tokens and p50 latency, and the escalation rate"""
+    with _stats_lock:
+        summary = {
+            tier: {
+                'requests': stats['requests'],
+                'input_tokens': stats['input_tokens'],
+                'output_tokens': stats['output_tokens'],
+                'p50_s': statistics.median(stats['latencies']) if stats['latencies'] else None,
+            }
+            for tier, stats in tier_stats.items()
+        }
+        routed = routing_stats['routed']
+        summary['escalation_rate'] = routing_stats['escalated'] / routed if routed else None
+    return summary
+
+def request_structured(client, prompt, names, usage=None, tier='large', token=None):
+    """Send ``prompt`` with ANALYSIS_TOOL forced and validate the answer for ``names``.
+
+    A response that fails validation is sent back with the error and
+    requested again, up to SCHEMA_RETRIES times.
+    """
+    messages = [{"role": "user", "content": prompt}]
+    for attempt in range(SCHEMA_RETRIES + 1):
+        response = send(
+            client, tier, usage, token,
+            messages=messages,
+            tools=[ANALYSIS_TOOL],
+            tool_choice={"type": "tool", "name": ANALYSIS_TOOL['name']},
+            max_tokens=4000
+        )
+        call = _tool_call(response)
+        try:
+            if call is None:
+                raise AnalysisSchemaError(f"Response did not call {ANALYSIS_TOOL['name']}")
+            return validate_analysis(call.input, names)
+        except AnalysisSchemaError as e:
+            if attempt == SCHEMA_RETRIES:
+                raise
+            print(f"Structured analysis failed validation, retrying: {str(e)}")
+            # Hand the validation error back so the retry can correct it
+            messages = messages + [{"role": "assistant", "content": response.content}]
+            if call is not None:
+                messages.append({"role": "user", "content": [{
+                    "type": "tool_result",
+                    "tool_use_id": call.id,
+                    "is_error": True,
+                    "content": f"Invalid input: {str(e)}. Call the tool again with corrected input.",
+                }]})
+            else:
+                messages.append({"role": "user", "content": f"Call {ANALYSIS_TOOL['name']} with the analysis."})
+
+def pick_escalations(result, top=ESCALATE_TOP):
+    """Names of the resumes the large model should re-analyze after a fast pass:
+    the ``top`` highest scores and any marked low confidence"""
+    ranked = sorted(result['analyses'], key=lambda item: item['match_score'], reverse=True)
+    picked = {item['resume_name'] for item in ranked[:top]}
+    picked.update(item['resume_name'] for item in ranked if item.get('confidence') == 'low')
+    return [item['resume_name'] for item in result['analyses'] if item['resume_name'] in picked]
+
+def _escalation_prompt(resumes, job_content, fast_result):
+    prompt = build_prompt(resumes, job_content, mode='structured')
+    names = {name for name, *_ in resumes}
+    others = "".join(f"\n- {item['resume_name']}: {item['match_score']}"
+                     for item in fast_result['analyses'] if item['resume_name'] not in names)
+    if others:
+        prompt += f"\n\nThese other resumes were scored separately; consider them in the comparison too:{others}"
+    return prompt
+
+def route_structured(client, resumes, job_content, prompt=None, usage=None, token=None):
+    """Structured analysis through the fast tier, escalating picked resumes to the large tier"""
+    names = [name for name, *_ in resumes]
+    prompt = prompt or build_prompt(resumes, job_content, mode='structured')
+    if ROUTING != 'tiered' or len(resumes) <= ESCALATE_TOP:
+        # Everything would be escalated anyway; skip the fast pass
+        return request_structured(client, prompt, names, usage, token=token)
+
+    result = request_structured(client, prompt, names, usage, tier='fast', token=token)
+    escalate = pick_escalations(result)
+    with _stats_lock:
+        routing_stats['routed'] += len(names)
+        routing_stats['escalated'] += len(escalate)
+    if usage is not None:
+        usage['escalated'] = usage.get('escalated', 0) + len(escalate)
+    if not escalate:
+        return result
+
+    subset = [row for row in resumes if row[0] in escalate]
+    update = request_structured(client, _escalation_prompt(subset, job_content, result), escalate, usage,
+                                token=token)
+    updated = {item['resume_name']: item for item in update['analyses']}
+    return {
+        'analyses': [updated.get(item['resume_name'], item) for item in result['analyses']],
+        'comparison': update['comparison'] or result['comparison'],
+    }
+
+def analyze_resumes_structured(resumes, job_content, prompt=None, usage=None, token=None):
+    """Analyze multiple resumes against a job posting, returning validated structured results.
+
+    ``prompt`` is a prompt prepared earlier by build_prompt for these inputs.
+    Token counts are added to the ``usage`` dict when one is passed, and a
+    CancelToken makes the requests abortable.
+    """
+    try:
+        return route_structured(get_client(), resumes, job_content, prompt, usage, token)
+    except AnalysisCancelled:
+        raise
+    except Exception as e:
+        st.error(f"Analysis Error: {str(e)}")
+        raise AnalysisError(f"Error during analysis: {str(e)}")
+
+def run_analysis(resumes, job_content, prompt=None, usage=None, token=None):
+    """Analyze resumes in the configured ANALYSIS_MODE"""
+    if ANALYSIS_MODE == 'text':
+        return analyze_resume_for_job(resumes, job_content, prompt, usage, token)
+    return analyze_resumes_structured(resumes, job_content, prompt, usage, token)
+
+def _text_prompt(resumes, job_content, segments=None):
+    # The template has always shown the last resume's name in its example header
+    name = resumes[-1][0] if resumes else ""
+    return f"""
         As an AI career advisor, analyze these resumes against the job posting and provide detailed feedback.
         For each resume, provide a separate analysis in the format shown below.
 
-        {resume_context}
+        {resume_context(resumes, job_content, segments)}
 
         JOB POSTING:
         {job_content}
@@ -49,18 +389,25 @@ def analyze_resume_for_job(resumes, job_content):
 
         Finally, if there are multiple resumes, provide a comparison and recommendation for which resume is best suited for this position.
         """
+
+def analyze_resume_for_job(resumes, job_content, prompt=None, usage=None, token=None):
+    """Analyze multiple resumes against a job posting"""
+    try:
+        client = get_client()
         
-        response = client.messages.create(
-            model="claude-3-opus-20240229",
+        response = send(
+            client, 'large', usage, token,
             messages=[{
                 "role": "user",
-                "content": prompt
+                "content": prompt or _text_prompt(resumes, job_content)
             }],
             max_tokens=4000
         )
         
         return response.content[0].text
         
+    except AnalysisCancelled:
+        raise
     except Exception as e:
         st.error(f"Analysis Error: {str(e)}")
         raise AnalysisError(f"Error during analysis: {str(e)}") 
\ No newline at end of file
@@ -1,7 +1,11 @@
+import os
 import streamlit as st
 import sqlite3
 from .db import get_db
 
+# Usernames allowed to use the admin tools (e.g. the profiler)
+ADMINS = {name.strip() for name in os.getenv('APPLYAI_ADMINS', '').split(',') if name.strip()}
+
 def check_password(username, password):
     """Check if username/password combo is valid"""
     with get_db() as conn:
@@ -26,4 +30,17 @@ def check_auth():
             else:
                 st.error("Invalid username or password")
         return False
-    return True 
\ No newline at end of file
+    return True 
+
+def current_username():
+    """Username of the logged-in user, looked up once per session"""
+    if 'username' not in st.session_state:
+        with get_db() as conn:
+            row = conn.execute("SELECT username FROM users WHERE id = ?",
+                               (st.session_state.user_id,)).fetchone()
+        st.session_state.username = row[0] if row else None
+    return st.session_state.username
+
+def is_admin():
+    """Whether the logged-in user is listed in APPLYAI_ADMINS"""
+    return 'user_id' in st.session_state and current_username() in ADMINS
@@ -0,0 +1,192 @@
+import json
+import os
+import time
+import uuid
+import anthropic
+from . import db
+from .analyze import ANALYSIS_TOOL, MODELS, _tool_call, build_prompt, get_client, validate_analysis
+from .compression import compress_text, decompress_text
+from .errors import AnalysisSchemaError
+
+# Requests per Message Batch; the API accepts up to 100,000 (256 MB)
+BATCH_SIZE = int(os.getenv('APPLYAI_BATCH_SIZE', '1000'))
+# Model tier bulk analyses run on; batched requests cost half the usual price
+BATCH_TIER = os.getenv('APPLYAI_BATCH_TIER', 'large')
+# Seconds between status checks, doubling from the first to the second
+# while no batch ends
+POLL_MIN_S = float(os.getenv('APPLYAI_BATCH_POLL_MIN_S', '30'))
+POLL_MAX_S = float(os.getenv('APPLYAI_BATCH_POLL_MAX_S', '600'))
+
+# Errors worth polling again for instead of giving up
+_TRANSIENT = (anthropic.APIConnectionError, anthropic.RateLimitError, anthropic.InternalServerError)
+
+stats = {'queued': 0, 'submitted': 0, 'succeeded': 0, 'failed': 0, 'input_tokens': 0, 'output_tokens': 0}
+
+def queue_analyses(user_id, job_posts):
+    """Queue one bulk analysis of the user's resumes per posting; returns their custom ids"""
+    rows = [(uuid.uuid4().hex, user_id, compress_text(job_post)) for job_post in job_posts]
+    with db.get_db() as conn:
+        conn.executemany("INSERT INTO batch_requests (custom_id, user_id, job_post) VALUES (?, ?, ?)", rows)
+    stats['queued'] += len(rows)
+    return [custom_id for custom_id, *_ in rows]
+
+def _request(custom_id, resumes, segments, job_post):
+    return {
+        'custom_id': custom_id,
+        'params': {
+            'model': MODELS[BATCH_TIER],
+            'max_tokens': 4000,
+            'tools': [ANALYSIS_TOOL],
+            'tool_choice': {'type': 'tool', 'name': ANALYSIS_TOOL['name']},
+            'messages': [{'role': 'user', 'content': build_prompt(resumes, job_post, 'structured', segments)}],
+        },
+    }
+
+def submit_queued(client=None, log=print):
+    """Send queued analyses as Message Batches of up to BATCH_SIZE requests; returns the batch ids.
+
+    Prompts are built from each user's resumes as they are now, and the
+    resume versions used are recorded for the analyses saved later.
+    """
+    with db.get_db() as conn:
+        queued = conn.execute("""
+            SELECT custom_id, user_id, job_post FROM batch_requests
+            WHERE batch_id IS NULL AND status = 'queued' ORDER BY created_at, custom_id
+        """).fetchall()
+    if not queued:
+        return []
+    client = client or get_client()
+    users, batch_ids = {}, []
+    for start in range(0, len(queued), BATCH_SIZE):
+        requests, submitted, failed = [], [], []
+        for custom_id, user_id, job_post in queued[start:start + BATCH_SIZE]:
+            if user_id not in users:
+                resumes = db.get_user_resumes(user_id)
+                versions = db.get_current_versions(user_id, resumes)
+                users[user_id] = (resumes, db.get_resume_segments(user_id),
+                                  json.dumps([[name, versions.get(name)] for name, *_ in resumes]))
+            resumes, segments, versions = users[user_id]
+            if not resumes:
+                failed.append(("User has no resumes", custom_id))
+                continue
+            requests.append(_request(custom_id, resumes, segments, decompress_text(job_post)))
+            submitted.append((versions, custom_id))
+        if requests:
+            batch = client.messages.batches.create(requests=requests)
+            batch_ids.append(batch.id)
+            log(f"Submitted batch {batch.id} with {len(requests)} analyses")
+        with db.get_db() as conn:
+            if requests:
+                conn.execute("INSERT INTO message_batches (id, status, requests) VALUES (?, ?, ?)",
+                             (batch.id, batch.processing_status, len(requests)))
+                conn.executemany("""
+                    UPDATE batch_requests SET batch_id = ?, status = 'submitted', resumes = ?
+                    WHERE custom_id = ?
+                """, ((batch.id, versions, custom_id) for versions, custom_id in submitted))
+            conn.executemany("UPDATE batch_requests SET status = 'failed', error = ? WHERE custom_id = ?", failed)
+        stats['submitted'] += len(requests)
+        stats['failed'] += len(failed)
+    return batch_ids
+
+def _analysis(result, names):
+    """The validated analysis of a batch result; raises AnalysisSchemaError"""
+    if result.type != 'succeeded':
+        error = getattr(getattr(result, 'error', None), 'error', None)
+        raise AnalysisSchemaError(f"{result.type}: {error.message}" if error is not None else result.type)
+    message = result.message
+    stats['input_tokens'] += message.usage.input_tokens
+    stats['output_tokens'] += message.usage.output_tokens
+    call = _tool_call(message)
+    if call is None:
+        raise AnalysisSchemaError(f"Response did not call {ANALYSIS_TOOL['name']}")
+    return validate_analysis(call.input, names)
+
+def ingest(batch_id, client=None, log=print):
+    """Save the results of an ended batch to analysis_history; returns (saved, failed).
+
+    Requests are marked as they're saved, so ingesting a batch again after
+    an interruption only saves what's left.
+    """
+    client = client or get_client()
+    with db.get_db() as conn:
+        pending = {custom_id: (user_id, job_post, resumes) for custom_id, user_id, job_post, resumes in conn.execute(
+            "SELECT custom_id, user_id, job_post, resumes FROM batch_requests WHERE batch_id = ? AND status = 'submitted'",
+            (batch_id,))}
+    saved = failed = 0
+    for entry in client.messages.batches.results(batch_id):
+        row = pending.pop(entry.custom_id, None)
+        if row is None:
+            continue
+        user_id, job_post, resumes = row
+        resumes = json.loads(resumes)
+        status, error = 'succeeded', None
+        try:
+            result = _analysis(entry.result, [name for name, _ in resumes])
+            versions = {name: version for name, version in resumes if version is not None}
+            if not db.confirm_saved(db.save_analysis(user_id, decompress_text(job_post), result,
+                                                     resume_versions=versions)):
+                status, error = 'failed', "Couldn't save the analysis"
+        except AnalysisSchemaError as e:
+            status, error = 'failed', str(e)
+        with db.get_db() as conn:
+            conn.execute("UPDATE batch_requests SET status = ?, error = ? WHERE custom_id = ?",
+                         (status, error, entry.custom_id))
+        saved += status == 'succeeded'
+        failed += status == 'failed'
+    with db.get_db() as conn:
+        conn.executemany("UPDATE batch_requests SET status = 'failed', error = 'Missing from batch results' "
+                         "WHERE custom_id = ?", [(custom_id,) for custom_id in pending])
+        conn.execute("UPDATE message_batches SET status = 'ended', ended_at = CURRENT_TIMESTAMP WHERE id = ?",
+                     (batch_id,))
+    failed += len(pending)
+    stats['succeeded'] += saved
+    stats['failed'] += failed
+    log(f"Batch {batch_id}: {saved} analyses saved, {failed} failed")
+    return saved, failed
+
+def poll(client=None, wait=True, log=print, sleep=time.sleep):
+    """Check every open batch and ingest those that have ended; returns how many are still open.
+
+    With ``wait``, keeps polling until none are open, backing off from
+    POLL_MIN_S to POLL_MAX_S while nothing ends and after transient API
+    errors.
+    """
+    client = client or get_client()
+    interval = POLL_MIN_S
+    while True:
+        with db.get_db() as conn:
+            open_ids = [row[0] for row in conn.execute("SELECT id FROM message_batches WHERE status != 'ended'")]
+        ended = 0
+        for batch_id in open_ids:
+            try:
+                batch = client.messages.batches.retrieve(batch_id)
+                if batch.processing_status == 'ended':
+                    ingest(batch_id, client, log)
+                    ended += 1
+            except _TRANSIENT as e:
+                log(f"Batch {batch_id}: {str(e)}; retrying")
+        remaining = len(open_ids) - ended
+        if not remaining or not wait:
+            return remaining
+        if ended:
+            interval = POLL_MIN_S
+        sleep(interval)
+        interval = min(interval * 2, POLL_MAX_S)
+
+def requeue_failed():
+    """Queue failed analyses again for the next submit; returns how many"""
+    with db.get_db() as conn:
+        requeued = conn.execute("""
+            UPDATE batch_requests SET batch_id = NULL, status = 'queued', error = NULL, resumes = NULL
+            WHERE status = 'failed'
+        """).rowcount
+    stats['queued'] += requeued
+    return requeued
+
+def summary():
+    """Bulk analyses by status, and the number of open batches"""
+    with db.get_db() as conn:
+        counts = dict(conn.execute("SELECT status, COUNT(*) FROM batch_requests GROUP BY status"))
+        counts['open_batches'] = conn.execute(
+            "SELECT COUNT(*) FROM message_batches WHERE status != 'ended'").fetchone()[0]
+    return counts
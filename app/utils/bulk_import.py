@@ -0,0 +1,136 @@
+import atexit
+import multiprocessing
+import os
+import posixpath
+import threading
+import time
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from .file_processing import pdf_text, docx_text
+
+DOCX_TYPE = 'application/vnd.openxmlformats-officedocument.wordprocessingml.document'
+FILE_TYPES = {
+    '.pdf': 'application/pdf',
+    '.docx': DOCX_TYPE,
+    '.txt': 'text/plain',
+}
+
+# Guards against zip bombs and runaway uploads
+MAX_MEMBERS = int(os.getenv('APPLYAI_IMPORT_MAX_FILES', '1000'))
+MAX_MEMBER_BYTES = int(os.getenv('APPLYAI_IMPORT_MAX_FILE_MB', '10')) * 2 ** 20
+
+# Extraction is CPU-bound pure Python, so it runs in worker processes
+WORKERS = int(os.getenv('APPLYAI_IMPORT_WORKERS', str(min(4, os.cpu_count() or 1))))
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_pool():
+    """Get the shared extraction process pool, starting it on first use"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # spawn, not fork: the Streamlit server process is multi-threaded
+            _pool = ProcessPoolExecutor(WORKERS, mp_context=multiprocessing.get_context('spawn'))
+            atexit.register(_pool.shutdown, cancel_futures=True)
+        return _pool
+
+def _txt_text(data):
+    return data.decode('utf-8', errors='replace')
+
+_EXTRACTORS = {'.pdf': pdf_text, '.docx': docx_text, '.txt': _txt_text}
+
+def extract_member(name, data):
+    """Extract text from one archive member; returns (name, text, error)"""
+    try:
+        text = _EXTRACTORS[posixpath.splitext(name)[1].lower()](data)
+    except Exception as e:
+        return name, None, f"Could not extract text: {str(e)}"
+    if not text.strip():
+        return name, None, "No text could be extracted"
+    return name, text, None
+
+def _is_resume(info):
+    name = info.filename
+    base = posixpath.basename(name)
+    return not (info.is_dir() or name.startswith('__MACOSX/') or base.startswith('.'))
+
+def _read_member(archive, info):
+    """Read one member, refusing anything over MAX_MEMBER_BYTES (headers can lie)"""
+    if info.file_size > MAX_MEMBER_BYTES:
+        raise ValueError(f"Larger than {MAX_MEMBER_BYTES // 2 ** 20} MB")
+    with archive.open(info) as member:
+        data = member.read(MAX_MEMBER_BYTES + 1)
+    if len(data) > MAX_MEMBER_BYTES:
+        raise ValueError(f"Larger than {MAX_MEMBER_BYTES // 2 ** 20} MB")
+    return data
+
+def iter_extracted(zip_file, pool=None, window=None):
+    """Yield (name, text, error) for each resume in a ZIP archive.
+
+    Members are read one at a time from the archive's central directory and
+    at most ``window`` of them are in flight, so memory stays bounded by a
+    few members rather than the whole archive. Results arrive in completion
+    order. Without a pool, members are extracted inline.
+    """
+    with zipfile.ZipFile(zip_file) as archive:
+        members = [info for info in archive.infolist() if _is_resume(info)]
+        if len(members) > MAX_MEMBERS:
+            yield posixpath.basename(getattr(zip_file, 'name', 'archive')), None, \
+                f"Archive has {len(members)} files; the limit is {MAX_MEMBERS}"
+            return
+
+        window = window or WORKERS * 2
+        pending = set()
+        for info in members:
+            name = posixpath.basename(info.filename)
+            if posixpath.splitext(name)[1].lower() not in FILE_TYPES:
+                yield name, None, "Unsupported file type"
+                continue
+            try:
+                data = _read_member(archive, info)
+            except Exception as e:
+                yield name, None, str(e)
+                continue
+            if pool is None:
+                yield extract_member(name, data)
+                continue
+            pending.add(pool.submit(extract_member, name, data))
+            if len(pending) >= window:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+        for future in pending:
+            yield future.result()
+
+def import_zip(user_id, zip_file, save_rows, pool=None, progress=None):
+    """Extract every resume in a ZIP archive and save them in one batch.
+
+    ``save_rows(user_id, rows)`` receives ``(filename, content, file_type)``
+    tuples and returns True on success. ``progress(done)`` is called after
+    each member. Returns a report dict with the imported rows, per-file
+    errors and throughput.
+    """
+    start = time.perf_counter()
+    rows, errors, seen = [], [], set()
+    for done, (name, text, error) in enumerate(iter_extracted(zip_file, pool), 1):
+        if error is None and name in seen:
+            error = "Duplicate filename in archive"
+        if error is None:
+            seen.add(name)
+            rows.append((name, text, FILE_TYPES[posixpath.splitext(name)[1].lower()]))
+        else:
+            errors.append((name, error))
+        if progress is not None:
+            progress(done)
+
+    if rows and not save_rows(user_id, rows):
+        errors.extend((name, "Could not save to the database") for name, _, _ in rows)
+        rows = []
+    elapsed = time.perf_counter() - start
+    return {
+        'imported': rows,
+        'errors': errors,
+        'seconds': elapsed,
+        'files_per_s': (len(rows) + len(errors)) / elapsed if elapsed else 0.0,
+    }
@@ -0,0 +1,127 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+from .errors import AnalysisCancelled, DeadlineExceeded
+
+# Seconds an analysis may take end to end, retries and escalations included
+ANALYSIS_DEADLINE = float(os.getenv('APPLYAI_ANALYSIS_DEADLINE_S', '120'))
+WORKERS = int(os.getenv('APPLYAI_ANALYSIS_WORKERS', '8'))
+
+_executor = ThreadPoolExecutor(WORKERS, thread_name_prefix='applyai-analysis')
+_inflight = {}
+_lock = threading.Lock()
+
+# Analyses aborted since start-up and the tokens they had already used
+stats = {'cancelled': 0, 'deadline_exceeded': 0, 'wasted_input_tokens': 0, 'wasted_output_tokens': 0}
+
+class CancelToken:
+    """Cancellation flag and deadline shared by every request of one analysis.
+
+    ``cancel()`` runs the callbacks registered with ``on_cancel``, which is
+    how in-flight streams get closed. The deadline cancels the token itself.
+    ``user`` is who the requests are queued for in utils.scheduler.
+    """
+
+    def __init__(self, deadline=ANALYSIS_DEADLINE, user=None):
+        self.deadline = time.monotonic() + deadline
+        self.user = user
+        self.reason = None
+        self._callbacks = []
+        self._lock = threading.Lock()
+        self._timer = threading.Timer(deadline, self.cancel, args=('deadline',))
+        self._timer.daemon = True
+        self._timer.start()
+
+    @property
+    def cancelled(self):
+        return self.reason is not None
+
+    def cancel(self, reason='cancelled'):
+        with self._lock:
+            if self.reason is not None:
+                return
+            self.reason = reason
+            callbacks, self._callbacks = self._callbacks, []
+        self._timer.cancel()
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                print(f"Cancel callback failed: {str(e)}")
+
+    def on_cancel(self, callback):
+        """Call ``callback`` on cancellation (at once if already cancelled); returns a remover"""
+        with self._lock:
+            if self.reason is None:
+                self._callbacks.append(callback)
+                return lambda: self._remove(callback)
+        callback()
+        return lambda: None
+
+    def _remove(self, callback):
+        with self._lock:
+            if callback in self._callbacks:
+                self._callbacks.remove(callback)
+
+    def remaining(self):
+        """Seconds left before the deadline"""
+        return max(self.deadline - time.monotonic(), 0.0)
+
+    def check(self):
+        """Raise AnalysisCancelled (DeadlineExceeded past the deadline) if cancelled"""
+        if self.reason == 'deadline' or (self.reason is None and self.remaining() <= 0):
+            raise DeadlineExceeded("The analysis took too long and was stopped")
+        if self.reason is not None:
+            raise AnalysisCancelled(f"The analysis was {self.reason}")
+
+    def close(self):
+        """Stop the deadline timer once the analysis is over"""
+        self._timer.cancel()
+
+def begin(session_key, deadline=ANALYSIS_DEADLINE, user=None):
+    """New token for a session's analysis, cancelling the one it supersedes"""
+    token = CancelToken(deadline, user)
+    with _lock:
+        previous = _inflight.get(session_key)
+        _inflight[session_key] = token
+    if previous is not None:
+        previous.cancel('superseded')
+    return token
+
+def finish(session_key, token):
+    token.close()
+    with _lock:
+        if _inflight.get(session_key) is token:
+            del _inflight[session_key]
+
+def record_abort(error, usage):
+    """Count an aborted analysis and the tokens in its ``usage`` as wasted"""
+    with _lock:
+        stats['deadline_exceeded' if isinstance(error, DeadlineExceeded) else 'cancelled'] += 1
+        stats['wasted_input_tokens'] += usage.get('input_tokens', 0)
+        stats['wasted_output_tokens'] += usage.get('output_tokens', 0)
+    print(f"Analysis aborted ({str(error)}) after {usage.get('input_tokens', 0)} input / "
+          f"{usage.get('output_tokens', 0)} output tokens")
+
+def session_key():
+    """Id of the Streamlit session running this script, if any"""
+    ctx = get_script_run_ctx()
+    return ctx.session_id if ctx is not None else None
+
+def submit(usage, fn, *args, **kwargs):
+    """Run ``fn`` on the analysis pool with the caller's Streamlit context.
+
+    Aborts are counted with record_abort; the Future raises them as usual.
+    """
+    ctx = get_script_run_ctx()
+
+    def run():
+        add_script_run_ctx(threading.current_thread(), ctx)
+        try:
+            return fn(*args, **kwargs)
+        except AnalysisCancelled as e:
+            record_abort(e, usage)
+            raise
+    return _executor.submit(run)
@@ -0,0 +1,52 @@
+import hashlib
+import zlib
+
+# Texts shorter than this are stored as plain TEXT; compression doesn't pay off
+MIN_COMPRESS_LENGTH = 256
+
+# Shared zlib dictionary (zdict) of phrases that recur in job postings and
+# analyses, so even short documents compress well. Stored values carry a
+# one-byte format tag; never edit a dictionary in place, add a new tag instead.
+_DICTIONARY_V1 = (
+    "===============================\n"
+    "Suggested Resume Improvements:\n• "
+    "Missing Skills/Experience:\n• "
+    "Key Qualifications Match:\n• "
+    "Overall Assessment:\n• "
+    "Match Score: %\n\n"
+    "===== RESUME  - .pdf =====\n"
+    "Finally, comparison and recommendation for which resume is best suited for this position. "
+    "Requirements: Responsibilities: Qualifications: Preferred Qualifications: Nice to have: "
+    "About the role About us What you'll do What we're looking for Benefits "
+    "years of experience with experience in strong understanding of ability to "
+    "communication skills cross-functional teams stakeholders "
+    "Bachelor's degree in Computer Science or related field "
+    "Python SQL AWS Kubernetes Docker React TypeScript Java machine learning data "
+    "software engineer senior engineering team product design develop build scalable "
+    "the candidate's resume demonstrates relevant experience, "
+    "Consider adding quantify achievements highlight "
+).encode('utf-8')
+
+_ZLIB_V1 = b'\x01'
+_FORMATS = {_ZLIB_V1: _DICTIONARY_V1}
+
+def content_hash(text):
+    """Stable content address for a document"""
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+def compress_text(text):
+    """Compress text for storage; short texts are returned unchanged"""
+    if text is None or len(text) < MIN_COMPRESS_LENGTH:
+        return text
+    compressor = zlib.compressobj(level=6, zdict=_DICTIONARY_V1)
+    return _ZLIB_V1 + compressor.compress(text.encode('utf-8')) + compressor.flush()
+
+def decompress_text(value):
+    """Inverse of compress_text; plain TEXT values pass through"""
+    if not isinstance(value, bytes):
+        return value
+    dictionary = _FORMATS.get(value[:1])
+    if dictionary is None:
+        raise ValueError(f"Unknown compressed text format {value[:1]!r}")
+    decompressor = zlib.decompressobj(zdict=dictionary)
+    return (decompressor.decompress(value[1:]) + decompressor.flush()).decode('utf-8')
@@ -1,15 +1,169 @@
+import atexit
+import json
 import sqlite3
+import threading
+import zlib
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from urllib.parse import urlsplit, parse_qs
 import streamlit as st
 import os
+from config import get_database_url
+from .errors import WriteFailed
+from .write_behind import WriteBehindQueue
+from .compression import compress_text, decompress_text, content_hash
+from .delta import apply_delta, line_delta
+from .segments import estimate_tokens, segment_resume
+from .parsing import load_analysis
 
-def get_db():
-    """Get a database connection"""
-    db_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'applyai.db')
-    return sqlite3.connect(db_path)
+DEFAULT_DB_PATH = os.getenv(
+    'APPLYAI_DB_PATH',
+    os.path.join(os.path.dirname(os.path.dirname(__file__)), 'applyai.db')
+)
+
+def parse_database_url(url):
+    """Split a DATABASE_URL into (central db path, shard count).
+
+    ``sqlite:///relative.db`` or ``sqlite:////absolute.db``, optionally with
+    ``?shards=N``. With N > 1, per-user tables live in N files next to the
+    central one (``applyai.shard0.db`` ...), chosen by a hash of the user id.
+    """
+    parts = urlsplit(url)
+    if parts.scheme != 'sqlite':
+        raise ValueError(f"Unsupported DATABASE_URL scheme: {parts.scheme!r}")
+    path = parts.path[1:] if parts.path.startswith('/') else parts.path
+    shards = int(parse_qs(parts.query).get('shards', ['1'])[0])
+    if not path or shards < 1:
+        raise ValueError(f"Invalid DATABASE_URL: {url!r}")
+    return path, shards
+
+_url = get_database_url()
+DB_PATH, SHARDS = parse_database_url(_url) if _url else (DEFAULT_DB_PATH, 1)
+
+# Hand resume/analysis writes to a single group-committing writer thread
+WRITE_BEHIND = os.getenv('APPLYAI_WRITE_BEHIND', '').lower() in ('1', 'true', 'yes')
+
+# One write-behind queue per database file
+_writers = {}
+_writer_lock = threading.Lock()
+
+# Decompressed job postings shared across sessions (see _load_postings)
+POSTING_CACHE_SIZE = 2048
+_posting_cache = OrderedDict()
+_posting_cache_lock = threading.Lock()
+
+# Every resume version is a line delta against the one before it, except
+# every this many, which is stored in full; rebuilding a version applies at
+# most RESUME_SNAPSHOT_INTERVAL - 1 deltas
+RESUME_SNAPSHOT_INTERVAL = int(os.getenv('APPLYAI_RESUME_SNAPSHOT_INTERVAL', '16'))
+
+def shard_for(user_id):
+    """Shard index holding a user's resumes and analyses"""
+    return zlib.crc32(str(user_id).encode()) % SHARDS
+
+def shard_path(index):
+    """Database file of one shard; the central file when not sharded"""
+    if SHARDS == 1:
+        return DB_PATH
+    root, ext = os.path.splitext(DB_PATH)
+    return f"{root}.shard{index}{ext or '.db'}"
+
+def db_path(user_id=None):
+    """Database file for a user's data, or the central (users) database"""
+    return DB_PATH if user_id is None else shard_path(shard_for(user_id))
+
+def get_db(user_id=None):
+    """Get a database connection: the user's shard, or the central database"""
+    return sqlite3.connect(db_path(user_id))
+
+def get_writer(user_id=None):
+    """Get the write-behind queue for a user's database file, starting it on first use"""
+    path = db_path(user_id)
+    with _writer_lock:
+        writer = _writers.get(path)
+        if writer is None:
+            writer = _writers[path] = WriteBehindQueue(lambda: sqlite3.connect(path))
+            atexit.register(writer.close)
+        return writer
+
+def flush_writes():
+    """Block until every queued write on every database file is committed"""
+    for writer in list(_writers.values()):
+        writer.flush()
+
+def close_writers():
+    """Flush and stop all write-behind queues"""
+    with _writer_lock:
+        writers = list(_writers.values())
+        _writers.clear()
+    for writer in writers:
+        writer.close()
+
+def write_stats():
+    """Writes committed, failed and still queued across all write-behind
+    queues, with the latest failure's message"""
+    writers = list(_writers.values())
+    stats = {'writes': 0, 'failed': 0, 'pending': 0, 'last_error': None}
+    for writer in writers:
+        stats['writes'] += writer.stats['writes']
+        stats['failed'] += writer.stats['failed']
+        stats['pending'] += writer.pending()
+        stats['last_error'] = writer.last_error or stats['last_error']
+    return stats
+
+def confirm_saved(result):
+    """Whether a save_* call's data is in the database. Waits for a queued
+    write to commit, reporting one that failed with st.error."""
+    if not isinstance(result, Future):
+        return bool(result)
+    try:
+        result.result()
+        return True
+    except WriteFailed as e:
+        st.error(f"Error saving: {str(e)}")
+        return False
+
+def _write(user_id, *statements):
+    """Run (sql, params) statements in one transaction on the user's shard, or
+    queue them as one write for that shard's writer thread in write-behind
+    mode, returning its future"""
+    if WRITE_BEHIND:
+        return get_writer(user_id).submit_all(user_id, statements)
+    else:
+        with get_db(user_id) as conn:
+            for sql, params in statements:
+                conn.execute(sql, params)
+
+def _wait_for_writes(user_id):
+    """Read-your-writes: wait until this user's queued writes are committed"""
+    writer = _writers.get(db_path(user_id))
+    if writer is not None:
+        writer.wait_for(user_id)
+
+def for_each_shard(fn, parallel=True):
+    """Call ``fn(conn)`` with a connection to every shard; returns the results in shard order"""
+    def run(index):
+        with sqlite3.connect(shard_path(index)) as conn:
+            return fn(conn)
+    if not parallel or SHARDS == 1:
+        return [run(index) for index in range(SHARDS)]
+    with ThreadPoolExecutor(min(SHARDS, 8)) as pool:
+        return list(pool.map(run, range(SHARDS)))
+
+def fan_out(sql, params=()):
+    """Run a read-only query on every shard and concatenate the rows.
+
+    For admin and reporting queries that span users; aggregate per-shard
+    results (e.g. sum the COUNT(*) rows) in the caller.
+    """
+    return [row for rows in for_each_shard(lambda conn: conn.execute(sql, params).fetchall()) for row in rows]
 
 def init_db():
     """Initialize the database with required tables"""
     with get_db() as conn:
+        # Lets utils.maintenance return free pages a few at a time; only takes
+        # effect on a new file (existing ones need one full VACUUM)
+        conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
         conn.execute("""
             CREATE TABLE IF NOT EXISTS users (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -17,19 +171,44 @@ def init_db():
                 password TEXT NOT NULL
             )
         """)
-        
+        # Days of analysis history kept for this user: NULL follows
+        # APPLYAI_RETENTION_DAYS, 0 keeps everything
+        columns = [row[1] for row in conn.execute("PRAGMA table_info(users)")]
+        if 'retention_days' not in columns:
+            conn.execute("ALTER TABLE users ADD COLUMN retention_days INTEGER")
+        # When each scheduled task last started, shared by all app processes
         conn.execute("""
-            CREATE TABLE IF NOT EXISTS resumes (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
+            CREATE TABLE IF NOT EXISTS maintenance_runs (
+                task TEXT PRIMARY KEY,
+                started_at TIMESTAMP NOT NULL
+            )
+        """)
+        # Bulk analyses sent through the Message Batches API (utils.batches):
+        # one row per batch, and one per posting analyzed. batch_id is NULL
+        # until the request is submitted; resumes is then the JSON
+        # [[filename, version], ...] the prompt was built from
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS message_batches (
+                id TEXT PRIMARY KEY,
+                status TEXT NOT NULL,
+                requests INTEGER NOT NULL,
+                submitted_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                ended_at TIMESTAMP
+            )
+        """)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS batch_requests (
+                custom_id TEXT PRIMARY KEY,
+                batch_id TEXT REFERENCES message_batches(id),
                 user_id INTEGER NOT NULL,
-                filename TEXT NOT NULL,
-                content TEXT NOT NULL,
-                file_type TEXT NOT NULL,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (user_id) REFERENCES users(id)
+                job_post BLOB NOT NULL,
+                resumes TEXT,
+                status TEXT NOT NULL DEFAULT 'queued',
+                error TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
             )
         """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_batch_requests_batch ON batch_requests(batch_id, status)")
         
         # Add test user if it doesn't exist
         try:
@@ -41,19 +220,713 @@ def init_db():
         except sqlite3.IntegrityError:
             # Test user already exists
             pass
+    
+    for index in range(SHARDS):
+        with sqlite3.connect(shard_path(index)) as conn:
+            conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+            _init_user_tables(conn)
+
+def _init_user_tables(conn):
+    """Per-user tables; these live in every shard (user_id references the central users table)"""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS resumes (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            filename TEXT NOT NULL,
+            content TEXT NOT NULL,
+            file_type TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users(id)
+        )
+    """)
+    
+    # Job postings are stored once, compressed, and referenced by content hash
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS job_postings (
+            hash TEXT PRIMARY KEY,
+            content BLOB NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    
+    # job_post holds the raw text only for rows written before job_postings
+    # existed; analysis may be TEXT or a compressed BLOB (see utils.compression)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS analysis_history (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            job_post TEXT,
+            analysis TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            job_hash TEXT REFERENCES job_postings(hash),
+            FOREIGN KEY (user_id) REFERENCES users(id)
+        )
+    """)
+    columns = [row[1] for row in conn.execute("PRAGMA table_info(analysis_history)")]
+    if 'job_hash' not in columns:
+        conn.execute("ALTER TABLE analysis_history ADD COLUMN job_hash TEXT REFERENCES job_postings(hash)")
+    # JSON {filename: version} of the resume versions an analysis was run on
+    if 'resume_versions' not in columns:
+        conn.execute("ALTER TABLE analysis_history ADD COLUMN resume_versions TEXT")
+    # Hash of an analysis's posting, resume versions and result; saving the
+    # same analysis again finds it taken. NULL for rows saved before it
+    # existed (see dedupe_analysis_history)
+    if 'analysis_key' not in columns:
+        conn.execute("ALTER TABLE analysis_history ADD COLUMN analysis_key TEXT")
+    conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_analysis_key ON analysis_history(user_id, analysis_key)")
+    
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_resumes_user_id ON resumes(user_id)")
+    
+    # One row per (user, filename) so saving an edited resume updates it in
+    # place; drop duplicates left behind before this index existed
+    conn.execute("""
+        DELETE FROM resumes WHERE id NOT IN (
+            SELECT MAX(id) FROM resumes GROUP BY user_id, filename
+        )
+    """)
+    conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_resumes_user_filename ON resumes(user_id, filename)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_analysis_user_id ON analysis_history(user_id)")
+    # Lets maintenance find job postings no analysis refers to any more
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_analysis_job_hash ON analysis_history(job_hash)")
+    
+    # Match-score rollups per user, resume and week (Monday), kept up to date
+    # by save_analysis so dashboards never scan analysis_history
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS analysis_aggregates (
+            user_id INTEGER NOT NULL,
+            resume_name TEXT NOT NULL,
+            week TEXT NOT NULL,
+            analyses INTEGER NOT NULL,
+            score_sum INTEGER NOT NULL,
+            score_max INTEGER NOT NULL,
+            PRIMARY KEY (user_id, resume_name, week)
+        ) WITHOUT ROWID
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS analysis_missing_skills (
+            user_id INTEGER NOT NULL,
+            resume_name TEXT NOT NULL,
+            week TEXT NOT NULL,
+            skill TEXT NOT NULL,
+            mentions INTEGER NOT NULL,
+            PRIMARY KEY (user_id, resume_name, week, skill)
+        ) WITHOUT ROWID
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_missing_skills_week ON analysis_missing_skills(user_id, week)")
+    
+    # Every saved text of every resume. content is the full text (compressed)
+    # when base is NULL, otherwise a line delta (utils.delta) against version
+    # base; depth counts the deltas back to the nearest full snapshot
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS resume_versions (
+            user_id INTEGER NOT NULL,
+            filename TEXT NOT NULL,
+            version INTEGER NOT NULL,
+            base INTEGER,
+            depth INTEGER NOT NULL,
+            content_hash TEXT NOT NULL,
+            content BLOB NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (user_id, filename, version)
+        )
+    """)
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_resume_versions_hash
+        ON resume_versions(user_id, filename, content_hash)
+    """)
+    # Resumes saved before versioning start their history with what's stored
+    legacy = conn.execute("""
+        SELECT user_id, filename, content FROM resumes r
+        WHERE NOT EXISTS (
+            SELECT 1 FROM resume_versions v WHERE v.user_id = r.user_id AND v.filename = r.filename
+        )
+    """).fetchall()
+    conn.executemany("""
+        INSERT INTO resume_versions (user_id, filename, version, base, depth, content_hash, content)
+        VALUES (?, ?, 1, NULL, 0, ?, ?)
+    """, ((user_id, filename, content_hash(content), compress_text(content)) for user_id, filename, content in legacy))
+    
+    # Normalized sections of each resume's current text with their token
+    # counts, written at ingest so prompts can quote only what's relevant
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS resume_segments (
+            user_id INTEGER NOT NULL,
+            filename TEXT NOT NULL,
+            position INTEGER NOT NULL,
+            section TEXT NOT NULL,
+            heading TEXT NOT NULL,
+            content TEXT NOT NULL,
+            tokens INTEGER NOT NULL,
+            PRIMARY KEY (user_id, filename, position)
+        ) WITHOUT ROWID
+    """)
+    unsegmented = conn.execute("""
+        SELECT user_id, filename, content FROM resumes r
+        WHERE NOT EXISTS (
+            SELECT 1 FROM resume_segments s WHERE s.user_id = r.user_id AND s.filename = r.filename
+        )
+    """).fetchall()
+    for user_id, filename, content in unsegmented:
+        for sql, params in _segment_statements(user_id, filename, content):
+            conn.execute(sql, params)
+
+def _segment_statements(user_id, filename, content):
+    """Statements replacing a resume's stored segments with those of ``content``"""
+    yield "DELETE FROM resume_segments WHERE user_id = ? AND filename = ?", (user_id, filename)
+    for position, (section, heading, text) in enumerate(segment_resume(content)):
+        yield """
+            INSERT INTO resume_segments (user_id, filename, position, section, heading, content, tokens)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        """, (user_id, filename, position, section, heading, text, estimate_tokens(text))
+
+def _ingest_statements(conn, user_id, rows):
+    """Statements recording a new version and the segments of each changed
+    (filename, content) resume.
+
+    Reads the currently stored text through ``conn``, so call it before the
+    resumes row is updated. The new version is a line delta against the
+    stored one, or a full snapshot every RESUME_SNAPSHOT_INTERVAL versions
+    and whenever the delta wouldn't be smaller. The version number is
+    assigned when the statement runs, so concurrent saves don't collide.
+    """
+    statements = []
+    for filename, content in rows:
+        stored = conn.execute("SELECT content FROM resumes WHERE user_id = ? AND filename = ?",
+                              (user_id, filename)).fetchone()
+        if stored is not None and stored[0] == content:
+            continue
+        base = None
+        if stored is not None:
+            base = conn.execute("""
+                SELECT version, depth FROM resume_versions
+                WHERE user_id = ? AND filename = ? AND content_hash = ?
+                ORDER BY version DESC LIMIT 1
+            """, (user_id, filename, content_hash(stored[0]))).fetchone()
+        stored_content, base_version, depth = compress_text(content), None, 0
+        if base is not None and base[1] + 1 < RESUME_SNAPSHOT_INTERVAL:
+            delta = compress_text(line_delta(stored[0], content))
+            if len(delta) < len(stored_content):
+                stored_content, base_version, depth = delta, base[0], base[1] + 1
+        statements.append(("""
+            INSERT INTO resume_versions (user_id, filename, version, base, depth, content_hash, content)
+            VALUES (?, ?, (
+                SELECT COALESCE(MAX(version), 0) + 1 FROM resume_versions WHERE user_id = ? AND filename = ?
+            ), ?, ?, ?, ?)
+        """, (user_id, filename, user_id, filename, base_version, depth, content_hash(content), stored_content)))
+        statements.extend(_segment_statements(user_id, filename, content))
+    return statements
 
 def save_resume(user_id, filename, content, file_type):
-    """Save or update a resume in the database"""
+    """Save or update a resume in the database, recording its new version and segments.
+
+    Returns True, or in write-behind mode the queued write's future (see
+    confirm_saved); False on error.
+    """
     try:
-        with get_db() as conn:
-            conn.execute("""
-                INSERT OR REPLACE INTO resumes (user_id, filename, content, file_type)
-                VALUES (?, ?, ?, ?)
-            """, (user_id, filename, content, file_type))
-            return True
+        _wait_for_writes(user_id)
+        with get_db(user_id) as conn:
+            ingest = _ingest_statements(conn, user_id, [(filename, content)])
+        return _write(user_id, ("""
+            INSERT INTO resumes (user_id, filename, content, file_type)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT (user_id, filename) DO UPDATE SET
+                content = excluded.content,
+                file_type = excluded.file_type,
+                updated_at = CURRENT_TIMESTAMP
+        """, (user_id, filename, content, file_type)), *ingest) or True
     except Exception as e:
         st.error(f"Error saving resume: {str(e)}")
         return False
 
+def save_resumes(user_id, rows):
+    """Save or update many (filename, content, file_type) resumes in one
+    transaction; returns like save_resume"""
+    sql = """
+        INSERT INTO resumes (user_id, filename, content, file_type)
+        VALUES (?, ?, ?, ?)
+        ON CONFLICT (user_id, filename) DO UPDATE SET
+            content = excluded.content,
+            file_type = excluded.file_type,
+            updated_at = CURRENT_TIMESTAMP
+    """
+    params = [(user_id, filename, content, file_type) for filename, content, file_type in rows]
+    texts = [(filename, content) for filename, content, _ in rows]
+    try:
+        if WRITE_BEHIND:
+            _wait_for_writes(user_id)
+            with get_db(user_id) as conn:
+                ingest = _ingest_statements(conn, user_id, texts)
+            return _write(user_id, *((sql, p) for p in params), *ingest)
+        else:
+            with get_db(user_id) as conn:
+                ingest = _ingest_statements(conn, user_id, texts)
+                conn.executemany(sql, params)
+                for statement, p in ingest:
+                    conn.execute(statement, p)
+        return True
+    except Exception as e:
+        st.error(f"Error saving resumes: {str(e)}")
+        return False
+
+def update_resume_content(user_id, filename, content):
+    """Update the extracted text content of a resume; returns like save_resume"""
+    try:
+        _wait_for_writes(user_id)
+        with get_db(user_id) as conn:
+            exists = conn.execute("SELECT 1 FROM resumes WHERE user_id = ? AND filename = ?",
+                                  (user_id, filename)).fetchone()
+            ingest = _ingest_statements(conn, user_id, [(filename, content)]) if exists else []
+        return _write(user_id, ("""
+            UPDATE resumes
+            SET content = ?, updated_at = CURRENT_TIMESTAMP
+            WHERE user_id = ? AND filename = ?
+        """, (content, user_id, filename)), *ingest) or True
+    except Exception as e:
+        st.error(f"Error updating resume content: {str(e)}")
+        return False
+
+def get_user_resumes(user_id):
+    """Get all resumes for a user"""
+    _wait_for_writes(user_id)
+    with get_db(user_id) as conn:
+        return conn.execute("""
+            SELECT filename, content, file_type, created_at, updated_at
+            FROM resumes
+            WHERE user_id = ?
+            ORDER BY created_at DESC
+        """, (user_id,)).fetchall()
+
+def get_resume_content(user_id, filename):
+    """Text of one resume, or None if the user has no resume by that name"""
+    _wait_for_writes(user_id)
+    with get_db(user_id) as conn:
+        row = conn.execute("SELECT content FROM resumes WHERE user_id = ? AND filename = ?",
+                           (user_id, filename)).fetchone()
+    return row[0] if row else None
+
+def get_resume_segments(user_id, filenames=None):
+    """{filename: [(section, heading, content, tokens), ...]} for a user's resumes, in resume order"""
+    _wait_for_writes(user_id)
+    sql = "SELECT filename, section, heading, content, tokens FROM resume_segments WHERE user_id = ?"
+    params = [user_id]
+    if filenames is not None:
+        sql += f" AND filename IN ({','.join('?' * len(filenames))})"
+        params += list(filenames)
+    segments = {}
+    with get_db(user_id) as conn:
+        for filename, *segment in conn.execute(sql + " ORDER BY filename, position", params):
+            segments.setdefault(filename, []).append(tuple(segment))
+    return segments
+
+def get_resume_versions(user_id, filename):
+    """(version, created_at, stored_bytes, is_snapshot) for each saved text of a resume, newest first"""
+    _wait_for_writes(user_id)
+    with get_db(user_id) as conn:
+        return [
+            (version, created_at, size, base is None)
+            for version, created_at, size, base in conn.execute("""
+                SELECT version, created_at, LENGTH(CAST(content AS BLOB)), base FROM resume_versions
+                WHERE user_id = ? AND filename = ?
+                ORDER BY version DESC
+            """, (user_id, filename))
+        ]
+
+def get_resume_version(user_id, filename, version):
+    """Text of one version of a resume, or None if there's no such version.
+
+    Follows the delta chain back to its snapshot in one query and replays
+    it forwards.
+    """
+    _wait_for_writes(user_id)
+    with get_db(user_id) as conn:
+        chain = conn.execute("""
+            WITH RECURSIVE chain(base, content) AS (
+                SELECT base, content FROM resume_versions
+                WHERE user_id = ? AND filename = ? AND version = ?
+                UNION ALL
+                SELECT v.base, v.content FROM resume_versions v JOIN chain c ON v.version = c.base
+                WHERE v.user_id = ? AND v.filename = ?
+            )
+            SELECT base, content FROM chain
+        """, (user_id, filename, version, user_id, filename)).fetchall()
+    if not chain or chain[-1][0] is not None:
+        return None
+    text = decompress_text(chain[-1][1])
+    for _, delta in reversed(chain[:-1]):
+        text = apply_delta(text, decompress_text(delta))
+    return text
+
+def get_current_versions(user_id, resumes):
+    """{filename: version} of the stored versions matching (filename, content, ...) resumes"""
+    _wait_for_writes(user_id)
+    with get_db(user_id) as conn:
+        return _current_versions(conn, user_id, resumes)
+
+def _current_versions(conn, user_id, resumes):
+    """{filename: version} of the stored versions matching (filename, content, ...) resumes"""
+    versions = {}
+    for filename, content, *_ in resumes:
+        row = conn.execute("""
+            SELECT MAX(version) FROM resume_versions
+            WHERE user_id = ? AND filename = ? AND content_hash = ?
+        """, (user_id, filename, content_hash(content))).fetchone()
+        if row[0] is not None:
+            versions[filename] = row[0]
+    return versions
+
+# Monday of the week a timestamp falls in, as YYYY-MM-DD
+_WEEK_OF = "date({}, 'weekday 0', '-6 days')"
+
+# Longest missing-skill text kept in analysis_missing_skills
+MAX_SKILL_LENGTH = 80
+# Missing skills are ranked over recent weeks only, so the ranking stays
+# cheap however long a user's history grows
+SKILL_WEEKS = 12
+
+def _normalize_skill(point):
+    return ' '.join(point.lower().split())[:MAX_SKILL_LENGTH]
+
+def _aggregate_statements(user_id, result, created_at=None, if_changed=False, suffix=''):
+    """Upserts adding one analysis result to the match-score aggregates.
+
+    The week is taken from ``created_at``, or from the current time when None.
+    With ``if_changed`` each upsert only runs if the statement before it
+    changed a row: placed right after an insert that may be ignored, they
+    all run or none do, since each one that runs changes exactly one row.
+    ``suffix`` is appended to the table names, for rebuild_aggregates.
+    """
+    week = _WEEK_OF.format("'now'" if created_at is None else '?')
+    at = () if created_at is None else (created_at,)
+    # A SELECT with a WHERE clause, so the upsert's ON CONFLICT parses
+    guard = "WHERE changes() > 0" if if_changed else "WHERE true"
+    for item in result['analyses']:
+        yield f"""
+            INSERT INTO analysis_aggregates{suffix} (user_id, resume_name, week, analyses, score_sum, score_max)
+            SELECT ?, ?, {week}, 1, ?, ? {guard}
+            ON CONFLICT (user_id, resume_name, week) DO UPDATE SET
+                analyses = analyses + 1,
+                score_sum = score_sum + excluded.score_sum,
+                score_max = max(score_max, excluded.score_max)
+        """, (user_id, item['resume_name'], *at, item['match_score'], item['match_score'])
+        for skill in {_normalize_skill(point) for point in item['missing']}:
+            yield f"""
+                INSERT INTO analysis_missing_skills{suffix} (user_id, resume_name, week, skill, mentions)
+                SELECT ?, ?, {week}, ?, 1 {guard}
+                ON CONFLICT (user_id, resume_name, week, skill) DO UPDATE SET mentions = mentions + 1
+            """, (user_id, item['resume_name'], *at, skill)
+
+def analysis_key(job_hash, analysis, versions):
+    """Identity of a saved analysis: its posting, stored result text and resume versions JSON"""
+    return content_hash(f"{job_hash}\n{versions or ''}\n{analysis}")
+
+def save_analysis(user_id, job_post, analysis, resumes=(), resume_versions=None):
+    """Save a job analysis to the database; structured results are stored as JSON.
+
+    ``resumes`` are the (filename, content, ...) tuples analyzed; the
+    analysis is linked to the stored version of each. Pass
+    ``resume_versions`` instead when the {filename: version} map was
+    resolved earlier, as for batched analyses. Saving the same analysis of
+    the same posting and resume versions again changes nothing. Returns
+    like save_resume.
+    """
+    try:
+        result = load_analysis(analysis)
+        if not isinstance(analysis, str):
+            analysis = json.dumps(analysis, ensure_ascii=False, separators=(',', ':'))
+        versions = None
+        if resume_versions is not None:
+            versions = json.dumps(resume_versions, separators=(',', ':'))
+        elif resumes:
+            _wait_for_writes(user_id)
+            with get_db(user_id) as conn:
+                versions = json.dumps(_current_versions(conn, user_id, resumes), separators=(',', ':'))
+        job_hash = content_hash(job_post)
+        return _write(
+            user_id,
+            ("INSERT OR IGNORE INTO job_postings (hash, content) VALUES (?, ?)",
+             (job_hash, compress_text(job_post))),
+            ("""
+                INSERT INTO analysis_history (user_id, job_hash, analysis, resume_versions, analysis_key)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT (user_id, analysis_key) DO NOTHING
+            """, (user_id, job_hash, compress_text(analysis), versions, analysis_key(job_hash, analysis, versions))),
+            # Counted only when the row above was inserted
+            *_aggregate_statements(user_id, result, if_changed=True)
+        ) or True
+    except Exception as e:
+        st.error(f"Error saving analysis: {str(e)}")
+        return False
+
+def get_user_aggregates(user_id, top_skills=5, skill_weeks=SKILL_WEEKS):
+    """Weekly match-score aggregates for a user.
+
+    Returns (rows, skills): rows are (resume_name, week, analyses, score_sum,
+    score_max); skills are the ``top_skills`` most mentioned missing skills
+    per resume over the last ``skill_weeks`` weeks as (resume_name, skill,
+    mentions).
+    """
+    _wait_for_writes(user_id)
+    with get_db(user_id) as conn:
+        rows = conn.execute("""
+            SELECT resume_name, week, analyses, score_sum, score_max
+            FROM analysis_aggregates
+            WHERE user_id = ?
+            ORDER BY week
+        """, (user_id,)).fetchall()
+        skills = conn.execute("""
+            SELECT resume_name, skill, mentions FROM (
+                SELECT resume_name, skill, SUM(mentions) AS mentions,
+                       ROW_NUMBER() OVER (PARTITION BY resume_name ORDER BY SUM(mentions) DESC, skill) AS rank
+                FROM analysis_missing_skills
+                WHERE user_id = ? AND week >= date('now', 'weekday 0', ?)
+                GROUP BY resume_name, skill
+            )
+            WHERE rank <= ?
+            ORDER BY resume_name, mentions DESC
+        """, (user_id, f"-{skill_weeks * 7 - 1} days", top_skills)).fetchall()
+    return rows, skills
+
+_AGGREGATE_TABLES = ('analysis_aggregates', 'analysis_missing_skills')
+
+def _aggregate_batches(conn, last_id, batch_size, suffix):
+    """Add the analyses after id ``last_id`` to the aggregate tables, ``batch_size``
+    at a time; yields (analyses added, last id) after each batch"""
+    while True:
+        rows = conn.execute("""
+            SELECT id, user_id, analysis, created_at FROM analysis_history
+            WHERE id > ? ORDER BY id LIMIT ?
+        """, (last_id, batch_size)).fetchall()
+        if not rows:
+            return
+        for row_id, user_id, analysis, created_at in rows:
+            result = load_analysis(decompress_text(analysis) or '')
+            for sql, params in _aggregate_statements(user_id, result, created_at, suffix=suffix):
+                conn.execute(sql, params)
+        last_id = rows[-1][0]
+        yield len(rows), last_id
+
+def rebuild_aggregates(batch_size=5000, log=print):
+    """Recompute the match-score aggregates from analysis_history on every shard.
+
+    Each shard's aggregates are built in new tables, committing every
+    ``batch_size`` analyses so saves aren't held up, and then swapped in
+    by one short transaction that first adds the analyses saved meanwhile.
+    """
+    rebuilt = 0
+    for index in range(SHARDS):
+        with sqlite3.connect(shard_path(index)) as conn:
+            # Left behind if an earlier rebuild was interrupted
+            for table in _AGGREGATE_TABLES:
+                conn.execute(f"DROP TABLE IF EXISTS {table}_rebuild")
+                sql, = conn.execute("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = ?",
+                                    (table,)).fetchone()
+                conn.execute(sql.replace(table, f"{table}_rebuild", 1))
+            last_id = 0
+            for count, last_id in _aggregate_batches(conn, last_id, batch_size, '_rebuild'):
+                conn.commit()
+                rebuilt += count
+                log(f"aggregated {rebuilt} analyses")
+            conn.execute("BEGIN IMMEDIATE")
+            rebuilt += sum(count for count, _ in _aggregate_batches(conn, last_id, batch_size, '_rebuild'))
+            for table in _AGGREGATE_TABLES:
+                conn.execute(f"DROP TABLE {table}")
+                conn.execute(f"ALTER TABLE {table}_rebuild RENAME TO {table}")
+            conn.execute("CREATE INDEX idx_missing_skills_week ON analysis_missing_skills(user_id, week)")
+    return rebuilt
+
+def get_user_analysis_history(user_id):
+    """Get analysis history for a user.
+
+    Rows are (job_post, analysis, created_at, resume_versions), where
+    resume_versions maps each analyzed filename to the version passed to
+    get_resume_version ({} for analyses saved before versioning).
+    """
+    _wait_for_writes(user_id)
+    with get_db(user_id) as conn:
+        rows = conn.execute("""
+            SELECT job_hash, job_post, analysis, created_at, resume_versions
+            FROM analysis_history
+            WHERE user_id = ?
+            ORDER BY created_at DESC
+        """, (user_id,)).fetchall()
+        postings = _load_postings(conn, {row[0] for row in rows if row[0] is not None})
+    return [
+        (_posting_text(postings, job_hash, job_post), decompress_text(analysis), created_at,
+         json.loads(versions) if versions else {})
+        for job_hash, job_post, analysis, created_at, versions in rows
+    ]
+
+def get_latest_analysis(user_id, job_post):
+    """(id, analysis, resume_versions) of the newest saved analysis of a job
+    posting, or None if there is none"""
+    _wait_for_writes(user_id)
+    with get_db(user_id) as conn:
+        row = conn.execute("""
+            SELECT id, analysis, resume_versions FROM analysis_history
+            WHERE user_id = ? AND job_hash = ?
+            ORDER BY id DESC LIMIT 1
+        """, (user_id, content_hash(job_post))).fetchone()
+    if row is None:
+        return None
+    analysis_id, analysis, versions = row
+    return analysis_id, decompress_text(analysis), json.loads(versions) if versions else {}
+
+def get_resume_history(user_id, resume_name, limit=10):
+    """The ``limit`` latest analyses of one resume, newest first.
+
+    Rows are (created_at, job_post, analysis), where analysis is that
+    resume's entry of the structured result.
+    """
+    history = []
+    for job_post, analysis, created_at, _ in get_user_analysis_history(user_id):
+        item = next((item for item in load_analysis(analysis or '')['analyses']
+                     if item['resume_name'] == resume_name), None)
+        if item is not None:
+            history.append((created_at, job_post, item))
+            if len(history) == limit:
+                break
+    return history
+
+def iter_analysis_history(user_id=None, chunk_size=1000):
+    """Analysis history in chunks of rows, oldest first, for exports.
+
+    Rows are (user_id, username, created_at, job_post, analysis,
+    resume_versions) with the texts decompressed and resume_versions as
+    stored (JSON or None). Without a ``user_id`` every user on every shard
+    is read. Chunks are fetched by id ranges like the migrations, so only
+    one chunk is in memory and no read transaction is held between chunks.
+    """
+    if user_id is not None:
+        _wait_for_writes(user_id)
+    shards = [shard_for(user_id)] if user_id is not None else range(SHARDS)
+    where = "AND user_id = ?" if user_id is not None else ""
+    for index in shards:
+        last_id = 0
+        while True:
+            with sqlite3.connect(shard_path(index)) as conn:
+                rows = conn.execute(f"""
+                    SELECT id, user_id, created_at, job_hash, job_post, analysis, resume_versions
+                    FROM analysis_history
+                    WHERE id > ? {where}
+                    ORDER BY id LIMIT ?
+                """, (last_id, *([user_id] if user_id is not None else []), chunk_size)).fetchall()
+                if not rows:
+                    break
+                postings = _load_postings(conn, {row[3] for row in rows if row[3] is not None})
+            user_ids = {row[1] for row in rows}
+            with get_db() as conn:
+                names = dict(conn.execute(
+                    f"SELECT id, username FROM users WHERE id IN ({','.join('?' * len(user_ids))})",
+                    list(user_ids)))
+            yield [
+                (uid, names.get(uid), created_at, _posting_text(postings, job_hash, job_post),
+                 decompress_text(analysis), versions)
+                for _, uid, created_at, job_hash, job_post, analysis, versions in rows
+            ]
+            last_id = rows[-1][0]
+
+def _posting_text(postings, job_hash, job_post):
+    """A history row's posting: by hash from ``postings``, else the legacy
+    inline text; '' if the posting has gone missing"""
+    if job_hash is None:
+        return job_post
+    return postings.get(job_hash, job_post or '')
+
+def _load_postings(conn, hashes):
+    """Decompressed job postings by hash, served from a shared LRU when possible.
+
+    Postings are immutable once stored, so cached text never goes stale.
+    """
+    found = {}
+    with _posting_cache_lock:
+        for job_hash in hashes:
+            if job_hash in _posting_cache:
+                _posting_cache.move_to_end(job_hash)
+                found[job_hash] = _posting_cache[job_hash]
+    missing = [job_hash for job_hash in hashes if job_hash not in found]
+    if missing:
+        placeholders = ','.join('?' * len(missing))
+        rows = conn.execute(f"SELECT hash, content FROM job_postings WHERE hash IN ({placeholders})", missing)
+        loaded = {job_hash: decompress_text(content) for job_hash, content in rows}
+        with _posting_cache_lock:
+            for job_hash, text in loaded.items():
+                _posting_cache[job_hash] = text
+            while len(_posting_cache) > POSTING_CACHE_SIZE:
+                _posting_cache.popitem(last=False)
+        found.update(loaded)
+    return found
+
+def migrate_analysis_storage(batch_size=5000, log=print):
+    """Move legacy analysis rows to deduplicated, compressed storage.
+
+    Works shard by shard in id-ordered batches, each in its own transaction,
+    so it can run against a live database and be resumed after interruption.
+    Run VACUUM afterwards to return the freed pages to the filesystem.
+    """
+    migrated = 0
+    for index in range(SHARDS):
+        last_id = 0
+        while True:
+            with sqlite3.connect(shard_path(index)) as conn:
+                rows = conn.execute("""
+                    SELECT id, job_post, analysis FROM analysis_history
+                    WHERE id > ? AND job_hash IS NULL
+                    ORDER BY id LIMIT ?
+                """, (last_id, batch_size)).fetchall()
+                if not rows:
+                    break
+                postings = {}
+                updates = []
+                for row_id, job_post, analysis in rows:
+                    job_post = job_post or ''
+                    job_hash = content_hash(job_post)
+                    postings.setdefault(job_hash, job_post)
+                    updates.append((job_hash, compress_text(decompress_text(analysis)), row_id))
+                conn.executemany(
+                    "INSERT OR IGNORE INTO job_postings (hash, content) VALUES (?, ?)",
+                    ((job_hash, compress_text(text)) for job_hash, text in postings.items())
+                )
+                conn.executemany(
+                    "UPDATE analysis_history SET job_hash = ?, job_post = NULL, analysis = ? WHERE id = ?",
+                    updates
+                )
+            migrated += len(rows)
+            last_id = rows[-1][0]
+            log(f"migrated {migrated} analyses")
+    return migrated
+
+def dedupe_analysis_history(batch_size=5000, log=print):
+    """Key analyses saved before analysis_key existed, deleting repeats of an earlier one.
+
+    Works like migrate_analysis_storage, so it can run against a live
+    database. Returns the number of rows deleted; rebuild the aggregates
+    afterwards if any were, since repeats were counted there too.
+    """
+    keyed = deleted = 0
+    for index in range(SHARDS):
+        last_id = 0
+        while True:
+            with sqlite3.connect(shard_path(index)) as conn:
+                rows = conn.execute("""
+                    SELECT id, user_id, job_hash, job_post, analysis, resume_versions FROM analysis_history
+                    WHERE id > ? AND analysis_key IS NULL
+                    ORDER BY id LIMIT ?
+                """, (last_id, batch_size)).fetchall()
+                if not rows:
+                    break
+                for row_id, user_id, job_hash, job_post, analysis, versions in rows:
+                    key = analysis_key(job_hash or content_hash(job_post or ''), decompress_text(analysis) or '',
+                                       versions)
+                    # The earliest copy keeps the key; later ones conflict and go
+                    if not conn.execute("UPDATE OR IGNORE analysis_history SET analysis_key = ? WHERE id = ?",
+                                        (key, row_id)).rowcount:
+                        conn.execute("DELETE FROM analysis_history WHERE id = ?", (row_id,))
+                        deleted += 1
+            keyed += len(rows)
+            last_id = rows[-1][0]
+            log(f"checked {keyed} analyses, {deleted} duplicates deleted")
+    return deleted
+
 # Initialize database when module is loaded
 init_db() 
\ No newline at end of file
@@ -0,0 +1,27 @@
+import json
+from difflib import SequenceMatcher
+
+def line_delta(old, new):
+    """Line-level edit script turning ``old`` into ``new``, as compact JSON.
+
+    Each op is ``[start, end, lines]``: replace old lines start:end with
+    ``lines``. Unchanged runs aren't stored, so a one-line edit costs about
+    one line.
+    """
+    old_lines = old.splitlines(keepends=True)
+    new_lines = new.splitlines(keepends=True)
+    matcher = SequenceMatcher(None, old_lines, new_lines, autojunk=False)
+    ops = [[i1, i2, new_lines[j1:j2]] for tag, i1, i2, j1, j2 in matcher.get_opcodes() if tag != 'equal']
+    return json.dumps(ops, ensure_ascii=False, separators=(',', ':'))
+
+def apply_delta(old, delta):
+    """Inverse of line_delta: rebuild the new text from ``old`` and the edit script"""
+    old_lines = old.splitlines(keepends=True)
+    parts = []
+    pos = 0
+    for start, end, lines in json.loads(delta):
+        parts.extend(old_lines[pos:start])
+        parts.extend(lines)
+        pos = end
+    parts.extend(old_lines[pos:])
+    return ''.join(parts)
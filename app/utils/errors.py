@@ -4,4 +4,40 @@ class APIError(Exception):
 
 class AnalysisError(APIError):
     """Raised when analysis fails"""
-    pass 
\ No newline at end of file
+    pass 
+
+class StorageError(Exception):
+    """Base class for storage errors"""
+    pass
+
+class WriteQueueFull(StorageError):
+    """Raised when the write-behind queue stays full past its timeout"""
+    pass
+
+class WriteFailed(StorageError):
+    """Raised by a queued write's future when the writer couldn't commit it"""
+    pass
+
+class ExportError(StorageError):
+    """Raised when analysis history can't be exported in the requested format"""
+    pass
+
+class ExtractionError(Exception):
+    """Raised when text can't be extracted from a document"""
+    pass
+
+class DocumentTooLarge(ExtractionError):
+    """Raised when a document exceeds the upload size or page limits"""
+    pass
+
+class AnalysisSchemaError(AnalysisError):
+    """Raised when a structured analysis doesn't match the expected schema"""
+    pass
+
+class AnalysisCancelled(AnalysisError):
+    """Raised when an analysis is cancelled, e.g. superseded by a newer one"""
+    pass
+
+class DeadlineExceeded(AnalysisCancelled):
+    """Raised when an analysis runs past its deadline"""
+    pass
@@ -0,0 +1,117 @@
+import csv
+import glob
+import io
+import json
+import os
+import tempfile
+import time
+from . import db
+from .errors import ExportError
+
+# Rows read from the database and written out at a time
+CHUNK_ROWS = int(os.getenv('APPLYAI_EXPORT_CHUNK_ROWS', '1000'))
+# Hours a prepared export file is kept if its session never downloads it
+EXPORT_TTL_HOURS = float(os.getenv('APPLYAI_EXPORT_TTL_H', '1'))
+
+_PREFIX = 'applyai-export-'
+
+COLUMNS = ('user_id', 'username', 'created_at', 'job_post', 'analysis', 'resume_versions')
+FORMATS = {
+    'csv': 'text/csv',
+    'jsonl': 'application/x-ndjson',
+    'parquet': 'application/vnd.apache.parquet',
+}
+
+def _write_csv(chunks, out):
+    text = io.TextIOWrapper(out, encoding='utf-8', newline='', write_through=True)
+    try:
+        writer = csv.writer(text)
+        writer.writerow(COLUMNS)
+        rows = 0
+        for chunk in chunks:
+            writer.writerows(chunk)
+            rows += len(chunk)
+    finally:
+        # Leave ``out`` open for the caller
+        text.detach()
+    return rows
+
+def _json_or_text(value):
+    """Structured analyses and version maps as JSON objects, legacy text as is"""
+    if value and value.startswith('{'):
+        try:
+            return json.loads(value)
+        except ValueError:
+            pass
+    return value
+
+def _write_jsonl(chunks, out):
+    rows = 0
+    for chunk in chunks:
+        lines = []
+        for row in chunk:
+            record = dict(zip(COLUMNS, row))
+            record['analysis'] = _json_or_text(record['analysis'])
+            record['resume_versions'] = _json_or_text(record['resume_versions'])
+            lines.append(json.dumps(record, ensure_ascii=False))
+        out.write(("\n".join(lines) + "\n").encode('utf-8'))
+        rows += len(chunk)
+    return rows
+
+def _write_parquet(chunks, out):
+    try:
+        import pandas as pd
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise ExportError("Parquet export needs pyarrow (pip install pyarrow)") from e
+    schema = pa.schema([
+        ('user_id', pa.int64()), ('username', pa.string()), ('created_at', pa.string()),
+        ('job_post', pa.string()), ('analysis', pa.string()), ('resume_versions', pa.string()),
+    ])
+    rows = 0
+    # One row group per chunk keeps only that chunk in memory
+    with pq.ParquetWriter(out, schema, compression='zstd') as writer:
+        for chunk in chunks:
+            frame = pd.DataFrame(chunk, columns=COLUMNS)
+            writer.write_table(pa.Table.from_pandas(frame, schema=schema, preserve_index=False))
+            rows += len(chunk)
+    return rows
+
+_WRITERS = {'csv': _write_csv, 'jsonl': _write_jsonl, 'parquet': _write_parquet}
+
+def export_history(fmt, out, user_id=None, chunk_size=CHUNK_ROWS):
+    """Write analysis history as ``fmt`` to the binary file ``out``; returns the row count.
+
+    Without a ``user_id`` every user's history is exported (admin export).
+    Rows stream from db.iter_analysis_history a chunk at a time, so memory
+    use doesn't grow with the history.
+    """
+    if fmt not in _WRITERS:
+        raise ExportError(f"Unknown export format {fmt!r}; expected one of {', '.join(FORMATS)}")
+    return _WRITERS[fmt](db.iter_analysis_history(user_id, chunk_size), out)
+
+def export_to_file(fmt, user_id=None, chunk_size=CHUNK_ROWS):
+    """Export to a new temporary file; returns (path, rows). The caller removes the file."""
+    handle, path = tempfile.mkstemp(prefix=_PREFIX, suffix=f'.{fmt}')
+    try:
+        with os.fdopen(handle, 'wb') as out:
+            rows = export_history(fmt, out, user_id, chunk_size)
+    except Exception:
+        os.remove(path)
+        raise
+    return path, rows
+
+def remove_stale_exports(max_age_s=None):
+    """Delete export files older than EXPORT_TTL_HOURS, left behind by
+    sessions that ended before downloading them; returns the count"""
+    cutoff = time.time() - (EXPORT_TTL_HOURS * 3600 if max_age_s is None else max_age_s)
+    removed = 0
+    for path in glob.glob(os.path.join(tempfile.gettempdir(), f'{_PREFIX}*')):
+        try:
+            if os.path.getmtime(path) < cutoff:
+                os.remove(path)
+                removed += 1
+        except OSError:
+            pass  # Downloaded and removed by its session meanwhile
+    return removed
@@ -1,26 +1,170 @@
-import PyPDF2
 import io
+import os
+import re
+import tempfile
+import zipfile
+import xml.etree.ElementTree as ET
+from contextlib import contextmanager
+import PyPDF2
 import streamlit as st
+from .errors import ExtractionError, DocumentTooLarge
+
+# Limits on what a single upload may cost to extract
+MAX_UPLOAD_BYTES = int(os.getenv('APPLYAI_MAX_UPLOAD_MB', '50')) * 2 ** 20
+MAX_PDF_PAGES = int(os.getenv('APPLYAI_MAX_PDF_PAGES', '300'))
+
+# Non-seekable streams are spooled to a temp file, in memory up to this size
+SPOOL_MAX_BYTES = 2 ** 20
+_CHUNK_BYTES = 2 ** 16
+
+def _too_large(max_bytes):
+    return DocumentTooLarge(f"File is larger than {max_bytes // 2 ** 20} MB")
+
+@contextmanager
+def open_document(source, max_bytes=MAX_UPLOAD_BYTES):
+    """Seekable binary stream over an upload, without copying it when possible.
+
+    Seekable file objects (Streamlit's UploadedFile is a BytesIO) are used
+    in place, bytes are wrapped without a copy, paths are opened, and any
+    other stream is spooled to a temp file. Raises DocumentTooLarge past
+    ``max_bytes``.
+    """
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        stream, owned = io.BytesIO(source), True
+    elif isinstance(source, (str, os.PathLike)):
+        stream, owned = open(source, 'rb'), True
+    elif source.seekable():
+        stream, owned = source, False
+    else:
+        stream, owned = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_BYTES), True
+        copied = 0
+        while chunk := source.read(_CHUNK_BYTES):
+            copied += len(chunk)
+            if copied > max_bytes:
+                stream.close()
+                raise _too_large(max_bytes)
+            stream.write(chunk)
+    try:
+        if stream.seek(0, io.SEEK_END) > max_bytes:
+            raise _too_large(max_bytes)
+        stream.seek(0)
+        yield stream
+    finally:
+        if owned:
+            stream.close()
+
+def iter_pdf_pages(source, max_pages=MAX_PDF_PAGES, max_bytes=MAX_UPLOAD_BYTES):
+    """Yield the text of each page of a PDF in order"""
+    with open_document(source, max_bytes) as stream:
+        try:
+            reader = PyPDF2.PdfReader(stream)
+            pages = reader.pages
+            if len(pages) > max_pages:
+                raise DocumentTooLarge(f"PDF has {len(pages)} pages; the limit is {max_pages}")
+        except PyPDF2.errors.PyPdfError as e:
+            raise ExtractionError(str(e)) from e
+        for page in pages:
+            yield page.extract_text() or ""
+            # PdfReader caches every object it resolves, images included; drop
+            # them per page so memory tracks one page rather than the document
+            reader.resolved_objects.clear()
+
+def pdf_text(source, **limits):
+    """Full text of a PDF, one line break between pages"""
+    return "\n".join(iter_pdf_pages(source, **limits))
+
+_W = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+_HEADER_PART = re.compile(r'word/header\d*\.xml$')
+_FOOTER_PART = re.compile(r'word/footer\d*\.xml$')
+
+def _iter_part_blocks(part):
+    """Yield paragraphs and table rows (cells tab-separated) from one part.
+
+    The XML is parsed incrementally and each element is detached once it
+    has been read, so memory stays flat however long the document is.
+    """
+    parents = []
+    runs = []  # one list of run texts per open paragraph; text boxes nest them
+    tables = []  # one {'cells', 'paragraphs'} per open (possibly nested) table
+    for event, elem in ET.iterparse(part, events=('start', 'end')):
+        tag = elem.tag
+        if event == 'start':
+            if tag == _W + 'tbl':
+                tables.append({'cells': [], 'paragraphs': []})
+            elif tag == _W + 'p':
+                runs.append([])
+            parents.append(elem)
+            continue
+
+        parents.pop()
+        if tag == _W + 't' and runs:
+            runs[-1].append(elem.text or '')
+        elif tag == _W + 'tab' and runs:
+            runs[-1].append('\t')
+        elif tag in (_W + 'br', _W + 'cr') and runs:
+            runs[-1].append('\n')
+        elif tag == _W + 'p':
+            # A text box's paragraphs end, and are yielded, before the
+            # paragraph holding them
+            text = ''.join(runs.pop())
+            if tables:
+                tables[-1]['paragraphs'].append(text)
+            else:
+                yield text
+        elif tag == _W + 'tc' and tables:
+            table = tables[-1]
+            table['cells'].append(' '.join(p for p in table['paragraphs'] if p))
+            table['paragraphs'] = []
+        elif tag == _W + 'tr' and tables:
+            row = '\t'.join(tables[-1]['cells'])
+            tables[-1]['cells'] = []
+            if len(tables) > 1:
+                # A nested table's rows become text of the enclosing cell
+                tables[-2]['paragraphs'].append(row)
+            else:
+                yield row
+        elif tag == _W + 'tbl' and tables:
+            tables.pop()
+
+        if parents and tag in (_W + 'p', _W + 'tbl', _W + 'sectPr'):
+            parents[-1].remove(elem)
+
+def iter_docx_blocks(source, max_bytes=MAX_UPLOAD_BYTES):
+    """Yield the text blocks of a DOCX in reading order: headers, body, footers"""
+    with open_document(source, max_bytes) as stream:
+        try:
+            package = zipfile.ZipFile(stream)
+        except zipfile.BadZipFile as e:
+            raise ExtractionError(f"Not a DOCX file: {str(e)}") from e
+        with package:
+            names = package.namelist()
+            if 'word/document.xml' not in names:
+                raise ExtractionError("Not a DOCX file: word/document.xml is missing")
+            parts = [n for n in names if _HEADER_PART.match(n)] + ['word/document.xml'] + \
+                [n for n in names if _FOOTER_PART.match(n)]
+            for name in parts:
+                with package.open(name) as part:
+                    try:
+                        yield from _iter_part_blocks(part)
+                    except ET.ParseError as e:
+                        raise ExtractionError(f"Malformed {name}: {str(e)}") from e
+
+def docx_text(source, **limits):
+    """Full text of a DOCX, one block per line"""
+    return "\n".join(iter_docx_blocks(source, **limits)).strip()
 
 def extract_text_from_pdf(uploaded_file):
     """Extract text from PDF files"""
     try:
-        # Create PDF reader object
-        pdf_bytes = io.BytesIO(uploaded_file.getvalue())
-        reader = PyPDF2.PdfReader(pdf_bytes)
-        
-        # Extract text
-        text = ""
-        for page in reader.pages:
-            text += page.extract_text() + "\n"
-            
+        text = pdf_text(uploaded_file)
+
         # Quick validation
         if not text.strip():
             st.error("No text could be extracted from the PDF")
             return None
-            
+
         return text
-        
+
     except Exception as e:
         st.error(f"Failed to process PDF: {str(e)}")
-        return None
\ No newline at end of file
+        return None
@@ -0,0 +1,125 @@
+import difflib
+import json
+import streamlit as st
+from . import analyze, db
+from .errors import AnalysisError, AnalysisCancelled
+from .parsing import load_analysis
+from .text_cache import content_hash, resume_texts
+
+# An edit touching more than this share of a resume's lines gets a full analysis
+MAX_CHANGED_RATIO = 0.25
+DIFF_CONTEXT_LINES = 2
+
+def changed_ratio(old, new):
+    """Share of lines added, removed or replaced between two texts"""
+    old_lines, new_lines = old.splitlines(), new.splitlines()
+    matcher = difflib.SequenceMatcher(None, old_lines, new_lines, autojunk=False)
+    changed = sum(max(i2 - i1, j2 - j1) for tag, i1, i2, j1, j2 in matcher.get_opcodes() if tag != 'equal')
+    return changed / max(len(old_lines), len(new_lines), 1)
+
+def resume_diff(name, old, new):
+    """Unified diff of one resume edit with a little surrounding context"""
+    return "\n".join(difflib.unified_diff(old.splitlines(), new.splitlines(), f"{name} (before)",
+                                          f"{name} (after)", n=DIFF_CONTEXT_LINES, lineterm=""))
+
+def previous_analysis(user_id, job_content):
+    """The latest saved analysis of ``job_content`` in plan_update's form, or None.
+
+    Its resumes are the stored versions it was run on, whichever tab or
+    session saved it. The session keeps the last one loaded, with resume
+    texts in the shared text cache, so re-runs skip rebuilding versions.
+    """
+    latest = db.get_latest_analysis(user_id, job_content)
+    if latest is None:
+        return None
+    analysis_id, analysis, versions = latest
+    cached = st.session_state.get('last_analysis')
+    if cached is not None and cached['id'] == analysis_id:
+        texts = {name: resume_texts.get(key) for name, key in cached['resumes'].items()}
+        if None not in texts.values():
+            return {'job_content': job_content, 'resumes': texts, 'result': cached['result']}
+    # Text-mode results and analyses saved before versioning can't be updated
+    if not versions or not (analysis or '').lstrip().startswith('{'):
+        return None
+    texts = {name: db.get_resume_version(user_id, name, version) for name, version in versions.items()}
+    if None in texts.values():
+        return None
+    result = load_analysis(analysis)
+    for content in texts.values():
+        resume_texts.put(content_hash(content), content)
+    st.session_state.last_analysis = {
+        'id': analysis_id,
+        'resumes': {name: content_hash(content) for name, content in texts.items()},
+        'result': result,
+    }
+    return {'job_content': job_content, 'resumes': texts, 'result': result}
+
+def plan_update(previous, resumes, job_content):
+    """Decide how a re-run can reuse the last analysis.
+
+    ``previous`` is ``{'job_content', 'resumes': {name: content}, 'result'}``
+    from previous_analysis. Returns None when a full analysis is
+    needed (different posting or resume set, text-mode result, or a large
+    edit), otherwise the names of the edited resumes, possibly empty.
+    """
+    if not previous or previous['job_content'] != job_content or not isinstance(previous['result'], dict):
+        return None
+    if [name for name, *_ in resumes] != list(previous['resumes']):
+        return None
+    changed = []
+    for name, content, *_ in resumes:
+        before = previous['resumes'][name]
+        if content == before:
+            continue
+        if changed_ratio(before, content) > MAX_CHANGED_RATIO:
+            return None
+        changed.append(name)
+    return changed
+
+def build_update_prompt(previous, resumes, changed, job_content):
+    """Prompt asking for fresh analyses of the edited resumes only, from diffs"""
+    by_name = {item['resume_name']: item for item in previous['result']['analyses']}
+    edited = []
+    for idx, (name, content, *_) in enumerate(resumes):
+        if name in changed:
+            before = {key: value for key, value in by_name[name].items() if key != 'resume_name'}
+            edited.append(f"\nResume {idx + 1} - {name}:\nPrevious analysis: {json.dumps(before)}\n"
+                          f"Edit:\n{resume_diff(name, previous['resumes'][name], content)}\n")
+    others = "".join(f"\n- {item['resume_name']}: {item['match_score']}"
+                     for item in previous['result']['analyses'] if item['resume_name'] not in changed)
+    return f"""As an AI career advisor, you analyzed these resumes against the job posting below, and some
+have since been edited. For each edited resume you get your previous analysis and a diff
+of the edit (lines starting with - were removed, + were added). Update its match score and the
+points the edit affects and keep the others as they were.
+{"".join(edited)}
+{f"Unchanged resumes and their match scores:{others}" if others else ""}
+In the comparison, say which of all the resumes is now best suited for this position.
+
+JOB POSTING:
+{job_content}"""
+
+def merge_update(previous, update):
+    """The previous result with the updated resumes' analyses swapped in"""
+    updated = {item['resume_name']: item for item in update['analyses']}
+    return {
+        'analyses': [updated.get(item['resume_name'], item) for item in previous['result']['analyses']],
+        'comparison': update['comparison'] or previous['result']['comparison'],
+    }
+
+def reanalyze(previous, resumes, changed, job_content, usage=None, token=None):
+    """Re-run the last analysis for edited resumes from their diffs.
+
+    Unchanged resumes keep their previous analysis; with nothing changed
+    the previous result is returned without a request.
+    """
+    if not changed:
+        return previous['result']
+    try:
+        prompt = build_update_prompt(previous, resumes, changed, job_content)
+        update = analyze.request_structured(analyze.get_client(), prompt, changed, usage, token=token)
+        return merge_update(previous, update)
+    except AnalysisCancelled:
+        raise
+    except Exception as e:
+        st.error(f"Analysis Error: {str(e)}")
+        raise AnalysisError(f"Error during analysis: {str(e)}")
@@ -0,0 +1,291 @@
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+try:
+    import httpx
+except ImportError:
+    # Newer anthropic releases are built on the httpx2 fork instead
+    import httpx2 as httpx
+
+# 'live' sends requests to the API; 'record' does too and saves each
+# response as a cassette; 'replay' answers from cassettes only;
+# 'synthetic' makes up valid responses of SYNTHETIC_OUTPUT_TOKENS
+LLM_TRANSPORT = os.getenv('APPLYAI_LLM_TRANSPORT', 'live').lower()
+CASSETTE_DIR = os.getenv(
+    'APPLYAI_CASSETTE_DIR',
+    os.path.join(os.path.dirname(os.path.dirname(__file__)), 'cassettes')
+)
+# Replayed timing: 'recorded' waits as long as the recording did for the
+# headers and each chunk, a number is seconds before the headers with the
+# body at once, 0 answers immediately
+REPLAY_LATENCY = os.getenv('APPLYAI_REPLAY_LATENCY', 'recorded')
+# Synthetic responses: output size, seconds to the first byte and seconds
+# per output token, spread over SYNTHETIC_CHUNKS chunks when streamed
+SYNTHETIC_OUTPUT_TOKENS = int(os.getenv('APPLYAI_SYNTHETIC_OUTPUT_TOKENS', '600'))
+SYNTHETIC_LATENCY = float(os.getenv('APPLYAI_SYNTHETIC_LATENCY_S', '0.5'))
+SYNTHETIC_TOKEN_LATENCY = float(os.getenv('APPLYAI_SYNTHETIC_TOKEN_MS', '10')) / 1000
+SYNTHETIC_CHUNKS = 20
+
+_RESUME_HEADER = re.compile(r'^\s*Resume \d+ - (.+?):\s*$', re.MULTILINE)
+_stats_lock = threading.Lock()
+
+stats = {'recorded': 0, 'replayed': 0, 'missing': 0, 'synthesized': 0}
+
+def _count(key):
+    with _stats_lock:
+        stats[key] += 1
+
+def request_key(request):
+    """Cassette name of a request: a hash of its method, path and JSON body"""
+    body = request.content
+    try:
+        body = json.dumps(json.loads(body), sort_keys=True).encode('utf-8')
+    except ValueError:
+        pass
+    digest = hashlib.sha256(f"{request.method} {request.url.path}\n".encode('utf-8') + body).hexdigest()
+    return digest[:32]
+
+def _error(status, kind, message):
+    return httpx.Response(status, json={'type': 'error', 'error': {'type': kind, 'message': message}})
+
+class _TimedStream(httpx.SyncByteStream):
+    """A body sent as ``chunks`` of (seconds after the headers, bytes).
+
+    Closing it from another thread, as a cancelled analysis does, ends the
+    body with a read error like a dropped connection.
+    """
+
+    def __init__(self, chunks):
+        self.chunks = chunks
+        self._closed = threading.Event()
+
+    def __iter__(self):
+        start = time.perf_counter()
+        for offset, data in self.chunks:
+            if self._closed.wait(max(0.0, offset - (time.perf_counter() - start))):
+                raise httpx.ReadError("stream closed")
+            yield data
+
+    def close(self):
+        self._closed.set()
+
+class _RecordingStream(httpx.SyncByteStream):
+    """Passes a live body through, noting when each chunk arrived, and saves
+    the cassette once the body has been read to the end"""
+
+    def __init__(self, stream, save, started):
+        self._stream = stream
+        self._save = save
+        self._started = started
+        self._chunks = []
+
+    def __iter__(self):
+        for data in self._stream:
+            self._chunks.append((time.perf_counter() - self._started, data))
+            yield data
+        self._save(self._chunks)
+
+    def close(self):
+        self._stream.close()
+
+class RecordingTransport(httpx.BaseTransport):
+    """Forwards requests to ``transport`` and saves every complete response
+    in ``directory`` as ``<request_key>.json``"""
+
+    def __init__(self, directory=CASSETTE_DIR, transport=None):
+        self.directory = directory
+        self.transport = transport or httpx.HTTPTransport()
+
+    def handle_request(self, request):
+        # Plain bodies, so cassettes stay readable and replay needs no decoding
+        request.headers['Accept-Encoding'] = 'identity'
+        started = time.perf_counter()
+        response = self.transport.handle_request(request)
+        headers_at = time.perf_counter() - started
+
+        def save(chunks):
+            body = b"".join(data for _, data in chunks)
+            cassette = {
+                'request': {'method': request.method, 'path': request.url.path,
+                            'body': request.content.decode('utf-8', 'replace')},
+                'response': {
+                    'status': response.status_code,
+                    'headers': {name: response.headers[name] for name in ('content-type', 'request-id')
+                                if name in response.headers},
+                    'headers_s': round(headers_at, 4),
+                    'chunks': [[round(offset - headers_at, 4), len(data)] for offset, data in chunks],
+                    'body': body.decode('utf-8'),
+                },
+            }
+            os.makedirs(self.directory, exist_ok=True)
+            with open(os.path.join(self.directory, f"{request_key(request)}.json"), 'w') as f:
+                json.dump(cassette, f, indent=1)
+            _count('recorded')
+
+        return httpx.Response(response.status_code, headers=response.headers,
+                              stream=_RecordingStream(response.stream, save, started),
+                              extensions=response.extensions)
+
+    def close(self):
+        self.transport.close()
+
+class ReplayTransport(httpx.BaseTransport):
+    """Answers requests from cassettes RecordingTransport saved; a request
+    without one gets a 404 naming the missing cassette.
+
+    ``latency`` is 'recorded' to keep the recorded timing (scaled by
+    ``speed``), or seconds to wait before the whole body.
+    """
+
+    def __init__(self, directory=CASSETTE_DIR, latency=REPLAY_LATENCY, speed=1.0):
+        self.directory = directory
+        self.latency = latency
+        self.speed = speed
+
+    def handle_request(self, request):
+        key = request_key(request)
+        try:
+            with open(os.path.join(self.directory, f"{key}.json")) as f:
+                recorded = json.load(f)['response']
+        except FileNotFoundError:
+            _count('missing')
+            return _error(404, 'not_found_error', f"No cassette {key} for {request.method} {request.url.path}")
+        body = recorded['body'].encode('utf-8')
+        if self.latency == 'recorded':
+            time.sleep(recorded['headers_s'] / self.speed)
+            chunks, position = [], 0
+            for offset, size in recorded['chunks']:
+                chunks.append((offset / self.speed, body[position:position + size]))
+                position += size
+        else:
+            time.sleep(float(self.latency))
+            chunks = [(0.0, body)]
+        _count('replayed')
+        return httpx.Response(recorded['status'], headers=recorded['headers'], stream=_TimedStream(chunks))
+
+_WORDS = "relevant experience with python services and data pipelines across teams "
+
+def _filler(chars):
+    """About ``chars`` characters of filler text"""
+    return (_WORDS * (chars // len(_WORDS) + 1))[:max(chars, 12)].strip()
+
+def _synthetic_analysis(names, output_tokens, points=3):
+    """A structured analysis that passes analyze.validate_analysis, about ``output_tokens`` long"""
+    # About 4 characters per token, spread over every point of every resume
+    chars = output_tokens * 4 // (len(names) * 4 * points)
+    return {
+        'analyses': [{
+            'match_score': 40 + (i * 17) % 60,
+            'overall': [_filler(chars)] * points,
+            'qualifications': [_filler(chars)] * points,
+            'missing': [_filler(chars)] * points,
+            'improvements': [_filler(chars)] * points,
+        } for i, _ in enumerate(names)],
+        'comparison': f"{names[0]} is the closest match." if len(names) > 1 else "",
+    }
+
+def _synthetic_text(names, output_tokens, points=3):
+    chars = output_tokens * 4 // (len(names) * 4 * points)
+    sections = ('Overall Assessment', 'Key Qualifications Match', 'Missing Skills/Experience',
+                'Suggested Resume Improvements')
+    return "".join(
+        f"===== RESUME {i + 1} - {name} =====\nMatch Score: {40 + (i * 17) % 60}%\n\n"
+        + "".join(f"{section}:\n" + f"• {_filler(chars)}\n" * points + "\n" for section in sections)
+        for i, name in enumerate(names)
+    )
+
+def _sse(event):
+    return f"event: {event['type']}\ndata: {json.dumps(event)}\n\n".encode('utf-8')
+
+class SyntheticTransport(httpx.BaseTransport):
+    """Makes up a valid /v1/messages response for every request, offline.
+
+    Requests with tools get an analysis tool call for the resumes named in
+    the prompt, others analysis text. ``latency`` seconds pass before the
+    headers, then ``token_latency`` per output token, spread over the
+    chunks of a streamed body.
+    """
+
+    def __init__(self, output_tokens=SYNTHETIC_OUTPUT_TOKENS, latency=SYNTHETIC_LATENCY,
+                 token_latency=SYNTHETIC_TOKEN_LATENCY):
+        self.output_tokens = output_tokens
+        self.latency = latency
+        self.token_latency = token_latency
+        self._ids = 0
+
+    def handle_request(self, request):
+        if request.method != 'POST' or request.url.path != '/v1/messages':
+            return _error(404, 'not_found_error', "Synthetic transport only serves POST /v1/messages")
+        body = json.loads(request.content)
+        prompt = "\n".join(m['content'] for m in body.get('messages', []) if isinstance(m['content'], str))
+        names = _RESUME_HEADER.findall(prompt) or ['Resume']
+        with _stats_lock:
+            self._ids += 1
+            message_id = f"msg_synthetic_{self._ids}"
+        tools = body.get('tools')
+        if tools:
+            block = {'type': 'tool_use', 'id': f"toolu_synthetic_{self._ids}", 'name': tools[0]['name'],
+                     'input': _synthetic_analysis(names, self.output_tokens)}
+            output = json.dumps(block['input'])
+        else:
+            block = {'type': 'text', 'text': _synthetic_text(names, self.output_tokens)}
+            output = block['text']
+        usage = {'input_tokens': len(request.content) // 4, 'output_tokens': len(output) // 4}
+        message = {'id': message_id, 'type': 'message', 'role': 'assistant', 'model': body.get('model'),
+                   'content': [block], 'stop_reason': 'tool_use' if tools else 'end_turn',
+                   'stop_sequence': None, 'usage': usage}
+        _count('synthesized')
+        time.sleep(self.latency)
+        generation = self.token_latency * usage['output_tokens']
+        if not body.get('stream'):
+            return httpx.Response(200, headers={'content-type': 'application/json'},
+                                  stream=_TimedStream([(generation, json.dumps(message).encode('utf-8'))]))
+        return httpx.Response(200, headers={'content-type': 'text/event-stream'},
+                              stream=_TimedStream(self._events(message, output, generation)))
+
+    def _events(self, message, output, generation):
+        """(offset, bytes) chunks of a streamed ``message``, deltas spread over ``generation`` seconds"""
+        block = message['content'][0]
+        start = {**message, 'content': [], 'stop_reason': None,
+                 'usage': {**message['usage'], 'output_tokens': 1}}
+        empty = {**block, 'input': {}} if block['type'] == 'tool_use' else {**block, 'text': ''}
+        chunks = [(0.0, _sse({'type': 'message_start', 'message': start})
+                   + _sse({'type': 'content_block_start', 'index': 0, 'content_block': empty}))]
+        size = -(-len(output) // SYNTHETIC_CHUNKS)
+        pieces = [output[i:i + size] for i in range(0, len(output), size)]
+        for n, piece in enumerate(pieces, 1):
+            delta = ({'type': 'input_json_delta', 'partial_json': piece} if block['type'] == 'tool_use'
+                     else {'type': 'text_delta', 'text': piece})
+            chunks.append((generation * n / len(pieces),
+                           _sse({'type': 'content_block_delta', 'index': 0, 'delta': delta})))
+        chunks.append((generation, _sse({'type': 'content_block_stop', 'index': 0})
+                       + _sse({'type': 'message_delta',
+                               'delta': {'stop_reason': message['stop_reason'], 'stop_sequence': None},
+                               'usage': {'output_tokens': message['usage']['output_tokens']}})
+                       + _sse({'type': 'message_stop'})))
+        return chunks
+
+_transport = None
+_transport_lock = threading.Lock()
+
+def get_transport(mode=None):
+    """The process-wide transport for ``mode`` (default LLM_TRANSPORT), or None for 'live'"""
+    global _transport
+    mode = mode or LLM_TRANSPORT
+    if mode == 'live':
+        return None
+    with _transport_lock:
+        if _transport is None:
+            if mode == 'record':
+                _transport = RecordingTransport()
+            elif mode == 'replay':
+                _transport = ReplayTransport()
+            elif mode == 'synthetic':
+                _transport = SyntheticTransport()
+            else:
+                raise ValueError(f"Unknown APPLYAI_LLM_TRANSPORT {mode!r}; "
+                                 "expected live, record, replay or synthetic")
+        return _transport
@@ -0,0 +1,231 @@
+import os
+import sqlite3
+import threading
+import time
+from . import db, export
+
+# Days of analysis history and resume versions kept per user; 0 keeps
+# everything. users.retention_days overrides it for one user.
+RETENTION_DAYS = int(os.getenv('APPLYAI_RETENTION_DAYS', '0'))
+# Hours between scheduled runs in the app process; 0 disables the scheduler
+INTERVAL_HOURS = float(os.getenv('APPLYAI_MAINTENANCE_INTERVAL_H', '24'))
+# Seconds per database file spent returning free pages, per run
+VACUUM_SECONDS = float(os.getenv('APPLYAI_VACUUM_SECONDS', '2'))
+
+# Rows deleted per transaction, pages freed per incremental_vacuum step, and
+# the pause between steps so sessions can take the write lock
+DELETE_BATCH = 500
+VACUUM_PAGES = 256
+STEP_PAUSE = 0.05
+# Rows ANALYZE samples per index, which bounds how long it takes
+ANALYSIS_LIMIT = 1000
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+stats = {'runs': 0, 'last_report': None}
+
+def _pages(conn):
+    return {
+        'page_size': conn.execute("PRAGMA page_size").fetchone()[0],
+        'pages': conn.execute("PRAGMA page_count").fetchone()[0],
+        'free': conn.execute("PRAGMA freelist_count").fetchone()[0],
+    }
+
+def _retention_overrides():
+    """{user_id: days} for users whose retention differs from RETENTION_DAYS"""
+    with db.get_db() as conn:
+        return dict(conn.execute("SELECT id, retention_days FROM users WHERE retention_days IS NOT NULL"))
+
+def _delete_batches(conn, select_ids, params, table, key='id', recheck=''):
+    """Delete rows picked by ``select_ids`` (a query returning at most
+    DELETE_BATCH keys) one short transaction at a time; returns the count.
+
+    ``recheck`` is an extra condition for the DELETE itself, for rows that
+    may stop qualifying between the select and the delete.
+    """
+    deleted = 0
+    while True:
+        ids = [row[0] for row in conn.execute(select_ids, params)]
+        if ids:
+            deleted += conn.execute(
+                f"DELETE FROM {table} WHERE {key} IN ({','.join('?' * len(ids))}) {recheck}", ids).rowcount
+        if len(ids) < DELETE_BATCH:
+            return deleted
+        time.sleep(STEP_PAUSE)
+
+def _expired_analyses(conn, overrides):
+    """Delete analyses older than each user's retention; returns the count"""
+    deleted = 0
+    # Old rows have the lowest ids, so scanning in id order finds them first
+    select = "SELECT id FROM analysis_history WHERE created_at < datetime('now', ?) {} ORDER BY id LIMIT ?"
+    if RETENTION_DAYS > 0:
+        exempt = list(overrides)
+        where = f"AND user_id NOT IN ({','.join('?' * len(exempt))})" if exempt else ""
+        deleted += _delete_batches(conn, select.format(where),
+                                   (f"-{RETENTION_DAYS} days", *exempt, DELETE_BATCH), 'analysis_history')
+    for user_id, days in overrides.items():
+        if days > 0:
+            deleted += _delete_batches(conn, select.format("AND user_id = ?"),
+                                       (f"-{days} days", user_id, DELETE_BATCH), 'analysis_history')
+    if deleted:
+        # Postings no remaining analysis refers to. The delete checks again,
+        # since an analysis saved since the select reuses the existing row
+        orphaned = "NOT EXISTS (SELECT 1 FROM analysis_history a WHERE a.job_hash = job_postings.hash)"
+        _delete_batches(conn, f"SELECT hash FROM job_postings WHERE {orphaned} LIMIT ?", (DELETE_BATCH,),
+                        'job_postings', key='hash', recheck=f"AND {orphaned}")
+    return deleted
+
+def _expired_versions(conn, overrides):
+    """Delete resume versions from before each resume's newest snapshot older
+    than the retention cutoff, so every remaining version still rebuilds"""
+    deleted = 0
+    resumes = conn.execute("SELECT DISTINCT user_id, filename FROM resume_versions").fetchall()
+    for user_id, filename in resumes:
+        days = overrides.get(user_id, RETENTION_DAYS)
+        if days <= 0:
+            continue
+        cutoff = conn.execute("""
+            SELECT MAX(version) FROM resume_versions
+            WHERE user_id = ? AND filename = ? AND base IS NULL AND created_at < datetime('now', ?)
+        """, (user_id, filename, f"-{days} days")).fetchone()[0]
+        if cutoff is None:
+            continue
+        # A delta after the cutoff that builds on an older version (two
+        # racing saves) would lose its base; leave such a resume alone
+        if conn.execute("""
+            SELECT 1 FROM resume_versions
+            WHERE user_id = ? AND filename = ? AND version > ? AND base < ?
+        """, (user_id, filename, cutoff, cutoff)).fetchone():
+            continue
+        deleted += conn.execute("""
+            DELETE FROM resume_versions WHERE user_id = ? AND filename = ? AND version < ?
+        """, (user_id, filename, cutoff)).rowcount
+    return deleted
+
+def _optimize(conn):
+    """Refresh the query planner's statistics, bounded by ANALYSIS_LIMIT"""
+    conn.execute(f"PRAGMA analysis_limit = {ANALYSIS_LIMIT}")
+    has_stats = conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'sqlite_stat1'").fetchone()
+    # PRAGMA optimize only re-analyzes what changed; the first run needs a full ANALYZE
+    conn.execute("PRAGMA optimize" if has_stats else "ANALYZE")
+
+def _incremental_vacuum(conn, budget):
+    """Free pages VACUUM_PAGES at a time until none are left or ``budget``
+    seconds are used; returns the pages returned to the filesystem"""
+    if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+        return 0
+    deadline = time.monotonic() + budget
+    freed = 0
+    while time.monotonic() < deadline:
+        before = conn.execute("PRAGMA freelist_count").fetchone()[0]
+        if not before:
+            break
+        # execute() steps the pragma once, which frees a single page;
+        # executescript() runs it to completion
+        conn.executescript(f"PRAGMA incremental_vacuum({VACUUM_PAGES})")
+        freed += before - conn.execute("PRAGMA freelist_count").fetchone()[0]
+        time.sleep(STEP_PAUSE)
+    return freed
+
+def _maintain_file(path, overrides, retention, vacuum_seconds, user_tables=True):
+    report = {'path': path}
+    # Autocommit, so each step below commits on its own
+    conn = sqlite3.connect(path, isolation_level=None, timeout=30)
+    try:
+        start = time.perf_counter()
+        before = _pages(conn)
+        if user_tables and retention:
+            report['analyses_deleted'] = _expired_analyses(conn, overrides)
+            report['versions_deleted'] = _expired_versions(conn, overrides)
+        report['retention_s'] = round(time.perf_counter() - start, 3)
+
+        start = time.perf_counter()
+        _optimize(conn)
+        report['optimize_s'] = round(time.perf_counter() - start, 3)
+
+        start = time.perf_counter()
+        report['pages_freed'] = _incremental_vacuum(conn, vacuum_seconds)
+        report['vacuum_s'] = round(time.perf_counter() - start, 3)
+        after = _pages(conn)
+        report['reclaimed_bytes'] = report['pages_freed'] * after['page_size']
+        report['size_before'] = before['pages'] * before['page_size']
+        report['size_after'] = after['pages'] * after['page_size']
+        report['free_bytes_left'] = after['free'] * after['page_size']
+        report['incremental_vacuum'] = conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2
+    finally:
+        conn.close()
+    return report
+
+def run_maintenance(retention=True, vacuum_seconds=VACUUM_SECONDS, log=print):
+    """Apply retention, refresh planner statistics and return free pages on
+    the central database and every shard, then remove abandoned export
+    files; returns a report per file"""
+    db.flush_writes()
+    overrides = _retention_overrides()
+    paths = [db.DB_PATH] + [db.shard_path(i) for i in range(db.SHARDS) if db.shard_path(i) != db.DB_PATH]
+    reports = []
+    for path in paths:
+        report = _maintain_file(path, overrides, retention, vacuum_seconds,
+                                user_tables=db.SHARDS == 1 or path != db.DB_PATH)
+        log(f"{path}: {report.get('analyses_deleted', 0)} analyses and {report.get('versions_deleted', 0)} "
+            f"resume versions deleted, {report['reclaimed_bytes'] / 2 ** 20:.1f} MB reclaimed "
+            f"({report['free_bytes_left'] / 2 ** 20:.1f} MB free left); retention {report['retention_s']} s, "
+            f"optimize {report['optimize_s']} s, vacuum {report['vacuum_s']} s")
+        reports.append(report)
+    removed = export.remove_stale_exports()
+    if removed:
+        log(f"{removed} abandoned export file(s) removed")
+    stats['runs'] += 1
+    stats['last_report'] = reports
+    return reports
+
+def convert_to_incremental(log=print):
+    """Switch existing database files to incremental auto-vacuum with one
+    full VACUUM each; blocks writers while it runs, so use it offline"""
+    paths = [db.DB_PATH] + [db.shard_path(i) for i in range(db.SHARDS) if db.shard_path(i) != db.DB_PATH]
+    for path in paths:
+        conn = sqlite3.connect(path, isolation_level=None)
+        try:
+            if conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2:
+                continue
+            start = time.perf_counter()
+            conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+            conn.execute("VACUUM")
+            log(f"{path}: converted to incremental vacuum in {time.perf_counter() - start:.1f} s")
+        finally:
+            conn.close()
+
+def _claim(task, interval_s):
+    """Record that ``task`` starts now unless some process started it less
+    than ``interval_s`` ago; True if this process should run it"""
+    with db.get_db() as conn:
+        claimed = conn.execute("""
+            INSERT INTO maintenance_runs (task, started_at) VALUES (?, CURRENT_TIMESTAMP)
+            ON CONFLICT (task) DO UPDATE SET started_at = CURRENT_TIMESTAMP
+            WHERE started_at < datetime('now', ?)
+        """, (task, f"-{int(interval_s)} seconds")).rowcount
+    return claimed == 1
+
+def _schedule(interval_s, stop):
+    while not stop.wait(min(interval_s, 3600) / 4):
+        try:
+            if _claim('maintenance', interval_s):
+                run_maintenance()
+        except Exception as e:
+            print(f"Error in scheduled maintenance: {str(e)}")
+
+def start_scheduler(interval_hours=INTERVAL_HOURS):
+    """Run maintenance every ``interval_hours`` on a background thread, once
+    per process; the maintenance_runs table keeps processes from overlapping"""
+    global _scheduler
+    if interval_hours <= 0:
+        return None
+    with _scheduler_lock:
+        if _scheduler is None:
+            stop = threading.Event()
+            thread = threading.Thread(target=_schedule, args=(interval_hours * 3600, stop),
+                                      name='applyai-maintenance', daemon=True)
+            thread.start()
+            _scheduler = (thread, stop)
+    return _scheduler[0]
@@ -0,0 +1,31 @@
+import os
+import resource
+import sys
+
+def deep_size(obj, seen=None):
+    """Approximate bytes held by ``obj`` and the containers and strings inside it"""
+    seen = set() if seen is None else seen
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(deep_size(key, seen) + deep_size(value, seen) for key, value in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(deep_size(item, seen) for item in obj)
+    return size
+
+def session_footprint(state):
+    """Keys in a session state mapping and the approximate bytes they hold"""
+    items = dict(state.items())
+    return {'keys': len(items), 'bytes': deep_size(items)}
+
+def process_rss():
+    """Resident memory of this process in bytes (peak where current isn't available)"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError):
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is in bytes on macOS and kilobytes elsewhere
+        return peak if sys.platform == 'darwin' else peak * 1024
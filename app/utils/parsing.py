@@ -0,0 +1,85 @@
+import json
+import re
+
+def empty_analysis(resume_name):
+    """Analysis with a zero score and no points"""
+    return {
+        'resume_name': resume_name,
+        'match_score': 0,
+        'overall': [],
+        'qualifications': [],
+        'missing': [],
+        'improvements': []
+    }
+
+def parse_analysis_sections(analysis_text):
+    """Parse the analysis text into structured sections"""
+    sections = {
+        'match_score': 0,
+        'overall': [],
+        'qualifications': [],
+        'missing': [],
+        'improvements': []
+    }
+    
+    current_section = None
+    
+    for line in analysis_text.split('\n'):
+        line = line.strip()
+        if not line:
+            continue
+        
+        # Check for section headers
+        if 'Match Score:' in line:
+            current_section = 'match_score'
+            match = re.search(r'(\d+)%', line)
+            if match:
+                sections['match_score'] = int(match.group(1))
+        elif 'Overall Assessment:' in line:
+            current_section = 'overall'
+        elif 'Key Qualifications Match:' in line:
+            current_section = 'qualifications'
+        elif 'Missing Skills/Experience:' in line:
+            current_section = 'missing'
+        elif 'Suggested Resume Improvements:' in line:
+            current_section = 'improvements'
+        # Add content to current section if it starts with a bullet point
+        elif current_section and current_section != 'match_score' and line.startswith('•'):
+            line = line.lstrip('•').strip()
+            if line:
+                sections[current_section].append(line)
+    
+    return sections
+
+def parse_multiple_analyses(analysis_text):
+    """Parse multiple resume analyses from the free-text template"""
+    blocks = []
+    for line in analysis_text.split('\n'):
+        if line.strip().startswith('===== RESUME'):
+            header = line.strip()
+            blocks.append((header.split(' - ', 1)[1].strip('= ') if ' - ' in header else 'Resume', []))
+        elif blocks:
+            blocks[-1][1].append(line)
+    
+    # Without resume headers, treat the whole text as a single analysis
+    if not blocks:
+        blocks = [('Analysis', analysis_text.split('\n'))]
+    
+    analyses = []
+    for resume_name, lines in blocks:
+        analysis = empty_analysis(resume_name)
+        analysis.update(parse_analysis_sections('\n'.join(lines)))
+        analyses.append(analysis)
+    return analyses
+
+def load_analysis(analysis):
+    """Normalize a structured result, its stored JSON or legacy text to
+    {'analyses': [...], 'comparison': str}"""
+    if isinstance(analysis, str) and analysis.lstrip().startswith('{'):
+        try:
+            analysis = json.loads(analysis)
+        except ValueError:
+            pass
+    if isinstance(analysis, dict):
+        return analysis
+    return {'analyses': parse_multiple_analyses(analysis), 'comparison': ""}
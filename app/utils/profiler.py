@@ -0,0 +1,141 @@
+import json
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+
+PROFILE_DIR = os.getenv(
+    'APPLYAI_PROFILE_DIR',
+    os.path.join(os.path.dirname(os.path.dirname(__file__)), 'profiles')
+)
+# Seconds between stack samples of the profiled script thread
+SAMPLE_INTERVAL = float(os.getenv('APPLYAI_PROFILE_INTERVAL_MS', '5')) / 1000
+# Hot functions kept in each profile's summary
+TOP_N = 25
+# Profiles kept on disk, oldest removed first
+MAX_PROFILES = 200
+# Users whose every rerun is profiled, e.g. one who reported slowness
+PROFILE_USERS = {name.strip() for name in os.getenv('APPLYAI_PROFILE_USERS', '').split(',') if name.strip()}
+
+stats = {'profiles': 0, 'samples': 0}
+
+def _label(code):
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+class StackSampler:
+    """Samples one thread's Python stack every ``interval`` seconds from a
+    background thread; ``counts`` maps root-to-leaf stacks to sample counts"""
+
+    def __init__(self, thread_id, interval=SAMPLE_INTERVAL):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.counts = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='applyai-profiler', daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                stack.append(_label(frame.f_code))
+                frame = frame.f_back
+            if stack:
+                self.counts[tuple(reversed(stack))] += 1
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        return self.counts
+
+def collapsed(counts):
+    """Stacks in the collapsed format flamegraph.pl and speedscope read: ``a;b;c 12``"""
+    return "".join(f"{';'.join(stack)} {count}\n" for stack, count in counts.most_common())
+
+def hot_functions(counts, top=TOP_N):
+    """(function, self samples, total samples) for the ``top`` functions by self samples"""
+    own, total = Counter(), Counter()
+    for stack, count in counts.items():
+        own[stack[-1]] += count
+        for label in set(stack):
+            total[label] += count
+    return [(label, samples, total[label]) for label, samples in own.most_common(top)]
+
+def _prune():
+    summaries = sorted(f for f in os.listdir(PROFILE_DIR) if f.endswith('.json'))
+    for name in summaries[:max(len(summaries) - MAX_PROFILES, 0)]:
+        for path in (name, name[:-len('.json')] + '.collapsed'):
+            try:
+                os.remove(os.path.join(PROFILE_DIR, path))
+            except FileNotFoundError:
+                pass
+
+@contextmanager
+def profiled(username, session_id=None):
+    """Sample the calling thread for the duration of the block and save the profile.
+
+    Writes ``<id>.collapsed`` (the stacks) and ``<id>.json`` (when, who, wall
+    time, sample count and the hot functions) to PROFILE_DIR, also when the
+    block is cut short by a rerun.
+    """
+    sampler = StackSampler(threading.get_ident()).start()
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        counts = sampler.stop()
+        wall = time.perf_counter() - started
+        try:
+            save_profile(counts, wall, username, session_id)
+        except OSError as e:
+            print(f"Error saving profile: {str(e)}")
+
+def save_profile(counts, wall, username, session_id=None):
+    """Write a profile's stacks and summary; returns the profile id"""
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    now = datetime.now()
+    profile_id = f"{now:%Y%m%d-%H%M%S-%f}-{re.sub(r'[^A-Za-z0-9_.-]', '_', str(username))}"
+    samples = sum(counts.values())
+    summary = {
+        'id': profile_id,
+        'created_at': now.isoformat(timespec='seconds'),
+        'username': username,
+        'session_id': session_id,
+        'wall_s': round(wall, 4),
+        'samples': samples,
+        'interval_ms': SAMPLE_INTERVAL * 1000,
+        'hot_functions': hot_functions(counts),
+    }
+    with open(os.path.join(PROFILE_DIR, f"{profile_id}.collapsed"), 'w') as f:
+        f.write(collapsed(counts))
+    with open(os.path.join(PROFILE_DIR, f"{profile_id}.json"), 'w') as f:
+        json.dump(summary, f)
+    stats['profiles'] += 1
+    stats['samples'] += samples
+    _prune()
+    return profile_id
+
+def recent_profiles(limit=50):
+    """Summaries of the newest saved profiles, newest first"""
+    if not os.path.isdir(PROFILE_DIR):
+        return []
+    names = sorted((f for f in os.listdir(PROFILE_DIR) if f.endswith('.json')), reverse=True)[:limit]
+    profiles = []
+    for name in names:
+        try:
+            with open(os.path.join(PROFILE_DIR, name)) as f:
+                profiles.append(json.load(f))
+        except (OSError, ValueError):
+            continue
+    return profiles
+
+def collapsed_path(profile_id):
+    return os.path.join(PROFILE_DIR, f"{os.path.basename(profile_id)}.collapsed")
@@ -0,0 +1,210 @@
+import itertools
+import json
+import os
+import statistics
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+# Requests to the API in flight at once across every session
+MAX_CONCURRENT = int(os.getenv('APPLYAI_LLM_CONCURRENCY', '8'))
+# Input plus output tokens admitted per minute; 0 for no limit
+TOKENS_PER_MINUTE = int(os.getenv('APPLYAI_LLM_TPM', '400000'))
+# Requests one user may have in flight, however many tabs or resumes
+USER_INFLIGHT = int(os.getenv('APPLYAI_LLM_USER_INFLIGHT', '2'))
+# Share of the API each user gets while others are waiting, as
+# "user_id=weight,..."; users not listed weigh 1
+WEIGHTS = os.getenv('APPLYAI_LLM_WEIGHTS', '')
+
+def _parse_weights(spec):
+    weights = {}
+    for item in filter(None, (part.strip() for part in spec.split(','))):
+        user, _, weight = item.partition('=')
+        weights[int(user) if user.strip().isdigit() else user.strip()] = float(weight)
+    return weights
+
+def estimate_tokens(request):
+    """Tokens a request may use: its input at about 4 characters per token
+    plus max_tokens of output, as the API's own rate limiter counts it"""
+    chars = sum(len(m['content']) if isinstance(m['content'], str) else len(json.dumps(m['content'], default=str))
+                for m in request.get('messages', []))
+    chars += len(json.dumps(request.get('tools', [])))
+    return chars // 4 + request.get('max_tokens', 0)
+
+class _Waiter:
+    __slots__ = ('user', 'cost', 'tag', 'start', 'seq', 'queued_at')
+
+    def __init__(self, user, cost, tag, start, seq):
+        self.user = user
+        self.cost = cost
+        self.tag = tag
+        self.start = start
+        self.seq = seq
+        self.queued_at = time.monotonic()
+
+class FairScheduler:
+    """Admits LLM requests under a global concurrency and tokens-per-minute
+    cap, in weighted fair queuing order across users.
+
+    Each request is tagged with a virtual finish time: where its user's last
+    request finished (or the current virtual time, if later) plus its token
+    cost over the user's weight. The waiting request with the smallest tag
+    among users below their in-flight limit goes next, so a user with many
+    or large requests queues behind their own work rather than everyone
+    else's. The token bucket refills continuously; a request waits at the
+    head of the queue until the bucket covers its estimate, which is settled
+    against the tokens actually used once it's done.
+    """
+
+    def __init__(self, concurrency=MAX_CONCURRENT, tokens_per_minute=TOKENS_PER_MINUTE,
+                 user_inflight=USER_INFLIGHT, weights=None):
+        self.concurrency = concurrency
+        self.tokens_per_minute = tokens_per_minute
+        self.user_inflight = user_inflight
+        self.weights = _parse_weights(WEIGHTS) if weights is None else weights
+        self._cond = threading.Condition()
+        self._seq = itertools.count()
+        self._waiting = []
+        self._virtual = 0.0
+        self._finish = {}
+        self._inflight = {}
+        self._running = 0
+        self._tokens = float(tokens_per_minute)
+        self._refilled = time.monotonic()
+        self.stats = {'granted': 0, 'abandoned': 0, 'max_depth': 0, 'waits': deque(maxlen=1000)}
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.tokens_per_minute,
+                           self._tokens + (now - self._refilled) * self.tokens_per_minute / 60)
+        self._refilled = now
+
+    def _head(self):
+        """The eligible waiter with the smallest virtual finish time"""
+        eligible = [w for w in self._waiting if self._inflight.get(w.user, 0) < self.user_inflight]
+        return min(eligible, key=lambda w: (w.tag, w.seq)) if eligible else None
+
+    def _admit(self, waiter):
+        """Seconds until ``waiter`` can go (0 once it has been granted), None to wait for a release"""
+        if self._running >= self.concurrency or self._head() is not waiter:
+            return None
+        if self.tokens_per_minute:
+            self._refill()
+            needed = min(waiter.cost, self.tokens_per_minute)
+            if self._tokens < needed:
+                return (needed - self._tokens) * 60 / self.tokens_per_minute
+            self._tokens -= waiter.cost
+        self._waiting.remove(waiter)
+        self._virtual = max(self._virtual, waiter.start)
+        self._running += 1
+        self._inflight[waiter.user] = self._inflight.get(waiter.user, 0) + 1
+        self.stats['granted'] += 1
+        self.stats['waits'].append(time.monotonic() - waiter.queued_at)
+        # Someone else may be at the head now
+        self._cond.notify_all()
+        return 0
+
+    def _withdraw(self, waiter):
+        self._waiting.remove(waiter)
+        self.stats['abandoned'] += 1
+        # Give back the user's virtual time if nothing was queued after it
+        if self._finish.get(waiter.user) == waiter.tag:
+            self._finish[waiter.user] = waiter.start
+        self._cond.notify_all()
+
+    def acquire(self, user, cost, token=None):
+        """Block until a request of ``cost`` tokens from ``user`` may be sent.
+
+        A CancelToken stops the wait when cancelled or past its deadline,
+        raising as token.check() does. Pass the returned grant to release().
+        """
+        if token is not None:
+            token.check()
+            remove = token.on_cancel(self._wake)
+        with self._cond:
+            start = max(self._virtual, self._finish.get(user, 0.0))
+            waiter = _Waiter(user, cost, start + cost / self.weights.get(user, 1.0), start, next(self._seq))
+            self._finish[user] = waiter.tag
+            self._waiting.append(waiter)
+            self.stats['max_depth'] = max(self.stats['max_depth'], len(self._waiting))
+            try:
+                while True:
+                    if token is not None:
+                        token.check()
+                    delay = self._admit(waiter)
+                    if delay == 0:
+                        break
+                    self._cond.wait(delay)
+            except BaseException:
+                self._withdraw(waiter)
+                raise
+            finally:
+                if token is not None:
+                    remove()
+        return (user, cost, waiter.queued_at)
+
+    def release(self, grant, used_tokens=None):
+        """Free a grant's slot, settling its estimate against ``used_tokens``"""
+        user, cost, _ = grant
+        with self._cond:
+            self._running -= 1
+            self._inflight[user] -= 1
+            if not self._inflight[user]:
+                del self._inflight[user]
+            if self.tokens_per_minute and used_tokens is not None:
+                self._refill()
+                self._tokens = min(self.tokens_per_minute, self._tokens + cost - used_tokens)
+            if not self._waiting and not self._running:
+                # Idle: start everyone afresh rather than carry old tags
+                self._finish.clear()
+                self._virtual = 0.0
+            self._cond.notify_all()
+
+    def _wake(self):
+        with self._cond:
+            self._cond.notify_all()
+
+    @contextmanager
+    def slot(self, user, cost, token=None):
+        """acquire() and release() around a request; set ``used`` on the
+        yielded dict to the tokens it used"""
+        grant = self.acquire(user, cost, token)
+        outcome = {'waited_s': time.monotonic() - grant[2], 'used': None}
+        try:
+            yield outcome
+        finally:
+            self.release(grant, outcome['used'])
+
+    def summary(self):
+        """Queue depth per user, requests in flight, wait percentiles and tokens available"""
+        with self._cond:
+            if self.tokens_per_minute:
+                self._refill()
+            depth = {}
+            for waiter in self._waiting:
+                depth[waiter.user] = depth.get(waiter.user, 0) + 1
+            waits = sorted(self.stats['waits'])
+            return {
+                'queued': len(self._waiting),
+                'queued_by_user': depth,
+                'in_flight': self._running,
+                'in_flight_by_user': dict(self._inflight),
+                'granted': self.stats['granted'],
+                'abandoned': self.stats['abandoned'],
+                'max_depth': self.stats['max_depth'],
+                'wait_p50_s': statistics.median(waits) if waits else None,
+                'wait_p95_s': waits[int(0.95 * (len(waits) - 1))] if waits else None,
+                'tokens_available': int(self._tokens) if self.tokens_per_minute else None,
+            }
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+def get_scheduler():
+    """The process-wide scheduler every request to the API goes through"""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = FairScheduler()
+        return _scheduler
@@ -0,0 +1,172 @@
+import os
+import re
+import unicodedata
+from collections import Counter
+
+# Section names and the headings that introduce them
+HEADINGS = {
+    'summary': ('summary', 'professional summary', 'career summary', 'profile', 'professional profile',
+                'objective', 'career objective', 'about me'),
+    'experience': ('experience', 'work experience', 'professional experience', 'relevant experience',
+                   'employment', 'employment history', 'work history', 'career history'),
+    'skills': ('skills', 'technical skills', 'key skills', 'core competencies', 'competencies',
+               'technologies', 'tools and technologies', 'skills and technologies'),
+    'education': ('education', 'education and training', 'academic background'),
+    'projects': ('projects', 'selected projects', 'personal projects', 'key projects'),
+    'certifications': ('certifications', 'certificates', 'licenses and certifications', 'licenses'),
+}
+_SECTION_OF = {heading: section for section, headings in HEADINGS.items() for heading in headings}
+
+# Sections whose entries may be cut to their first line when they're less
+# relevant to the posting; every other section is always sent in full
+TRIMMED_SECTIONS = ('experience', 'projects')
+# Experience entries and projects sent in full per resume
+MAX_FULL_ENTRIES = int(os.getenv('APPLYAI_MAX_FULL_ENTRIES', '3'))
+
+# A heading block shorter than this is contact details, not resume content
+MAX_CONTACT_LINES = 5
+
+_BULLET = re.compile(r'^[•●▪◦‣∙·*–-]\s+')
+# A word hyphenated at a line break: a split word, or a compound that happens to wrap
+_HYPHENATED = re.compile(r'([A-Za-z]+)-\n([a-z]+)')
+_WORD = re.compile(r"[a-z][a-z0-9+#.'-]{2,}")
+_STOPWORDS = frozenset("""
+    and the for with you our are will your this that from have has who not but all can their they
+    about into more work team role years experience ability strong including other such using what
+""".split())
+
+def estimate_tokens(text):
+    """About 4 characters per token"""
+    return len(text) // 4
+
+def terms(text):
+    """Distinct lower-cased words of a text, stopwords left out"""
+    return {word.strip(".'-") for word in _WORD.findall(text.lower())} - _STOPWORDS
+
+def _unhyphenate(text):
+    """Rejoin words split at line breaks, if the joined word appears elsewhere in
+    the text; otherwise it's a compound (state-of-the-art), so keep the hyphen"""
+    known = set(re.findall(r'[a-z]+', _HYPHENATED.sub(' ', text.lower())))
+    return _HYPHENATED.sub(lambda m: m[1] + m[2] if (m[1] + m[2]).lower() in known else f"{m[1]}-{m[2]}", text)
+
+def normalize_resume(text):
+    """Undo PDF extraction damage: ligatures, split words, wrapped lines, odd bullets and spacing"""
+    text = unicodedata.normalize('NFKC', text).replace('­', '')
+    text = _unhyphenate(text)
+    lines = []
+    for line in text.splitlines():
+        line = ' '.join(line.split())
+        if _BULLET.match(line):
+            line = _BULLET.sub('• ', line)
+        elif (line[:1].islower() and lines and lines[-1]
+              and not lines[-1].endswith(('.', ':', ';')) and not _heading(lines[-1])):
+            # A wrapped line: glue it back onto the line it was cut from
+            lines[-1] += ' ' + line
+            continue
+        lines.append(line)
+    return re.sub(r'\n{3,}', '\n\n', '\n'.join(lines)).strip()
+
+def _heading(line):
+    """Section name if ``line`` is a section heading, 'other' for an unknown one, else None"""
+    key = line.lower().rstrip(':').replace('&', 'and').strip()
+    if key in _SECTION_OF:
+        return _SECTION_OF[key]
+    words = line.rstrip(':').split()
+    if 0 < len(words) <= 4 and line.isupper() and not any(c.isdigit() for c in line):
+        return 'other'
+    return None
+
+def _entries(lines):
+    """Split experience lines into entries: a new one starts at a non-bullet
+    line after bullets or after a blank line"""
+    entries, current, after_bullets, after_blank = [], [], False, False
+    for line in lines:
+        if not line:
+            after_blank = bool(current)
+            continue
+        bullet = line.startswith('• ')
+        if current and not bullet and (after_bullets or after_blank):
+            entries.append(current)
+            current = []
+        current.append(line)
+        after_bullets, after_blank = bullet, False
+    if current:
+        entries.append(current)
+    return entries
+
+def segment_resume(text):
+    """Normalized resume split into (section, heading, content) segments.
+
+    Each experience entry is its own segment. Text before the first heading
+    is 'contact'; a resume without recognizable headings is one 'other'
+    segment.
+    """
+    blocks = [('contact', '', [])]
+    for line in normalize_resume(text).splitlines():
+        section = _heading(line)
+        if section is not None:
+            blocks.append((section, line, []))
+        else:
+            blocks[-1][2].append(line)
+    if len(blocks) == 1:
+        return [('other', '', '\n'.join(blocks[0][2]))] if blocks[0][2] else []
+
+    segments = []
+    for section, heading, lines in blocks:
+        if section == 'experience':
+            segments.extend((section, heading, '\n'.join(entry)) for entry in _entries(lines))
+            continue
+        content = '\n'.join(lines).strip()
+        if content:
+            segments.append((section, heading, content))
+    return segments
+
+def select_segments(segments, job_content, max_full=MAX_FULL_ENTRIES):
+    """The segments worth sending for this posting, and a note on what was left out.
+
+    Sections other than TRIMMED_SECTIONS always go. Of the experience
+    entries and projects, the most recent entry and up to ``max_full`` in
+    all go in full, ranked by the posting terms they share (terms found in
+    most entries count for little). The rest are cut to their first line
+    (role, company, dates) so the timeline survives. Short contact blocks
+    are dropped.
+    """
+    wanted = terms(job_content)
+    candidates = {i: terms(segment[2]) & wanted for i, segment in enumerate(segments)
+                  if segment[0] in TRIMMED_SECTIONS}
+    spread = Counter(term for shared in candidates.values() for term in shared)
+    scores = {i: sum(1 / spread[term] for term in shared) for i, shared in candidates.items()}
+    first = next((i for i in candidates if segments[i][0] == 'experience'), None)
+    ranked = sorted((i for i in candidates if i != first and scores[i] > 0), key=lambda i: (-scores[i], i))
+    full = ({first} if first is not None else set()) | set(ranked[:max_full - (first is not None)])
+
+    selected, trimmed, dropped = [], 0, 0
+    for i, (section, heading, content, *_) in enumerate(segments):
+        if section == 'contact' and content.count('\n') < MAX_CONTACT_LINES:
+            dropped += 1
+        elif i in candidates and i not in full:
+            selected.append((section, heading, content.split('\n', 1)[0]))
+            trimmed += 1
+        else:
+            selected.append((section, heading, content))
+    note = []
+    if trimmed:
+        note.append(f"{trimmed} less relevant experience entries or projects shortened to their first line")
+    if dropped:
+        note.append("contact details left out")
+    return selected, "; ".join(note)
+
+def render_segments(segments, note=""):
+    """Segments back as resume text, each section under its heading"""
+    lines, last_heading, last_content = [], None, ""
+    for _, heading, content in segments:
+        if heading != last_heading:
+            lines.append(f"\n{heading}" if heading else "")
+            last_heading = heading
+        elif '\n' in content or '\n' in last_content:
+            # Keep multi-line entries of one section apart
+            lines.append("")
+        lines.append(content)
+        last_content = content
+    text = "\n".join(lines).strip()
+    return f"{text}\n[{note[0].upper()}{note[1:]}]" if note else text
@@ -0,0 +1,55 @@
+import os
+import threading
+from collections import OrderedDict
+from .compression import content_hash
+
+# Total size of resume text kept in memory for all sessions together
+RESUME_CACHE_MB = int(os.getenv('APPLYAI_RESUME_CACHE_MB', '64'))
+
+class TextCache:
+    """Process-wide LRU of texts keyed by content hash, bounded in bytes.
+
+    Identical texts from different sessions share one entry. Entries are
+    evicted least recently used first once ``max_bytes`` is exceeded; callers
+    reload evicted text from the database.
+    """
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'evictions': 0}
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.stats['misses'] += 1
+                return None
+            self._entries.move_to_end(key)
+            self.stats['hits'] += 1
+            return entry[0]
+
+    def put(self, key, text):
+        size = len(text.encode('utf-8'))
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return
+            self._entries[key] = (text, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._bytes -= evicted
+                self.stats['evictions'] += 1
+
+    def usage(self):
+        """Entries and bytes held, the byte limit and hit/miss/eviction counts"""
+        with self._lock:
+            return {'entries': len(self._entries), 'bytes': self._bytes, 'max_bytes': self.max_bytes,
+                    **self.stats}
+
+resume_texts = TextCache(RESUME_CACHE_MB * 2 ** 20)
@@ -0,0 +1,199 @@
+import hashlib
+import ipaddress
+import os
+import re
+import socket
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urljoin, urlsplit
+import requests
+from requests.adapters import HTTPAdapter
+from bs4 import BeautifulSoup
+from . import analyze, db
+from .errors import ExtractionError
+from .segments import terms
+
+# Preparations kept for reuse, oldest dropped first
+CACHE_SIZE = 64
+WORKERS = int(os.getenv('APPLYAI_WARMUP_WORKERS', '2'))
+
+FETCH_TIMEOUT = 10
+MAX_POSTING_BYTES = 2 * 2 ** 20
+# Redirects followed when fetching a posting, each checked like the first URL
+MAX_REDIRECTS = 5
+
+_URL = re.compile(r'^https?://\S+$')
+
+_executor = ThreadPoolExecutor(WORKERS, thread_name_prefix='applyai-warmup')
+_prepared = OrderedDict()
+_lock = threading.Lock()
+
+stats = {'warmups': 0, 'hits': 0, 'misses': 0}
+
+def is_url(text):
+    return bool(_URL.match(text.strip()))
+
+def _check_public(url):
+    """The address to fetch ``url`` from; raises ExtractionError unless it is
+    http(s) on a host that only resolves to public addresses, so users can't
+    reach internal services"""
+    parts = urlsplit(url)
+    if parts.scheme not in ('http', 'https') or not parts.hostname:
+        raise ExtractionError("Job posting links must be http or https URLs")
+    try:
+        infos = socket.getaddrinfo(parts.hostname, parts.port or (443 if parts.scheme == 'https' else 80),
+                                   proto=socket.IPPROTO_TCP)
+    except (socket.gaierror, UnicodeError) as e:
+        raise ExtractionError(f"Could not fetch job posting: {str(e)}") from e
+    addresses = []
+    for *_, sockaddr in infos:
+        address = ipaddress.ip_address(sockaddr[0].split('%')[0])
+        address = getattr(address, 'ipv4_mapped', None) or address
+        if not address.is_global:
+            raise ExtractionError("Job posting links must point to a public website")
+        addresses.append(str(address))
+    return addresses[0]
+
+class _PinnedAdapter(HTTPAdapter):
+    """Connects to ``address`` instead of resolving the URL's host again, so
+    the host can't be rebound to an internal address between the check and
+    the fetch. The host name is still sent as the Host header and used for
+    TLS SNI and certificate checks."""
+
+    def __init__(self, address):
+        self.address = address
+        super().__init__()
+
+    def get_connection(self, url, proxies=None):
+        parts = urlsplit(url)
+        pool_kwargs = {}
+        if parts.scheme == 'https':
+            pool_kwargs = {'server_hostname': parts.hostname, 'assert_hostname': parts.hostname}
+        return self.poolmanager.connection_from_host(
+            self.address, parts.port or (443 if parts.scheme == 'https' else 80), parts.scheme,
+            pool_kwargs=pool_kwargs)
+
+    def add_headers(self, request, **kwargs):
+        parts = urlsplit(request.url)
+        host = f"[{parts.hostname}]" if ':' in parts.hostname else parts.hostname
+        request.headers['Host'] = host + (f":{parts.port}" if parts.port else '')
+
+def _get(url, address):
+    """Streamed GET of ``url`` from ``address``, without following redirects"""
+    session = requests.Session()
+    # A proxy would connect to the host by name
+    session.trust_env = False
+    session.mount('http://', _PinnedAdapter(address))
+    session.mount('https://', _PinnedAdapter(address))
+    return session.get(url, timeout=FETCH_TIMEOUT, stream=True, allow_redirects=False,
+                       headers={'User-Agent': 'ApplyAI/1.0'})
+
+def fetch_posting(url):
+    """Text of the job posting at ``url``.
+
+    Only public addresses are fetched, redirects included, each from the
+    address that was checked, and at most MAX_POSTING_BYTES of the page are
+    read.
+    """
+    try:
+        for _ in range(MAX_REDIRECTS + 1):
+            with _get(url, _check_public(url)) as response:
+                if response.is_redirect:
+                    url = urljoin(url, response.headers['Location'])
+                    continue
+                response.raise_for_status()
+                if int(response.headers.get('Content-Length') or 0) > MAX_POSTING_BYTES:
+                    raise ExtractionError(f"Job posting page is larger than {MAX_POSTING_BYTES // 2 ** 20} MB")
+                html = response.raw.read(MAX_POSTING_BYTES + 1, decode_content=True)
+                break
+        else:
+            raise ExtractionError(f"Job posting link redirected more than {MAX_REDIRECTS} times")
+    except requests.RequestException as e:
+        raise ExtractionError(f"Could not fetch job posting: {str(e)}") from e
+    if len(html) > MAX_POSTING_BYTES:
+        raise ExtractionError(f"Job posting page is larger than {MAX_POSTING_BYTES // 2 ** 20} MB")
+    soup = BeautifulSoup(html, 'html.parser')
+    for tag in soup(['script', 'style', 'noscript', 'nav', 'header', 'footer']):
+        tag.decompose()
+    return soup.get_text('\n')
+
+def normalize_text(text):
+    """Trim each line and collapse runs of blank lines"""
+    lines = (' '.join(line.split()) for line in text.splitlines())
+    return re.sub(r'\n{3,}', '\n\n', '\n'.join(lines)).strip()
+
+def keyword_scores(job_content, resumes):
+    """Share of the posting's distinct terms found in each resume, as 0-100"""
+    wanted = terms(job_content)
+    if not wanted:
+        return {name: 0 for name, *_ in resumes}
+    return {name: round(100 * len(wanted & terms(content)) / len(wanted)) for name, content, *_ in resumes}
+
+def prepare(job_input, resumes, mode=None, user_id=None):
+    """Everything an analysis needs before the model is called.
+
+    Returns a dict with the normalized ``job_content`` (fetched first when
+    ``job_input`` is a URL), the ``prompt``, its estimated ``prompt_tokens``,
+    local ``keyword_scores`` and the ``seconds`` it took. With a
+    ``user_id`` the prompt is built from the resume segments stored at
+    ingest instead of segmenting the resumes again.
+    """
+    start = time.perf_counter()
+    job_content = normalize_text(fetch_posting(job_input.strip()) if is_url(job_input) else job_input)
+    if not job_content:
+        raise ExtractionError("The job posting is empty")
+    segments = db.get_resume_segments(user_id) if user_id is not None else None
+    prompt = analyze.build_prompt(resumes, job_content, mode, segments)
+    return {
+        'job_content': job_content,
+        'prompt': prompt,
+        # About 4 characters per token
+        'prompt_tokens': len(prompt) // 4,
+        'keyword_scores': keyword_scores(job_content, resumes),
+        'seconds': time.perf_counter() - start,
+    }
+
+def prepare_key(user_id, job_input, resumes, mode=None):
+    """Key that changes whenever the posting, the resumes or the mode do"""
+    digest = hashlib.sha256(f"{user_id}\0{mode or analyze.ANALYSIS_MODE}\0{job_input.strip()}".encode())
+    for name, content, *_ in resumes:
+        digest.update(f"\0{name}\0{content}".encode())
+    return digest.hexdigest()
+
+def warm_up(user_id, job_input, resumes, mode=None):
+    """Start preparing an analysis in the background; returns its Future"""
+    key = prepare_key(user_id, job_input, resumes, mode)
+    with _lock:
+        future = _prepared.get(key)
+        if future is not None:
+            _prepared.move_to_end(key)
+            return future
+        future = _executor.submit(prepare, job_input, resumes, mode, user_id)
+        _prepared[key] = future
+        stats['warmups'] += 1
+        while len(_prepared) > CACHE_SIZE:
+            _prepared.popitem(last=False)
+    return future
+
+def get_prepared(user_id, job_input, resumes, mode=None):
+    """The preparation for these inputs, reusing a warm-up when there is one.
+
+    Waits for a warm-up still in flight. Errors raised while preparing are
+    raised here.
+    """
+    key = prepare_key(user_id, job_input, resumes, mode)
+    with _lock:
+        future = _prepared.get(key)
+        stats['hits' if future is not None else 'misses'] += 1
+    if future is None:
+        return prepare(job_input, resumes, mode, user_id)
+    try:
+        return future.result()
+    except Exception:
+        # Don't keep a failure around; the next click prepares afresh
+        with _lock:
+            if _prepared.get(key) is future:
+                del _prepared[key]
+        raise
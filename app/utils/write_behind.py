@@ -0,0 +1,164 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from .errors import WriteFailed, WriteQueueFull
+
+_STOP = object()
+
+class WriteBehindQueue:
+    """Single writer thread that group-commits queued writes.
+
+    A write is one or more ``(sql, params)`` statements tagged with a key
+    (the user id); its statements are always committed together. The
+    writer drains up to ``batch_size`` writes per transaction, so many
+    concurrent sessions share one commit instead of each taking SQLite's
+    write lock in turn. ``wait_for(key)`` blocks until everything submitted
+    under that key is committed, which gives a session read-your-writes.
+    Each write's future says whether it was committed; failures are also
+    counted in ``stats['failed']``, the latest kept in ``last_error``.
+    """
+
+    def __init__(self, connect, max_pending=1000, batch_size=200, linger=0.005, put_timeout=5.0):
+        self._connect = connect
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._batch_size = batch_size
+        self._linger = linger
+        self._put_timeout = put_timeout
+        self._cond = threading.Condition()
+        # Held from numbering a write until it's queued, so the queue (and
+        # the writer) always sees sequence numbers in order
+        self._put_lock = threading.Lock()
+        self._submitted = 0
+        # Every write up to _done is committed (or rejected); _finished holds
+        # the ones after it that finished early
+        self._done = 0
+        self._finished = set()
+        self._last_by_key = {}
+        self._closed = False
+        self.stats = {'writes': 0, 'batches': 0, 'failed': 0}
+        self.last_error = None
+        self._thread = threading.Thread(target=self._run, name='applyai-writer', daemon=True)
+        self._thread.start()
+
+    def submit(self, key, sql, params=()):
+        """Queue a single-statement write; see submit_all"""
+        return self.submit_all(key, [(sql, params)])
+
+    def submit_all(self, key, statements):
+        """Queue statements to run in order in the same transaction, with no
+        other write in between; blocks while the queue is full and raises
+        WriteQueueFull after put_timeout.
+
+        Returns a Future resolving to the write's sequence number once it is
+        committed, or raising WriteFailed if it couldn't be.
+        """
+        future = Future()
+        with self._put_lock:
+            with self._cond:
+                if self._closed:
+                    raise WriteQueueFull("Write queue is closed")
+                self._submitted += 1
+                seq = self._submitted
+                self._last_by_key[key] = seq
+            try:
+                self._queue.put((seq, list(statements), future), timeout=self._put_timeout)
+            except queue.Full:
+                # Nothing will ever commit this sequence number, so account for it here
+                self._mark_done(seq)
+                raise WriteQueueFull(f"Write queue stayed full for {self._put_timeout}s")
+        return future
+
+    def wait_for(self, key, timeout=None):
+        """Block until every write submitted under ``key`` has been committed"""
+        with self._cond:
+            target = self._last_by_key.get(key)
+            if target is None:
+                return True
+            return self._cond.wait_for(lambda: self._done >= target, timeout)
+
+    def flush(self, timeout=None):
+        """Block until everything submitted so far has been committed"""
+        with self._cond:
+            target = self._submitted
+            return self._cond.wait_for(lambda: self._done >= target, timeout)
+
+    def close(self, timeout=None):
+        """Flush outstanding writes and stop the writer thread"""
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+
+    def pending(self):
+        """Number of writes queued but not yet committed"""
+        with self._cond:
+            return self._submitted - self._done - len(self._finished)
+
+    def _mark_done(self, *seqs):
+        with self._cond:
+            self._finished.update(seqs)
+            # Only advance past writes that have all finished
+            while self._done + 1 in self._finished:
+                self._done += 1
+                self._finished.remove(self._done)
+            self._cond.notify_all()
+
+    def _next_batch(self):
+        first = self._queue.get()
+        if first is _STOP:
+            return [], True
+        batch = [first]
+        deadline = time.monotonic() + self._linger
+        while len(batch) < self._batch_size:
+            try:
+                item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                break
+            if item is _STOP:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def _run(self):
+        conn = self._connect()
+        conn.execute('PRAGMA journal_mode = WAL')
+        try:
+            stop = False
+            while not stop:
+                batch, stop = self._next_batch()
+                if batch:
+                    self._commit(conn, batch)
+        finally:
+            conn.close()
+
+    def _commit(self, conn, batch):
+        errors = {}
+        try:
+            with conn:
+                for _, statements, _ in batch:
+                    for sql, params in statements:
+                        conn.execute(sql, params)
+            self.stats['batches'] += 1
+            self.stats['writes'] += len(batch)
+        except Exception as e:
+            # Replay one by one so a single bad write doesn't drop the batch
+            print(f"Error committing write batch, retrying individually: {str(e)}")
+            for seq, statements, _ in batch:
+                try:
+                    with conn:
+                        for sql, params in statements:
+                            conn.execute(sql, params)
+                    self.stats['writes'] += 1
+                except Exception as e:
+                    self.stats['failed'] += 1
+                    self.last_error = errors[seq] = str(e)
+                    print(f"Error in queued write: {str(e)}")
+        self._mark_done(*(seq for seq, _, _ in batch))
+        for seq, _, future in batch:
+            if seq in errors:
+                future.set_exception(WriteFailed(errors[seq]))
+            else:
+                future.set_result(seq)
@@ -0,0 +1,7 @@
+"""
+Benchmark suite for ApplyAI.
+
+Run from the repository root:
+
+    python -m benchmarks.run --scale 0.01
+"""
@@ -0,0 +1,25 @@
+"""
+One open resume editor, served by ``streamlit run`` for bench_autosave.
+
+User 1's ``resume.pdf`` must already be in the database at
+APPLYAI_DB_PATH. With APPLYAI_BENCH_KEEP_TIMER=1 the rerun that ends the
+autosave timer is skipped, which is how the editor behaved before it.
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'app'))
+
+import streamlit as st
+from components.resume_manager import remember_resume, render_resume_row
+from utils import db
+
+if os.getenv('APPLYAI_BENCH_KEEP_TIMER'):
+    st.rerun = lambda *args, **kwargs: None
+
+if 'user_id' not in st.session_state:
+    st.session_state.user_id = 1
+    remember_resume('resume.pdf', db.get_resume_content(1, 'resume.pdf'), 'pdf')
+    st.session_state['editing_resume.pdf'] = True
+
+render_resume_row('resume.pdf')
@@ -0,0 +1,190 @@
+"""
+Reruns and writes per resume editing session.
+
+Serves benchmarks/autosave_app.py (one open resume editor) with
+``streamlit run`` and drives it over the websocket the way the browser
+does: ``--edits`` committed edits ``--gap`` seconds apart, then ``--idle``
+seconds with the editor left open. Fragment timers (``run_every``) are
+kept like the browser keeps them: started by an auto-rerun message,
+stopped by a stop message or a full app run.
+
+- ``timer-kept``: the autosave timer is never ended, as before it was
+  fixed, so an idle editor keeps rerunning every SAVE_DELAY seconds.
+- ``timer-stopped``: the current editor, which reruns the app once after
+  saving and so drops the timer.
+
+Reported per session: script runs (full and fragment), runs during the
+idle time and resume versions written.
+
+    python -m benchmarks.bench_autosave --edits 5 --gap 0.5 --idle 30
+"""
+import argparse
+import asyncio
+import os
+import socket
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+from . import harness, synthetic
+
+APP_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'autosave_app.py')
+
+def seed_db(path, rng):
+    """Database at ``path`` whose user 1 has resume.pdf, in a fresh process's
+    view (utils.db reads APPLYAI_DB_PATH at import)"""
+    subprocess.run([sys.executable, '-c', (
+        "import sys; sys.path.insert(0, sys.argv[1]); from utils import db; "
+        "db.save_resume(1, 'resume.pdf', sys.argv[2], 'pdf')"
+    ), harness.APP_DIR, synthetic.resume_text(rng)], check=True, env={**os.environ, 'APPLYAI_DB_PATH': path})
+
+def versions_written(path):
+    with sqlite3.connect(path) as conn:
+        return conn.execute("SELECT COUNT(*) FROM resume_versions WHERE user_id = 1").fetchone()[0]
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+def start_server(port, env):
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'streamlit', 'run', APP_SCRIPT, '--server.headless', 'true',
+         '--server.port', str(port), '--browser.gatherUsageStats', 'false'],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            urllib.request.urlopen(f"http://127.0.0.1:{port}/_stcore/health", timeout=1)
+            return server
+        except OSError:
+            time.sleep(0.2)
+    server.kill()
+    raise RuntimeError("streamlit server did not start")
+
+class Browser:
+    """Just enough of the Streamlit frontend: widget values, reruns and fragment timers"""
+
+    def __init__(self, ws):
+        from streamlit.proto.BackMsg_pb2 import BackMsg
+        from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+        self.BackMsg, self.ForwardMsg = BackMsg, ForwardMsg
+        self.ws = ws
+        self.editor = None
+        self.editor_fragment = ''
+        self.value = None
+        self.timers = {}
+        self.runs = {'full': 0, 'fragment': 0}
+        self.finished = asyncio.Event()
+
+    async def rerun(self, fragment_id='', auto=False):
+        msg = self.BackMsg()
+        state = msg.rerun_script
+        state.fragment_id = fragment_id
+        state.is_auto_rerun = auto
+        if self.editor is not None:
+            widget = state.widget_states.widgets.add()
+            widget.id = self.editor
+            widget.string_value = self.value
+        self.finished.clear()
+        await self.ws.send(msg.SerializeToString())
+
+    async def _tick(self, fragment_id, interval):
+        while True:
+            await asyncio.sleep(interval)
+            await self.rerun(fragment_id, auto=True)
+
+    def _stop(self, fragment_id):
+        timer = self.timers.pop(fragment_id, None)
+        if timer is not None:
+            timer.cancel()
+
+    async def listen(self):
+        async for data in self.ws:
+            msg = self.ForwardMsg()
+            msg.ParseFromString(data)
+            kind = msg.WhichOneof('type')
+            if kind == 'new_session':
+                if msg.new_session.fragment_ids_this_run:
+                    self.runs['fragment'] += 1
+                else:
+                    self.runs['full'] += 1
+                    for fragment_id in list(self.timers):
+                        self._stop(fragment_id)
+            elif kind == 'delta' and msg.delta.WhichOneof('type') == 'new_element':
+                element = msg.delta.new_element
+                if element.WhichOneof('type') == 'text_area':
+                    self.editor = element.text_area.id
+                    self.editor_fragment = msg.delta.fragment_id
+                    if self.value is None:
+                        self.value = element.text_area.value
+            elif kind == 'auto_rerun':
+                fragment_id = msg.auto_rerun.fragment_id
+                self._stop(fragment_id)
+                self.timers[fragment_id] = asyncio.ensure_future(self._tick(fragment_id, msg.auto_rerun.interval))
+            elif kind == 'stop_auto_rerun':
+                for fragment_id in msg.stop_auto_rerun.fragment_ids:
+                    self._stop(fragment_id)
+            elif kind == 'script_finished':
+                self.finished.set()
+
+async def editing_session(port, args):
+    import websockets
+    async with websockets.connect(f"ws://127.0.0.1:{port}/_stcore/stream", subprotocols=['streamlit'],
+                                  max_size=None) as ws:
+        browser = Browser(ws)
+        listener = asyncio.ensure_future(browser.listen())
+        await browser.rerun()
+        await asyncio.wait_for(browser.finished.wait(), 30)
+        for n in range(args.edits):
+            browser.value += f"\nedit {n}"
+            await browser.rerun(browser.editor_fragment)
+            await asyncio.sleep(args.gap)
+        before_idle = sum(browser.runs.values())
+        await asyncio.sleep(args.idle)
+        idle_runs = sum(browser.runs.values()) - before_idle
+        for fragment_id in list(browser.timers):
+            browser._stop(fragment_id)
+        listener.cancel()
+        return dict(browser.runs), idle_runs
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--edits', type=int, default=5)
+    parser.add_argument('--gap', type=float, default=0.5)
+    parser.add_argument('--idle', type=float, default=30.0)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default=os.path.join(harness.RESULTS_DIR, 'autosave.json'))
+    args = parser.parse_args(argv)
+
+    results = {}
+    print(f"{'mode':<14} {'full runs':>9} {'fragment runs':>13} {'idle runs':>9} {'writes':>6}")
+    for mode in ('timer-kept', 'timer-stopped'):
+        path = os.path.join(tempfile.mkdtemp(prefix='applyai-autosave-'), 'bench.db')
+        seed_db(path, synthetic.make_rng(args.seed, 'autosave'))
+        before = versions_written(path)
+        env = {**os.environ, 'APPLYAI_DB_PATH': path, 'APPLYAI_MAINTENANCE_INTERVAL_H': '0'}
+        if mode == 'timer-kept':
+            env['APPLYAI_BENCH_KEEP_TIMER'] = '1'
+        port = free_port()
+        server = start_server(port, env)
+        try:
+            runs, idle_runs = asyncio.run(editing_session(port, args))
+        finally:
+            server.terminate()
+            server.wait(10)
+        results[mode] = row = {**{f"{kind}_runs": count for kind, count in runs.items()},
+                               'idle_runs': idle_runs, 'writes': versions_written(path) - before}
+        print(f"{mode:<14} {row['full_runs']:>9} {row['fragment_runs']:>13} {row['idle_runs']:>9} "
+              f"{row['writes']:>6}")
+
+    meta = harness.metadata(edits=args.edits, gap=args.gap, idle=args.idle)
+    harness.write_results({'meta': meta, 'results': results}, args.output)
+    print(f"\nresults written to {args.output}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
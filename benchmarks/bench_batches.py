@@ -0,0 +1,108 @@
+"""
+Bulk analysis: synchronous calls against the Message Batches flow.
+
+One user with ``--resumes`` resumes is analyzed against each of
+``--postings`` postings. ``sync`` runs them one after another through
+utils.analyze.request_structured on StubAnthropic with ``--latency``
+seconds per call. ``batch`` queues, submits, polls and ingests them
+through utils.batches against the local FakeBatchesServer. Client seconds
+is the time spent submitting and saving results, leaving out the wait for
+the batch to end. Batched tokens are billed at half price, so the cost
+column is in full-price tokens.
+
+    python -m benchmarks.bench_batches --postings 50 200
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+from . import harness, synthetic
+from .fake_batches import FakeBatchesServer
+from .run import quiet_streamlit
+from .stubs import StubAnthropic
+
+def seed_user(db, resumes, rng):
+    """Fresh database whose test user has ``resumes`` resumes"""
+    db.DB_PATH = os.path.join(tempfile.mkdtemp(prefix='applyai-batches-'), 'bench.db')
+    db.SHARDS = 1
+    db.WRITE_BEHIND = False
+    db.init_db()
+    rows = [(f"resume_{i}.pdf", synthetic.resume_text(rng), 'pdf') for i in range(resumes)]
+    db.save_resumes(1, rows)
+    return rows
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--postings', type=int, nargs='+', default=[50, 200])
+    parser.add_argument('--resumes', type=int, default=3)
+    parser.add_argument('--latency', type=float, default=0.05)
+    parser.add_argument('--processing-s', type=float, default=1.0)
+    parser.add_argument('--batch-size', type=int, default=100)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default=os.path.join(harness.RESULTS_DIR, 'batches.json'))
+    args = parser.parse_args(argv)
+
+    harness.use_app(os.path.join(tempfile.mkdtemp(prefix='applyai-batches-'), 'init.db'))
+    quiet_streamlit()
+    from anthropic import Anthropic
+    from utils import analyze, batches, db
+    batches.BATCH_SIZE = args.batch_size
+    batches.POLL_MIN_S = 0.1
+    batches.POLL_MAX_S = 1.0
+
+    results = {}
+    print(f"{'postings':>8} {'mode':<6} {'wall s':>8} {'client s':>8} {'saved':>6} {'tokens':>9} {'cost':>9}")
+    for count in args.postings:
+        rng = synthetic.make_rng(args.seed, 'batches', count)
+        postings = [synthetic.job_posting(rng) for _ in range(count)]
+
+        resumes = seed_user(db, args.resumes, rng)
+        names = [name for name, *_ in resumes]
+        client = StubAnthropic(latency=args.latency, seed=args.seed)
+        usage = {}
+        start = time.perf_counter()
+        for posting in postings:
+            result = analyze.request_structured(client, analyze.build_prompt(resumes, posting, 'structured'),
+                                                names, usage)
+            db.save_analysis(1, posting, result, resumes)
+        wall = time.perf_counter() - start
+        tokens = usage['input_tokens'] + usage['output_tokens']
+        results[f"sync[postings={count}]"] = row = {
+            'wall_s': round(wall, 3), 'client_s': round(wall, 3), 'saved': count, 'tokens': tokens, 'cost': tokens}
+
+        seed_user(db, args.resumes, rng)
+        before = dict(batches.stats)
+        with FakeBatchesServer(processing_s=args.processing_s, seed=args.seed) as server:
+            client = Anthropic(base_url=server.url, api_key='bench')
+            start = time.perf_counter()
+            batches.queue_analyses(1, postings)
+            batches.submit_queued(client, log=lambda line: None)
+            submitted = time.perf_counter()
+            waited = []
+
+            def sleep(seconds):
+                waited.append(seconds)
+                time.sleep(seconds)
+
+            batches.poll(client, log=lambda line: None, sleep=sleep)
+            wall = time.perf_counter() - start
+        tokens = sum(batches.stats[key] - before[key] for key in ('input_tokens', 'output_tokens'))
+        results[f"batch[postings={count}]"] = batch_row = {
+            'wall_s': round(wall, 3), 'client_s': round(wall - sum(waited), 3),
+            'submit_s': round(submitted - start, 3), 'polls': server.requests['retrieve'],
+            'saved': batches.stats['succeeded'] - before['succeeded'], 'tokens': tokens, 'cost': tokens // 2}
+
+        for mode, row in (('sync', row), ('batch', batch_row)):
+            print(f"{count:>8} {mode:<6} {row['wall_s']:>8.2f} {row['client_s']:>8.2f} {row['saved']:>6} "
+                  f"{row['tokens']:>9} {row['cost']:>9}")
+
+    meta = harness.metadata(resumes=args.resumes, latency=args.latency, processing_s=args.processing_s,
+                            batch_size=args.batch_size)
+    harness.write_results({'meta': meta, 'results': results}, args.output)
+    print(f"\nresults written to {args.output}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
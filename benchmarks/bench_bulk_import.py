@@ -0,0 +1,112 @@
+"""
+Bulk resume import throughput (files/sec) from a ZIP archive.
+
+``per_file`` mimics the uploader loop: extract and ``save_resume`` one file
+at a time, one transaction each. ``bulk_inline`` streams the archive through
+``utils.bulk_import`` and saves everything with one ``executemany``;
+``bulk_pool[N]`` does the same with N extraction processes. The archive mixes
+PDF, DOCX and TXT resumes plus a few broken members to exercise per-file
+error reporting.
+
+    python -m benchmarks.bench_bulk_import --files 300 --workers 2 4
+"""
+import argparse
+import io
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+
+from . import harness, synthetic
+from .run import quiet_streamlit
+
+def build_archive(files, seed_value):
+    """ZIP of ``files`` resumes in rotating formats, plus two unreadable members"""
+    rng = synthetic.make_rng(seed_value, 'bulk-import')
+    out = io.BytesIO()
+    with zipfile.ZipFile(out, 'w', zipfile.ZIP_DEFLATED) as zf:
+        for i in range(files):
+            kind = ('pdf', 'docx', 'txt')[i % 3]
+            if kind == 'pdf':
+                data = synthetic.resume_pdf(rng, pages=2)
+            elif kind == 'docx':
+                data = synthetic.resume_docx(rng, paragraphs=60)
+            else:
+                data = synthetic.resume_text(rng, entries=4).encode('utf-8')
+            zf.writestr(f"resumes/candidate_{i:04d}.{kind}", data)
+        zf.writestr("resumes/broken.pdf", b"not a pdf")
+        zf.writestr("resumes/notes.xlsx", b"unsupported")
+    return out.getvalue()
+
+def fresh_db(db, name):
+    db.DB_PATH = os.path.join(tempfile.mkdtemp(prefix='applyai-bulk-'), name)
+    db.init_db()
+    return 1  # the seeded test user
+
+def per_file(db, bulk_import, archive_bytes):
+    """The pre-existing path: one extraction and one transaction per file"""
+    user_id = fresh_db(db, 'per_file.db')
+    saved = 0
+    with zipfile.ZipFile(io.BytesIO(archive_bytes)) as archive:
+        for info in archive.infolist():
+            name, text, error = bulk_import.extract_member(os.path.basename(info.filename), archive.read(info))
+            if error is None and db.save_resume(user_id, name, text, 'application/octet-stream'):
+                saved += 1
+    return saved
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--files', type=int, default=300)
+    parser.add_argument('--workers', type=int, nargs='+', default=[2, 4])
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default=os.path.join(harness.RESULTS_DIR, 'bulk_import.json'))
+    args = parser.parse_args(argv)
+
+    harness.use_app(os.path.join(tempfile.mkdtemp(prefix='applyai-bulk-'), 'init.db'))
+    quiet_streamlit()
+    from utils import db, bulk_import
+
+    archive_bytes = build_archive(args.files, args.seed)
+    print(f"archive: {args.files + 2} members, {len(archive_bytes) / 2 ** 20:.1f} MB, {os.cpu_count()} CPUs")
+
+    results = {}
+
+    def record(mode, elapsed, imported, errors):
+        row = {
+            'seconds': round(elapsed, 3),
+            'files_per_s': round((imported + errors) / elapsed, 1),
+            'imported': imported,
+            'errors': errors,
+        }
+        results[mode] = row
+        print(f"{mode:<14} {row['files_per_s']:>10.1f} files/s  {imported} imported, {errors} errors")
+
+    start = time.perf_counter()
+    saved = per_file(db, bulk_import, archive_bytes)
+    record('per_file', time.perf_counter() - start, saved, args.files + 2 - saved)
+
+    user_id = fresh_db(db, 'bulk_inline.db')
+    report = bulk_import.import_zip(user_id, io.BytesIO(archive_bytes), db.save_resumes)
+    record('bulk_inline', report['seconds'], len(report['imported']), len(report['errors']))
+
+    context = multiprocessing.get_context('spawn')
+    for workers in args.workers:
+        with ProcessPoolExecutor(workers, mp_context=context) as pool:
+            # Start the workers outside the timed region; the app keeps its pool warm
+            list(pool.map(abs, range(workers)))
+            user_id = fresh_db(db, f'bulk_pool_{workers}.db')
+            report = bulk_import.import_zip(user_id, io.BytesIO(archive_bytes), db.save_resumes, pool=pool)
+        record(f'bulk_pool[{workers}]', report['seconds'], len(report['imported']), len(report['errors']))
+
+    harness.write_results({
+        'meta': harness.metadata(files=args.files, cpus=os.cpu_count(), archive_bytes=len(archive_bytes)),
+        'results': results,
+    }, args.output)
+    print(f"\nresults written to {args.output}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,95 @@
+"""
+Tokens and request time spent on superseded analyses, with and without
+cancellation.
+
+Each round starts an analysis for a session, then ``--supersede-after``
+seconds later the same session starts another one with a changed posting,
+as happens when the user edits the input and clicks Analyze again
+mid-request. With ``cancel`` the second analysis cancels the first through
+``cancellation.begin`` and its stream is closed. With ``keep`` the first is
+left to finish, which is what happened before. Reports the tokens billed
+for the superseded analyses and how long their requests kept running after
+being superseded.
+
+    python -m benchmarks.bench_cancel --rounds 5 --supersede-after 1.0
+"""
+import argparse
+import os
+import sys
+import time
+
+from . import harness, synthetic
+from .run import quiet_streamlit
+from .stubs import StubAnthropic
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rounds', type=int, default=5)
+    parser.add_argument('--resumes', type=int, default=3)
+    parser.add_argument('--supersede-after', type=float, default=1.0)
+    parser.add_argument('--latency', type=float, default=0.5, help="seconds to the first byte")
+    parser.add_argument('--token-latency', type=float, default=0.005, help="seconds per output token")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default=os.path.join(harness.RESULTS_DIR, 'cancel.json'))
+    args = parser.parse_args(argv)
+
+    harness.use_app()
+    quiet_streamlit()
+    from utils import analyze, cancellation
+    from utils.errors import AnalysisCancelled
+
+    analyze.ROUTING = 'large'
+    stub = StubAnthropic(latency=args.latency, token_latency=args.token_latency, seed=args.seed)
+    analyze.get_client = lambda: stub
+    rng = synthetic.make_rng(args.seed, 'cancel')
+    resumes = [(f"resume_{i}.pdf", synthetic.resume_text(rng), 'application/pdf', None, None)
+               for i in range(args.resumes)]
+
+    results = {}
+    print(f"{'mode':<6} {'stale in tok':>13} {'stale out tok':>14} {'stale run after supersede s':>28} {'aborted':>8}")
+    for mode in ('keep', 'cancel'):
+        wasted_in = wasted_out = 0
+        overrun = []
+        aborted_before = stub.aborted
+        for i in range(args.rounds):
+            job = synthetic.job_posting(synthetic.make_rng(args.seed, 'cancel', mode, i))
+            # 'keep' gives each analysis its own session so nothing supersedes it
+            first_session = f"session-{i}" if mode == 'cancel' else f"session-{i}-first"
+            stale_usage, fresh_usage = {}, {}
+            stale_token = cancellation.begin(first_session)
+            stale = cancellation.submit(stale_usage, analyze.run_analysis, resumes, job, None, stale_usage, stale_token)
+            time.sleep(args.supersede_after)
+            superseded_at = time.perf_counter()
+            fresh_token = cancellation.begin(f"session-{i}")
+            fresh = cancellation.submit(fresh_usage, analyze.run_analysis, resumes, job + "\nRemote OK.", None,
+                                        fresh_usage, fresh_token)
+            try:
+                stale.result()
+            except AnalysisCancelled:
+                pass
+            overrun.append(time.perf_counter() - superseded_at)
+            fresh.result()
+            cancellation.finish(first_session, stale_token)
+            cancellation.finish(f"session-{i}", fresh_token)
+            wasted_in += stale_usage.get('input_tokens', 0)
+            wasted_out += stale_usage.get('output_tokens', 0)
+        row = {
+            'rounds': args.rounds,
+            'stale_input_tokens': wasted_in,
+            'stale_output_tokens': wasted_out,
+            'stale_overrun_median_s': round(sorted(overrun)[len(overrun) // 2], 3),
+            'aborted_streams': stub.aborted - aborted_before,
+        }
+        results[mode] = row
+        print(f"{mode:<6} {wasted_in:>13} {wasted_out:>14} {row['stale_overrun_median_s']:>28.2f} "
+              f"{row['aborted_streams']:>8}")
+
+    print(f"\ncancellation.stats: {cancellation.stats}")
+    meta = harness.metadata(resumes=args.resumes, supersede_after_s=args.supersede_after,
+                            latency_s=args.latency, token_latency_s=args.token_latency)
+    harness.write_results({'meta': meta, 'results': results, 'stats': dict(cancellation.stats)}, args.output)
+    print(f"results written to {args.output}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,83 @@
+"""
+Dashboard load time versus analysis history length.
+
+For each history length one user gets that many analyses of two resumes at
+``--per-week`` analyses a week, so longer histories reach further back. ``aggregates`` is what the Insights tab does:
+read ``analysis_aggregates`` and build the DataFrames. ``history`` is the
+naive alternative: load the full history, parse every analysis and group in
+pandas. Also reports how long ``rebuild_aggregates`` takes from scratch.
+
+    python -m benchmarks.bench_dashboard --analyses 10 100 1000 10000
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+from . import harness, synthetic
+from .run import quiet_streamlit
+
+RESUMES = ['resume_0.pdf', 'resume_1.pdf']
+
+def seed_history(db, count, per_week, rng):
+    """Fresh database whose test user has ``count`` analyses, newest this week"""
+    db.DB_PATH = os.path.join(tempfile.mkdtemp(prefix='applyai-dashboard-'), 'bench.db')
+    db.SHARDS = 1
+    db.WRITE_BEHIND = False
+    db.init_db()
+    job = synthetic.job_posting(rng)
+    for _ in range(count):
+        db.save_analysis(1, job, synthetic.analysis_data(rng, RESUMES))
+    with db.get_db(1) as conn:
+        conn.execute("UPDATE analysis_history SET created_at = datetime('now', (-((id - 1) / ?) * 7) || ' days')",
+                     (per_week,))
+
+def history_frame(db, load_analysis, pd, user_id):
+    """Weekly per-resume means computed from the raw history"""
+    records = []
+    for _, analysis, created_at, _ in db.get_user_analysis_history(user_id):
+        for item in load_analysis(analysis)['analyses']:
+            records.append((item['resume_name'], created_at[:10], item['match_score']))
+    frame = pd.DataFrame(records, columns=['resume', 'day', 'score'])
+    frame['week'] = pd.to_datetime(frame['day']).dt.to_period('W').dt.start_time
+    return frame.groupby(['resume', 'week'])['score'].agg(['count', 'mean', 'max'])
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--analyses', type=int, nargs='+', default=[10, 100, 1000, 10000])
+    parser.add_argument('--per-week', type=int, default=10)
+    parser.add_argument('--repeat', type=int, default=10)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default=os.path.join(harness.RESULTS_DIR, 'dashboard.json'))
+    args = parser.parse_args(argv)
+
+    harness.use_app(os.path.join(tempfile.mkdtemp(prefix='applyai-dashboard-'), 'init.db'))
+    quiet_streamlit()
+    import pandas as pd
+    from utils import db
+    from utils.parsing import load_analysis
+    from components.dashboard import load_aggregates
+
+    results = {}
+    print(f"{'analyses':>8} {'aggregates ms':>14} {'history ms':>11} {'rebuild ms':>11}")
+    for count in args.analyses:
+        seed_history(db, count, args.per_week, synthetic.make_rng(args.seed, 'dashboard', count))
+        start = time.perf_counter()
+        db.rebuild_aggregates(log=lambda message: None)
+        rebuild_ms = (time.perf_counter() - start) * 1000
+
+        aggregates = harness.measure(lambda: load_aggregates(1), repeat=args.repeat, analyses=count)
+        history = harness.measure(lambda: history_frame(db, load_analysis, pd, 1),
+                                  repeat=args.repeat, warmup=1, analyses=count)
+        results[f"aggregates[analyses={count}]"] = aggregates
+        results[f"history[analyses={count}]"] = history
+        results[f"rebuild[analyses={count}]"] = {'analyses': count, 'ms': round(rebuild_ms, 1)}
+        print(f"{count:>8} {aggregates['median_ms']:>14.2f} {history['median_ms']:>11.2f} {rebuild_ms:>11.1f}")
+
+    harness.write_results({'meta': harness.metadata(resumes=len(RESUMES), per_week=args.per_week), 'results': results}, args.output)
+    print(f"\nresults written to {args.output}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
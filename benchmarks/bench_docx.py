@@ -0,0 +1,63 @@
+"""
+DOCX text extraction: docx2txt (the old services path) versus the streaming
+``utils.file_processing.docx_text``.
+
+Reports median time and peak Python heap (tracemalloc) per document size.
+docx2txt is no longer a dependency; when it isn't installed only the new
+extractor is measured.
+
+    python -m benchmarks.bench_docx --paragraphs 500 5000 50000
+"""
+import argparse
+import io
+import os
+import sys
+import tracemalloc
+
+from . import harness, synthetic
+from .run import quiet_streamlit
+
+def peak_mb(fn):
+    tracemalloc.start()
+    try:
+        fn()
+        return round(tracemalloc.get_traced_memory()[1] / 2 ** 20, 2)
+    finally:
+        tracemalloc.stop()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--paragraphs', type=int, nargs='+', default=[500, 5000, 50000])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default=os.path.join(harness.RESULTS_DIR, 'docx.json'))
+    args = parser.parse_args(argv)
+
+    harness.use_app()
+    quiet_streamlit()
+    from utils.file_processing import docx_text
+    extractors = {'streaming': lambda data: docx_text(io.BytesIO(data))}
+    try:
+        import docx2txt
+        extractors = {'docx2txt': lambda data: docx2txt.process(io.BytesIO(data)), **extractors}
+    except ImportError:
+        print("docx2txt not installed; measuring the streaming extractor only")
+
+    results = {}
+    print(f"{'extractor':<10} {'paragraphs':>10} {'MB':>6} {'median ms':>10} {'peak heap MB':>13}")
+    for paragraphs in args.paragraphs:
+        docx = synthetic.resume_docx(synthetic.make_rng(args.seed, 'docx', paragraphs), paragraphs)
+        for name, extract in extractors.items():
+            row = harness.measure(lambda: extract(docx), repeat=args.repeat, warmup=1,
+                                  paragraphs=paragraphs, bytes=len(docx))
+            row['peak_heap_mb'] = peak_mb(lambda: extract(docx))
+            results[f"{name}[paragraphs={paragraphs}]"] = row
+            print(f"{name:<10} {paragraphs:>10} {len(docx) / 2 ** 20:>6.2f} {row['median_ms']:>10.1f} "
+                  f"{row['peak_heap_mb']:>13.2f}")
+
+    harness.write_results({'meta': harness.metadata(), 'results': results}, args.output)
+    print(f"\nresults written to {args.output}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,89 @@
+"""
+Analysis history export: time and peak Python memory by history length and
+format, against loading the whole history first.
+
+For each history length one user gets that many analyses. ``csv``,
+``jsonl`` and ``parquet`` are utils.export streaming chunks of
+``--chunk-size`` rows to a file. ``fetchall`` is the naive export that
+calls ``get_user_analysis_history`` and writes it with pandas ``to_csv``.
+Peak memory is what tracemalloc sees, so Arrow's own buffers in the
+Parquet writer aren't counted.
+
+    python -m benchmarks.bench_export --analyses 1000 10000 50000
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from . import harness, synthetic
+from .run import quiet_streamlit
+
+def seed_history(db, count, rng):
+    """Fresh database whose test user has ``count`` analyses against varied postings"""
+    db.DB_PATH = os.path.join(tempfile.mkdtemp(prefix='applyai-export-'), 'bench.db')
+    db.SHARDS = 1
+    db.WRITE_BEHIND = False
+    db.init_db()
+    with db.get_db() as conn:
+        conn.execute("INSERT OR IGNORE INTO users (id, username, password) VALUES (1, 'bench', 'x')")
+    jobs = [synthetic.job_posting(rng) for _ in range(50)]
+    for i in range(count):
+        db.save_analysis(1, jobs[i % len(jobs)], synthetic.analysis_data(rng, ['resume_0.pdf', 'resume_1.pdf']))
+
+def run(fn):
+    """(seconds, peak traced bytes, file bytes) of writing an export with ``fn(out)``"""
+    fd, path = tempfile.mkstemp(prefix='applyai-export-bench-')
+    tracemalloc.start()
+    start = time.perf_counter()
+    with os.fdopen(fd, 'wb') as out:
+        fn(out)
+    seconds = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    size = os.path.getsize(path)
+    os.remove(path)
+    return seconds, peak, size
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--analyses', type=int, nargs='+', default=[1000, 10000, 50000])
+    parser.add_argument('--chunk-size', type=int, default=1000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default=os.path.join(harness.RESULTS_DIR, 'export.json'))
+    args = parser.parse_args(argv)
+
+    harness.use_app(os.path.join(tempfile.mkdtemp(prefix='applyai-export-'), 'init.db'))
+    quiet_streamlit()
+    import pandas as pd
+    from utils import db, export
+
+    def fetchall(out):
+        frame = pd.DataFrame(db.get_user_analysis_history(1),
+                             columns=['job_post', 'analysis', 'created_at', 'resume_versions'])
+        frame.to_csv(out, index=False)
+
+    results = {}
+    print(f"{'analyses':>8} {'format':<8} {'seconds':>8} {'rows/s':>9} {'peak MB':>8} {'file MB':>8}")
+    for count in args.analyses:
+        seed_history(db, count, synthetic.make_rng(args.seed, 'export', count))
+        modes = {fmt: (lambda out, fmt=fmt: export.export_history(fmt, out, 1, args.chunk_size))
+                 for fmt in export.FORMATS}
+        modes['fetchall'] = fetchall
+        for mode, fn in modes.items():
+            seconds, peak, size = run(fn)
+            row = {'analyses': count, 'seconds': round(seconds, 3), 'rows_per_s': round(count / seconds),
+                   'peak_mb': round(peak / 2 ** 20, 2), 'file_mb': round(size / 2 ** 20, 2)}
+            results[f"{mode}[analyses={count}]"] = row
+            print(f"{count:>8} {mode:<8} {seconds:>8.2f} {row['rows_per_s']:>9} {row['peak_mb']:>8.2f} "
+                  f"{row['file_mb']:>8.2f}")
+
+    meta = harness.metadata(chunk_size=args.chunk_size)
+    harness.write_results({'meta': meta, 'results': results}, args.output)
+    print(f"\nresults written to {args.output}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,115 @@
+"""
+Analysis writes per session when the same analysis is saved again on reruns.
+
+Each of ``--sessions`` sessions analyzes one posting, then saves the same
+result again on each of ``--reruns`` reruns. That is what rendering
+results used to do, and what a retried save or a re-ingested batch still
+does. ``legacy`` runs the statements save_analysis used before analyses
+were keyed: a plain insert plus the aggregate upserts. ``keyed`` calls
+save_analysis, whose insert ignores a repeat and skips the aggregates with
+it. Reported per session: analysis rows added, rows changed in the
+database (from total_changes) and milliseconds per save.
+
+    python -m benchmarks.bench_idempotent --sessions 50 --reruns 10
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+from . import harness, synthetic
+from .run import quiet_streamlit
+
+def fresh_db(db):
+    db.DB_PATH = os.path.join(tempfile.mkdtemp(prefix='applyai-idem-'), 'bench.db')
+    db.SHARDS = 1
+    db.WRITE_BEHIND = False
+    db.init_db()
+
+def counted(db):
+    """Route db's connections through one counting wrapper; returns a function
+    giving the rows changed so far"""
+    connect = db.get_db
+    changes = [0]
+
+    class Counting:
+        def __init__(self, conn):
+            self.conn = conn
+
+        def __enter__(self):
+            self.conn.__enter__()
+            return self.conn
+
+        def __exit__(self, *exc):
+            changes[0] += self.conn.total_changes
+            result = self.conn.__exit__(*exc)
+            self.conn.close()
+            return result
+
+    db.get_db = lambda user_id=None: Counting(connect(user_id))
+    return lambda: changes[0], lambda: setattr(db, 'get_db', connect)
+
+def legacy_save(db, user_id, job_post, analysis):
+    """save_analysis's writes before analysis_key: every call inserts a row"""
+    from utils.parsing import load_analysis
+    text = db.json.dumps(analysis, ensure_ascii=False, separators=(',', ':'))
+    job_hash = db.content_hash(job_post)
+    db._write(
+        user_id,
+        ("INSERT OR IGNORE INTO job_postings (hash, content) VALUES (?, ?)", (job_hash, db.compress_text(job_post))),
+        ("INSERT INTO analysis_history (user_id, job_hash, analysis) VALUES (?, ?, ?)",
+         (user_id, job_hash, db.compress_text(text))),
+        *db._aggregate_statements(user_id, load_analysis(analysis))
+    )
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sessions', type=int, default=50)
+    parser.add_argument('--reruns', type=int, default=10)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default=os.path.join(harness.RESULTS_DIR, 'idempotent.json'))
+    args = parser.parse_args(argv)
+
+    harness.use_app(os.path.join(tempfile.mkdtemp(prefix='applyai-idem-'), 'init.db'))
+    quiet_streamlit()
+    from utils import db
+
+    modes = {
+        'legacy': lambda user_id, job, analysis: legacy_save(db, user_id, job, analysis),
+        'keyed': lambda user_id, job, analysis: db.save_analysis(user_id, job, analysis),
+    }
+    results = {}
+    print(f"{'mode':<8} {'rows/session':>12} {'changes/session':>15} {'ms/save':>8} {'aggregate count':>15}")
+    for mode, save in modes.items():
+        rng = synthetic.make_rng(args.seed, 'idempotent')
+        fresh_db(db)
+        changes, restore = counted(db)
+        samples = []
+        for session in range(args.sessions):
+            user_id = session + 1
+            job = synthetic.job_posting(rng)
+            analysis = synthetic.analysis_data(rng, ['resume_0.pdf', 'resume_1.pdf'])
+            for _ in range(args.reruns + 1):
+                start = time.perf_counter()
+                save(user_id, job, analysis)
+                samples.append((time.perf_counter() - start) * 1000)
+        total_changes = changes()
+        restore()
+        with db.get_db(1) as conn:
+            rows = sum(conn.execute("SELECT COUNT(*) FROM analysis_history").fetchone())
+            aggregated = conn.execute("SELECT SUM(analyses) FROM analysis_aggregates").fetchone()[0]
+        results[mode] = harness.summarize(samples, rows_per_session=rows / args.sessions,
+                                          changes_per_session=round(total_changes / args.sessions, 1),
+                                          aggregate_count=aggregated)
+        row = results[mode]
+        print(f"{mode:<8} {row['rows_per_session']:>12.1f} {row['changes_per_session']:>15.1f} "
+              f"{row['median_ms']:>8.2f} {aggregated:>15}")
+
+    meta = harness.metadata(sessions=args.sessions, reruns=args.reruns)
+    harness.write_results({'meta': meta, 'results': results}, args.output)
+    print(f"\nresults written to {args.output}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
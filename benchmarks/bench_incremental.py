@@ -0,0 +1,83 @@
+"""
+Re-analysis after a one-bullet resume edit: full request versus the
+incremental diff-based update.
+
+For each resume count, one structured analysis is run, then one bullet of
+the first resume is rewritten and the analysis re-run both ways. Reports
+input and output tokens (the stub's estimate, about 4 characters each) and
+latency with the stub imitating a round trip plus generation time per
+output token.
+
+    python -m benchmarks.bench_incremental --resumes 1 3 5
+"""
+import argparse
+import os
+import sys
+import time
+
+from . import harness, synthetic
+from .run import quiet_streamlit
+from .stubs import StubAnthropic
+
+def edit_one_bullet(rng, text):
+    lines = text.splitlines()
+    idx = next(i for i, line in enumerate(lines) if line.startswith('• '))
+    lines[idx] = f"• {synthetic._bullet(rng)}"
+    return "\n".join(lines)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--resumes', type=int, nargs='+', default=[1, 3, 5])
+    parser.add_argument('--latency', type=float, default=0.5, help="seconds per request")
+    parser.add_argument('--token-latency', type=float, default=0.01, help="seconds per output token")
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default=os.path.join(harness.RESULTS_DIR, 'incremental.json'))
+    args = parser.parse_args(argv)
+
+    harness.use_app()
+    quiet_streamlit()
+    from utils import analyze, incremental
+
+    stub = StubAnthropic(latency=args.latency, token_latency=args.token_latency, seed=args.seed)
+    analyze.get_client = lambda: stub
+    # One request per analysis, as measured before tiered routing
+    analyze.ROUTING = 'large'
+
+    results = {}
+    print(f"{'resumes':>7} {'mode':<12} {'in tok':>7} {'out tok':>8} {'median s':>9}")
+    for count in args.resumes:
+        rng = synthetic.make_rng(args.seed, 'incremental', count)
+        job = synthetic.job_posting(rng)
+        resumes = [(f"resume_{i}.pdf", synthetic.resume_text(rng, entries=4), 'application/pdf', None, None)
+                   for i in range(count)]
+        result = analyze.analyze_resumes_structured(resumes, job)
+        previous = {'job_content': job, 'resumes': {name: content for name, content, *_ in resumes},
+                    'result': result}
+        edited = [(resumes[0][0], edit_one_bullet(rng, resumes[0][1]), *resumes[0][2:])] + resumes[1:]
+        changed = incremental.plan_update(previous, edited, job)
+        assert changed == [resumes[0][0]], changed
+
+        runs = {
+            'full': lambda usage: analyze.analyze_resumes_structured(edited, job, usage=usage),
+            'incremental': lambda usage: incremental.reanalyze(previous, edited, changed, job, usage),
+        }
+        for mode, run in runs.items():
+            samples, usage = [], {}
+            for _ in range(args.repeat):
+                usage = {}
+                start = time.perf_counter()
+                run(usage)
+                samples.append((time.perf_counter() - start) * 1000)
+            row = harness.summarize(samples, resumes=count, **usage)
+            results[f"{mode}[resumes={count}]"] = row
+            print(f"{count:>7} {mode:<12} {usage['input_tokens']:>7} {usage['output_tokens']:>8} "
+                  f"{row['median_ms'] / 1000:>9.2f}")
+
+    meta = harness.metadata(latency_s=args.latency, token_latency_s=args.token_latency)
+    harness.write_results({'meta': meta, 'results': results}, args.output)
+    print(f"\nresults written to {args.output}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
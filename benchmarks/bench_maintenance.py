@@ -0,0 +1,112 @@
+"""
+Database maintenance: space reclaimed by retention and incremental vacuum,
+and how long it holds up writers, against a full VACUUM.
+
+Each history length seeds one user with that many analyses spread evenly
+over the last two years, then deletes everything older than
+``--retention-days``. ``incremental`` is utils.maintenance.run_maintenance;
+``full-vacuum`` deletes the same rows in one statement and runs VACUUM. A
+second thread saves an analysis every 20 ms throughout; its p99 and max
+latency show how long maintenance blocked a user.
+
+    python -m benchmarks.bench_maintenance --analyses 5000 20000
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+from . import harness, synthetic
+from .run import quiet_streamlit
+
+def seed_history(db, count, rng):
+    """Fresh database whose test user has ``count`` analyses over two years"""
+    db.DB_PATH = os.path.join(tempfile.mkdtemp(prefix='applyai-maint-'), 'bench.db')
+    db.SHARDS = 1
+    db.WRITE_BEHIND = False
+    db.init_db()
+    with db.get_db() as conn:
+        conn.execute("INSERT OR IGNORE INTO users (id, username, password) VALUES (1, 'bench', 'x')")
+    jobs = [synthetic.job_posting(rng) for _ in range(200)]
+    for i in range(count):
+        db.save_analysis(1, jobs[i % len(jobs)], synthetic.analysis_data(rng, ['resume_0.pdf', 'resume_1.pdf']))
+    with db.get_db() as conn:
+        conn.execute("UPDATE analysis_history SET created_at = datetime('now', '-' || ((? - id) * 730 / ?) || ' days')",
+                     (count, count))
+
+def with_writer(db, rng, fn):
+    """Run ``fn()`` while another thread keeps saving analyses; returns
+    (fn's result, seconds, writer latencies in ms)"""
+    job = synthetic.job_posting(rng)
+    analysis = synthetic.analysis_data(rng, ['resume_0.pdf'])
+    latencies, stop = [], threading.Event()
+
+    def write():
+        while not stop.wait(0.02):
+            start = time.perf_counter()
+            db.save_analysis(1, job, analysis)
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    writer = threading.Thread(target=write, daemon=True)
+    writer.start()
+    start = time.perf_counter()
+    result = fn()
+    seconds = time.perf_counter() - start
+    stop.set()
+    writer.join()
+    return result, seconds, latencies
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--analyses', type=int, nargs='+', default=[5000, 20000])
+    parser.add_argument('--retention-days', type=int, default=180)
+    parser.add_argument('--vacuum-seconds', type=float, default=30)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default=os.path.join(harness.RESULTS_DIR, 'maintenance.json'))
+    args = parser.parse_args(argv)
+
+    harness.use_app(os.path.join(tempfile.mkdtemp(prefix='applyai-maint-'), 'init.db'))
+    quiet_streamlit()
+    from utils import db, maintenance
+    maintenance.RETENTION_DAYS = args.retention_days
+
+    def incremental():
+        report, = maintenance.run_maintenance(vacuum_seconds=args.vacuum_seconds, log=lambda line: None)
+        return report['analyses_deleted']
+
+    def full_vacuum():
+        with db.get_db(1) as conn:
+            deleted = conn.execute("DELETE FROM analysis_history WHERE created_at < datetime('now', ?)",
+                                   (f"-{args.retention_days} days",)).rowcount
+        conn = db.get_db(1)
+        conn.execute("VACUUM")
+        conn.close()
+        return deleted
+
+    results = {}
+    print(f"{'analyses':>8} {'mode':<12} {'deleted':>8} {'seconds':>8} {'MB before':>9} {'MB after':>9} "
+          f"{'write p99':>9} {'write max':>9}")
+    for count in args.analyses:
+        for mode, fn in (('incremental', incremental), ('full-vacuum', full_vacuum)):
+            rng = synthetic.make_rng(args.seed, 'maintenance', count)
+            seed_history(db, count, rng)
+            before = os.path.getsize(db.DB_PATH)
+            deleted, seconds, latencies = with_writer(db, rng, fn)
+            after = os.path.getsize(db.DB_PATH)
+            row = {'analyses': count, 'deleted': deleted, 'seconds': round(seconds, 3),
+                   'mb_before': round(before / 2 ** 20, 2), 'mb_after': round(after / 2 ** 20, 2),
+                   'writes': harness.summarize(latencies) if latencies else None}
+            results[f"{mode}[analyses={count}]"] = row
+            p99 = harness.percentile(latencies, 99) if latencies else 0
+            print(f"{count:>8} {mode:<12} {deleted:>8} {seconds:>8.2f} {row['mb_before']:>9.2f} "
+                  f"{row['mb_after']:>9.2f} {p99:>9.1f} {max(latencies, default=0):>9.1f}")
+
+    meta = harness.metadata(retention_days=args.retention_days, vacuum_seconds=args.vacuum_seconds)
+    harness.write_results({'meta': meta, 'results': results}, args.output)
+    print(f"\nresults written to {args.output}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,98 @@
+"""
+Peak memory and time of PDF text extraction, old path versus streaming path.
+
+Each variant runs in a fresh process holding the PDF the way Streamlit holds
+an upload (an in-memory BytesIO). Peak RSS above that starting point is what
+extraction itself costs. ``legacy`` is the extractor as it was before: it
+copies the upload with ``getvalue()`` into another BytesIO and builds the
+text with ``+=``. ``streaming`` is ``utils.file_processing.pdf_text`` on the
+upload, and ``streaming_file`` is the same on a file on disk. Pages carry an
+embedded image by default, since that is what makes real resumes large.
+
+    python -m benchmarks.bench_pdf_memory --pages 200 --image-kb 100
+"""
+import argparse
+import io
+import multiprocessing
+import os
+import resource
+import sys
+import tempfile
+import time
+
+from . import harness, synthetic
+
+VARIANTS = ('legacy', 'streaming', 'streaming_file')
+
+def _legacy(upload):
+    import PyPDF2
+    reader = PyPDF2.PdfReader(io.BytesIO(upload.getvalue()))
+    text = ""
+    for page in reader.pages:
+        text += page.extract_text() + "\n"
+    return text
+
+def _peak_kb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+def _run_variant(variant, path):
+    harness.use_app()
+    from .run import quiet_streamlit
+    quiet_streamlit()
+    from utils import file_processing
+
+    with open(path, 'rb') as f:
+        upload = io.BytesIO(f.read())
+    start_kb = _peak_kb()
+    start = time.perf_counter()
+    try:
+        if variant == 'legacy':
+            text = _legacy(upload)
+        elif variant == 'streaming':
+            text = file_processing.pdf_text(upload)
+        else:
+            text = file_processing.pdf_text(path)
+    except Exception as e:
+        # Exception classes from utils can't be unpickled in the parent
+        raise RuntimeError(f"{type(e).__name__}: {e}") from None
+    elapsed = time.perf_counter() - start
+    return {
+        'seconds': round(elapsed, 3),
+        'peak_rss_mb': round(_peak_kb() / 1024, 1),
+        'extraction_rss_mb': round((_peak_kb() - start_kb) / 1024, 1),
+        'chars': len(text),
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--pages', type=int, default=200)
+    parser.add_argument('--image-kb', type=int, default=100, help="embedded image per page, 0 for text only")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default=os.path.join(harness.RESULTS_DIR, 'pdf_memory.json'))
+    args = parser.parse_args(argv)
+
+    pdf = synthetic.resume_pdf(synthetic.make_rng(args.seed, 'pdf-memory', args.pages), args.pages,
+                               image_bytes=args.image_kb * 1024)
+    path = os.path.join(tempfile.mkdtemp(prefix='applyai-pdf-'), 'resume.pdf')
+    with open(path, 'wb') as f:
+        f.write(pdf)
+    print(f"{args.pages}-page PDF, {args.image_kb} KB image per page, {len(pdf) / 2 ** 20:.2f} MB")
+
+    results = {}
+    context = multiprocessing.get_context('spawn')
+    for variant in VARIANTS:
+        # One process per variant so each peak RSS starts clean
+        with context.Pool(1) as pool:
+            row = pool.apply(_run_variant, (variant, path))
+        results[variant] = row
+        print(f"{variant:<15} {row['seconds']:>7.2f}s  peak RSS {row['peak_rss_mb']:>6.1f} MB  "
+              f"(+{row['extraction_rss_mb']} MB during extraction)")
+
+    meta = harness.metadata(pages=args.pages, image_kb=args.image_kb, pdf_bytes=len(pdf))
+    harness.write_results({'meta': meta, 'results': results}, args.output)
+    os.remove(path)
+    print(f"\nresults written to {args.output}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
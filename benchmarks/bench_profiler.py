@@ -0,0 +1,67 @@
+"""
+Rerun time of the logged-in app with and without the rerun profiler, per
+sampling interval.
+
+One AppTest session reruns the page ``--reruns`` times with profiling off,
+then on at each ``--intervals`` value. Profiles go to a temporary
+directory. Reports the median rerun time and the samples per profile.
+
+    python -m benchmarks.bench_profiler --reruns 30 --intervals 1 5 20
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+from . import harness
+from .run import quiet_streamlit
+
+MAIN_SCRIPT = os.path.join(harness.APP_DIR, 'main.py')
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--reruns', type=int, default=30)
+    parser.add_argument('--intervals', type=float, nargs='+', default=[1, 5, 20], help="milliseconds")
+    parser.add_argument('--output', default=os.path.join(harness.RESULTS_DIR, 'profiler.json'))
+    args = parser.parse_args(argv)
+
+    workdir = tempfile.mkdtemp(prefix='applyai-profiler-')
+    harness.use_app(os.path.join(workdir, 'bench.db'))
+    os.environ['APPLYAI_PROFILE_DIR'] = os.path.join(workdir, 'profiles')
+    quiet_streamlit()
+    from streamlit.testing.v1 import AppTest
+    from utils import profiler
+
+    at = AppTest.from_file(MAIN_SCRIPT, default_timeout=60)
+    at.session_state.user_id = 1
+    at.run()
+
+    results = {}
+    print(f"{'profiling':<10} {'median rerun ms':>16} {'samples/profile':>16}")
+    for interval in [None] + args.intervals:
+        if interval is not None:
+            profiler.SAMPLE_INTERVAL = interval / 1000
+        at.session_state.profile_session = interval is not None
+        profiles_before, samples_before = profiler.stats['profiles'], profiler.stats['samples']
+        samples = []
+        for _ in range(args.reruns):
+            start = time.perf_counter()
+            at.run()
+            samples.append((time.perf_counter() - start) * 1000)
+        profiles = profiler.stats['profiles'] - profiles_before
+        per_profile = (profiler.stats['samples'] - samples_before) / profiles if profiles else 0
+        name = 'off' if interval is None else f"{interval:g} ms"
+        row = harness.summarize(samples, samples_per_profile=round(per_profile, 1))
+        results[name] = row
+        print(f"{name:<10} {row['median_ms']:>16.1f} {per_profile:>16.1f}")
+
+    baseline = results['off']['median_ms']
+    for name, row in results.items():
+        row['overhead'] = round(row['median_ms'] / baseline - 1, 3)
+    harness.write_results({'meta': harness.metadata(reruns=args.reruns), 'results': results}, args.output)
+    print(f"\nresults written to {args.output}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,82 @@
+"""
+End-to-end structured analysis latency with every resume on the large model
+versus tiered routing (fast model first, escalating the best resumes and
+low-confidence results).
+
+The stub client imitates each tier with a fixed round trip plus time per
+output token (``--fast`` and ``--large``, both "SECONDS,SECONDS_PER_TOKEN")
+and marks ``--low-confidence`` of the fast results low confidence. Reports
+p50 latency, tokens per tier and the escalation rate per resume count.
+
+    python -m benchmarks.bench_routing --resumes 1 3 5 8
+"""
+import argparse
+import os
+import sys
+
+from . import harness, synthetic
+from .run import quiet_streamlit
+from .stubs import StubAnthropic
+
+def _latency(value):
+    latency, per_token = value.split(',')
+    return float(latency), float(per_token)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--resumes', type=int, nargs='+', default=[1, 3, 5, 8])
+    parser.add_argument('--fast', type=_latency, default='0.3,0.004')
+    parser.add_argument('--large', type=_latency, default='1.0,0.02')
+    parser.add_argument('--low-confidence', type=float, default=0.1)
+    parser.add_argument('--escalate-top', type=int, default=1)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default=os.path.join(harness.RESULTS_DIR, 'routing.json'))
+    args = parser.parse_args(argv)
+
+    harness.use_app()
+    quiet_streamlit()
+    from utils import analyze
+
+    analyze.ESCALATE_TOP = args.escalate_top
+    stub = StubAnthropic(seed=args.seed, low_confidence=args.low_confidence,
+                         model_latency={analyze.MODELS['fast']: args.fast, analyze.MODELS['large']: args.large})
+    analyze.get_client = lambda: stub
+
+    results = {}
+    print(f"{'resumes':>7} {'routing':<7} {'p50 s':>6} {'fast in/out tok':>16} {'large in/out tok':>17} {'escalated':>10}")
+    for count in args.resumes:
+        rng = synthetic.make_rng(args.seed, 'routing', count)
+        job = synthetic.job_posting(rng)
+        resumes = [(f"resume_{i}.pdf", synthetic.resume_text(rng), 'application/pdf', None, None)
+                   for i in range(count)]
+        for routing in ('large', 'tiered'):
+            analyze.ROUTING = routing
+            usages = []
+
+            def run():
+                usage = {}
+                analyze.analyze_resumes_structured(resumes, job, usage=usage)
+                usages.append(usage)
+
+            row = harness.measure(run, repeat=args.repeat, warmup=0, resumes=count, routing=routing)
+            for tier in analyze.MODELS:
+                for key in ('input_tokens', 'output_tokens'):
+                    row[f"{tier}_{key}"] = round(
+                        sum(u.get('tiers', {}).get(tier, {}).get(key, 0) for u in usages) / len(usages))
+            row['escalated'] = round(sum(u.get('escalated', 0) for u in usages) / len(usages), 2)
+            results[f"{routing}[resumes={count}]"] = row
+            print(f"{count:>7} {routing:<7} {row['median_ms'] / 1000:>6.2f} "
+                  f"{row['fast_input_tokens']:>8}/{row['fast_output_tokens']:<7} "
+                  f"{row['large_input_tokens']:>8}/{row['large_output_tokens']:<8} {row['escalated']:>10}")
+
+    summary = analyze.routing_summary()
+    print(f"\nescalation rate {summary['escalation_rate']:.0%} of routed resumes")
+    meta = harness.metadata(fast=args.fast, large=args.large, low_confidence=args.low_confidence,
+                            escalate_top=args.escalate_top)
+    harness.write_results({'meta': meta, 'results': results, 'routing': summary}, args.output)
+    print(f"results written to {args.output}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
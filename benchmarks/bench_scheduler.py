@@ -0,0 +1,125 @@
+"""
+Light users' analysis latency while a heavy user floods the API.
+
+``--light`` users each run ``--analyses`` structured analyses one after
+another, ``--think`` seconds apart. Meanwhile one heavy user keeps
+``--heavy-tabs`` analyses of ``--heavy-resumes`` resumes running until
+the light users are done, as several tabs would. Every request goes
+through utils.analyze and the real Anthropic client on SyntheticTransport
+(``--latency`` seconds plus ``--token-ms`` per output token), and through
+a FairScheduler of ``--concurrency`` slots:
+
+- ``alone``: the light users with nobody else, as the baseline.
+- ``fifo``: every request queued first come, first served under the cap,
+  which is what a plain semaphore in front of the API would do.
+- ``fair``: weighted fair queuing by user, with ``--user-inflight``
+  requests per user.
+
+Reported: light users' per-analysis p50/p95/p99, the heavy user's
+analyses per second and the scheduler's own p95 wait for a slot.
+
+    python -m benchmarks.bench_scheduler --light 4 --heavy-tabs 12
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from . import harness, synthetic
+from .run import quiet_streamlit
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--light', type=int, default=4)
+    parser.add_argument('--analyses', type=int, default=10)
+    parser.add_argument('--think', type=float, default=0.2)
+    parser.add_argument('--heavy-tabs', type=int, default=12)
+    parser.add_argument('--heavy-resumes', type=int, default=10)
+    parser.add_argument('--concurrency', type=int, default=4)
+    parser.add_argument('--user-inflight', type=int, default=2)
+    parser.add_argument('--tpm', type=int, default=0)
+    parser.add_argument('--latency', type=float, default=0.3)
+    parser.add_argument('--token-ms', type=float, default=0.5)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default=os.path.join(harness.RESULTS_DIR, 'scheduler.json'))
+    args = parser.parse_args(argv)
+
+    harness.use_app(os.path.join(tempfile.mkdtemp(prefix='applyai-scheduler-'), 'bench.db'))
+    quiet_streamlit()
+    from anthropic import Anthropic, DefaultHttpxClient
+    from utils import analyze, cancellation, llm_transport, scheduler
+
+    rng = synthetic.make_rng(args.seed, 'scheduler')
+    light_resumes = [(f"resume_{i}.pdf", synthetic.resume_text(rng)) for i in range(2)]
+    heavy_resumes = [(f"resume_{i}.pdf", synthetic.resume_text(rng)) for i in range(args.heavy_resumes)]
+    postings = [synthetic.job_posting(rng) for _ in range(20)]
+    transport = llm_transport.SyntheticTransport(600, args.latency, args.token_ms / 1000)
+    analyze.get_client = lambda: Anthropic(api_key='bench', http_client=DefaultHttpxClient(transport=transport))
+
+    def analyze_once(user, resumes, n):
+        token = cancellation.CancelToken(300, user)
+        start = time.perf_counter()
+        try:
+            analyze.run_analysis(resumes, postings[n % len(postings)], usage={}, token=token)
+        finally:
+            token.close()
+        return (time.perf_counter() - start) * 1000
+
+    def light_user(user, queue_by_user):
+        samples = []
+        for n in range(args.analyses):
+            samples.append(analyze_once(user if queue_by_user else None, light_resumes, n))
+            time.sleep(args.think)
+        return samples
+
+    modes = {'alone': (False, True), 'fifo': (True, False), 'fair': (True, True)}
+    results = {}
+    print(f"{'mode':<6} {'light p50':>10} {'light p95':>10} {'light p99':>10} {'heavy/s':>8} {'wait p95':>9}")
+    for mode, (heavy, fair) in modes.items():
+        scheduler._scheduler = scheduler.FairScheduler(
+            args.concurrency, args.tpm, args.user_inflight if fair else args.concurrency, weights={})
+        done = threading.Event()
+        heavy_done = []
+
+        def heavy_tab(tab):
+            n = tab
+            while not done.is_set():
+                analyze_once('heavy' if fair else None, heavy_resumes, n)
+                heavy_done.append(time.perf_counter())
+                n += args.heavy_tabs
+
+        with ThreadPoolExecutor(args.heavy_tabs) as heavy_pool:
+            tabs = [heavy_pool.submit(heavy_tab, tab) for tab in range(args.heavy_tabs)] if heavy else []
+            # Let the heavy user fill the queue first
+            time.sleep(1.0 if heavy else 0)
+            start = time.perf_counter()
+            with ThreadPoolExecutor(args.light) as light_pool:
+                samples = [s for user_samples in light_pool.map(
+                    lambda user: light_user(user, fair), range(1, args.light + 1)) for s in user_samples]
+            wall = time.perf_counter() - start
+            done.set()
+            for tab in tabs:
+                tab.result()
+        heavy_rate = sum(1 for t in heavy_done if start <= t <= start + wall) / wall
+        queue = scheduler._scheduler.summary()
+        results[mode] = harness.summarize(samples, p99_ms=round(harness.percentile(samples, 99), 4),
+                                          heavy_per_s=round(heavy_rate, 2),
+                                          wait_p95_s=round(queue['wait_p95_s'] or 0, 3),
+                                          max_depth=queue['max_depth'])
+        row = results[mode]
+        print(f"{mode:<6} {row['median_ms']:>10.0f} {row['p95_ms']:>10.0f} {row['p99_ms']:>10.0f} "
+              f"{row['heavy_per_s']:>8.2f} {row['wait_p95_s']:>9.2f}")
+
+    meta = harness.metadata(light=args.light, analyses=args.analyses, think=args.think,
+                            heavy_tabs=args.heavy_tabs, heavy_resumes=args.heavy_resumes,
+                            concurrency=args.concurrency, user_inflight=args.user_inflight, tpm=args.tpm,
+                            latency=args.latency, token_ms=args.token_ms)
+    harness.write_results({'meta': meta, 'results': results}, args.output)
+    print(f"\nresults written to {args.output}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
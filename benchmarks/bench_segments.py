@@ -0,0 +1,74 @@
+"""
+Input tokens per analysis with whole resumes in the prompt versus only the
+sections relevant to the posting, plus what segmentation costs at ingest.
+
+For each experience length, ``--resumes`` resumes are saved (segmenting
+them) and analyzed once per mode through the stub client, which counts
+about 4 characters per input token. ``full`` quotes every resume in full,
+as before; ``sections`` builds the prompt from the stored segments the way
+the Analyze button does.
+
+    python -m benchmarks.bench_segments --entries 3 6 10 --resumes 3
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+from . import harness, synthetic
+from .run import quiet_streamlit
+from .stubs import StubAnthropic
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--entries', type=int, nargs='+', default=[3, 6, 10])
+    parser.add_argument('--resumes', type=int, default=3)
+    parser.add_argument('--postings', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default=os.path.join(harness.RESULTS_DIR, 'segments.json'))
+    args = parser.parse_args(argv)
+
+    harness.use_app(os.path.join(tempfile.mkdtemp(prefix='applyai-segments-'), 'bench.db'))
+    quiet_streamlit()
+    from utils import analyze, db, segments, warmup
+
+    stub = StubAnthropic(latency=0, seed=args.seed)
+    analyze.get_client = lambda: stub
+    analyze.ROUTING = 'large'
+
+    results = {}
+    print(f"{'entries':>7} {'mode':<9} {'in tok':>7} {'segment ms':>11}")
+    for user_id, entries in enumerate(args.entries, start=1):
+        rng = synthetic.make_rng(args.seed, 'segments', entries)
+        texts = [synthetic.resume_text(rng, entries=entries) for _ in range(args.resumes)]
+        start = time.perf_counter()
+        for text in texts:
+            segments.segment_resume(text)
+        segment_ms = (time.perf_counter() - start) * 1000 / len(texts)
+        for i, text in enumerate(texts):
+            db.save_resume(user_id, f"resume_{i}.pdf", text, 'application/pdf')
+        resumes = db.get_user_resumes(user_id)
+        postings = [synthetic.job_posting(rng) for _ in range(args.postings)]
+
+        for mode, select in (('full', False), ('sections', True)):
+            analyze.SELECT_SECTIONS = select
+            tokens = []
+            for job in postings:
+                usage = {}
+                prepared = warmup.prepare(job, resumes, 'structured', user_id)
+                analyze.analyze_resumes_structured(resumes, prepared['job_content'], prepared['prompt'], usage)
+                tokens.append(usage['input_tokens'])
+            row = {'entries': entries, 'resumes': args.resumes, 'input_tokens': round(sum(tokens) / len(tokens)),
+                   'segment_ms_per_resume': round(segment_ms, 3)}
+            results[f"{mode}[entries={entries}]"] = row
+            print(f"{entries:>7} {mode:<9} {row['input_tokens']:>7} {segment_ms:>11.2f}")
+
+    meta = harness.metadata(resumes=args.resumes, postings=args.postings,
+                            max_full_entries=segments.MAX_FULL_ENTRIES)
+    harness.write_results({'meta': meta, 'results': results}, args.output)
+    print(f"\nresults written to {args.output}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,118 @@
+"""
+Memory held for resume text across many sessions: full text in each
+session's state (as before) versus content hashes in session state with the
+text in the shared, size-bounded ``resume_texts`` cache.
+
+Each of ``--users`` users has ``--resumes`` resumes (``--entries`` jobs
+each) open in ``--tabs`` browser tabs, one resume open in the editor and
+one analysis kept for incremental re-analysis. Every tab gets its own copy
+of each text, as it does when the text arrives through an upload or a text
+area. Reports the bytes retained (tracemalloc) in total and per session,
+and the cache's hit rate when the texts are read back once per tab.
+
+    python -m benchmarks.bench_session_memory --users 50 --tabs 2 --cache-mb 4
+"""
+import argparse
+import gc
+import os
+import sys
+import tracemalloc
+
+from . import harness, synthetic
+
+def _copy(text):
+    return text.encode('utf-8').decode('utf-8')
+
+def old_session(resumes):
+    """Session state as it was: text per resume, editor copy and analysis texts"""
+    files = {name: {'text': _copy(text), 'file_type': 'application/pdf'} for name, text in resumes}
+    first = resumes[0][0]
+    return {
+        'processed_files': files,
+        f'editing_{first}': True,
+        f'editor_{first}': _copy(files[first]['text']),
+        'last_analysis': {'resumes': {name: data['text'] for name, data in files.items()}},
+    }
+
+def new_session(resumes, cache, content_hash):
+    """Session state now: hashes only, text put in the shared cache"""
+    files = {}
+    for name, text in resumes:
+        text = _copy(text)
+        key = content_hash(text)
+        cache.put(key, text)
+        files[name] = {'hash': key, 'file_type': 'application/pdf'}
+    return {
+        'processed_files': files,
+        'last_analysis': {'resumes': {name: data['hash'] for name, data in files.items()}},
+    }
+
+def retained(build):
+    """Bytes still allocated after ``build()``, and its result"""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = build()
+    gc.collect()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return after - before, result
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=50)
+    parser.add_argument('--tabs', type=int, default=2)
+    parser.add_argument('--resumes', type=int, default=5)
+    parser.add_argument('--entries', type=int, default=6)
+    parser.add_argument('--cache-mb', type=float, default=4)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default=os.path.join(harness.RESULTS_DIR, 'session_memory.json'))
+    args = parser.parse_args(argv)
+
+    harness.use_app()
+    from utils.text_cache import TextCache, content_hash
+
+    users = []
+    for u in range(args.users):
+        rng = synthetic.make_rng(args.seed, 'session-memory', u)
+        users.append([(f"resume_{i}.pdf", synthetic.resume_text(rng, entries=args.entries))
+                      for i in range(args.resumes)])
+    sessions = args.users * args.tabs
+    text_bytes = sum(len(text.encode('utf-8')) for resumes in users for _, text in resumes)
+
+    old_bytes, _ = retained(lambda: [old_session(resumes) for resumes in users for _ in range(args.tabs)])
+    cache = TextCache(int(args.cache_mb * 2 ** 20))
+    new_bytes, states = retained(
+        lambda: [new_session(resumes, cache, content_hash) for resumes in users for _ in range(args.tabs)])
+    cache_bytes = cache.usage()['bytes']
+
+    # Each tab reads its texts back once, e.g. to open an editor or re-analyze
+    cache.stats.update(hits=0, misses=0)
+    for state in states:
+        for data in state['processed_files'].values():
+            cache.get(data['hash'])
+    usage = cache.usage()
+    lookups = usage['hits'] + usage['misses']
+
+    results = {
+        'old': {'retained_bytes': old_bytes, 'per_session_bytes': old_bytes // sessions},
+        'new': {'retained_bytes': new_bytes, 'per_session_bytes': (new_bytes - cache_bytes) // sessions,
+                'cache_bytes': cache_bytes, 'cache_hit_rate': round(usage['hits'] / lookups, 3)},
+    }
+    print(f"{sessions} sessions, {args.users} users x {args.resumes} resumes, "
+          f"{text_bytes / 2 ** 20:.2f} MB of distinct resume text")
+    print(f"{'layout':<6} {'retained MB':>12} {'per session KB':>15}")
+    print(f"{'old':<6} {old_bytes / 2 ** 20:>12.2f} {results['old']['per_session_bytes'] / 1024:>15.1f}")
+    print(f"{'new':<6} {new_bytes / 2 ** 20:>12.2f} {results['new']['per_session_bytes'] / 1024:>15.1f}"
+          f"   (+ {cache_bytes / 2 ** 20:.2f} MB shared cache, limit {args.cache_mb} MB)")
+    print(f"cache hit rate on read-back {results['new']['cache_hit_rate']:.0%}, "
+          f"{usage['evictions']} evictions (misses reload from the database)")
+
+    meta = harness.metadata(users=args.users, tabs=args.tabs, resumes=args.resumes, entries=args.entries,
+                            cache_mb=args.cache_mb)
+    harness.write_results({'meta': meta, 'results': results}, args.output)
+    print(f"results written to {args.output}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
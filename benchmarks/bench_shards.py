@@ -0,0 +1,97 @@
+"""
+Write throughput with users sharded across N SQLite files.
+
+Each of ``--threads`` workers (a stand-in for a concurrent session, one user
+each) saves ``--writes`` analyses and resumes with the default per-call
+commits. With one shard every commit takes the same file lock; with N
+shards the users spread over N files and their commits proceed in parallel.
+Throughput counts until every worker has finished.
+
+    python -m benchmarks.bench_shards --shards 1 2 4 8 --threads 16
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+from . import harness, synthetic
+from .run import quiet_streamlit
+
+def run_shards(db, shards, threads, writes, payloads):
+    db.DB_PATH = os.path.join(tempfile.mkdtemp(prefix='applyai-shards-'), 'bench.db')
+    db.SHARDS = shards
+    db.WRITE_BEHIND = False
+    db.init_db()
+    with db.get_db() as conn:
+        conn.executemany("INSERT INTO users (username, password) VALUES (?, ?)",
+                         ((f"shard{i}", 'password') for i in range(threads)))
+        user_ids = [row[0] for row in conn.execute("SELECT id FROM users WHERE username LIKE 'shard%' ORDER BY id")]
+
+    latencies = [[] for _ in range(threads)]
+    failures = [0] * threads
+    barrier = threading.Barrier(threads + 1)
+
+    def worker(n):
+        uid = user_ids[n]
+        job, analysis, resume = payloads
+        barrier.wait()
+        for i in range(writes):
+            start = time.perf_counter()
+            if i % 4 == 3:
+                ok = db.save_resume(uid, f"resume_{i % 3}.pdf", resume, 'application/pdf')
+            else:
+                ok = db.save_analysis(uid, job, analysis)
+            latencies[n].append((time.perf_counter() - start) * 1000)
+            failures[n] += not ok
+
+    workers = [threading.Thread(target=worker, args=(n,)) for n in range(threads)]
+    for t in workers:
+        t.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for t in workers:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    samples = [ms for per_thread in latencies for ms in per_thread]
+    total = threads * writes
+    used = len({db.shard_for(uid) for uid in user_ids})
+    row = harness.summarize(samples, shards=shards, shards_used=used, threads=threads, writes=total,
+                            failed=sum(failures), writes_per_s=round(total / elapsed, 1),
+                            elapsed_s=round(elapsed, 3))
+    row['p99_ms'] = round(harness.percentile(samples, 99), 4)
+    return row
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--shards', type=int, nargs='+', default=[1, 2, 4, 8])
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--writes', type=int, default=100, help="writes per thread")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default=os.path.join(harness.RESULTS_DIR, 'shards.json'))
+    args = parser.parse_args(argv)
+
+    harness.use_app(os.path.join(tempfile.mkdtemp(prefix='applyai-shards-'), 'init.db'))
+    quiet_streamlit()
+    from utils import db
+
+    rng = synthetic.make_rng(args.seed, 'shards')
+    payloads = (synthetic.job_posting(rng), synthetic.analysis_text(rng, ['resume_0.pdf']), synthetic.resume_text(rng))
+
+    results = {}
+    print(f"{'shards':>6} {'used':>5} {'threads':>7} {'writes/s':>10} {'call p50 ms':>12} {'call p99 ms':>12} {'failed':>7}")
+    for shards in args.shards:
+        row = run_shards(db, shards, args.threads, args.writes, payloads)
+        results[f"shards={shards}"] = row
+        print(f"{shards:>6} {row['shards_used']:>5} {args.threads:>7} {row['writes_per_s']:>10.1f} "
+              f"{row['median_ms']:>12.3f} {row['p99_ms']:>12.3f} {row['failed']:>7}")
+
+    meta = harness.metadata(threads=args.threads, writes_per_thread=args.writes, cpus=os.cpu_count())
+    harness.write_results({'meta': meta, 'results': results}, args.output)
+    print(f"\nresults written to {args.output}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,118 @@
+"""
+Database size and history read latency before and after moving analyses to
+deduplicated, compressed storage (``utils.db.migrate_analysis_storage``).
+
+Works on a copy of the seeded benchmark database, whose rows are written in
+the legacy layout (raw ``job_post`` and ``analysis`` text on every row).
+Reads are timed warm and, where the OS page cache can be dropped, cold.
+
+    python -m benchmarks.bench_storage --scale 1
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+from . import harness, seed, synthetic
+from .run import quiet_streamlit
+
+def drop_page_cache():
+    """Evict the OS page cache (Linux, root only); returns False when not permitted"""
+    try:
+        os.sync()
+        with open('/proc/sys/vm/drop_caches', 'w') as f:
+            f.write('3\n')
+        return True
+    except OSError:
+        return False
+
+def measure_reads(db, users, repeat, seed_value, cold=False):
+    rng = synthetic.make_rng(seed_value, 'storage-reads')
+    user_ids = [rng.randint(2, users + 1) for _ in range(repeat + 2)]
+
+    def read(uid):
+        db.get_user_analysis_history(uid)
+
+    if not cold:
+        return harness.measure(read, repeat=repeat, args_for=lambda i: (user_ids[i],))
+    samples = []
+    for uid in user_ids[:repeat]:
+        drop_page_cache()
+        start = time.perf_counter()
+        read(uid)
+        samples.append((time.perf_counter() - start) * 1000)
+    return harness.summarize(samples)
+
+def snapshot(db, path, users, args):
+    with db.get_db() as conn:
+        page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+        pages = conn.execute("PRAGMA page_count").fetchone()[0]
+    result = {
+        'file_mb': round(os.path.getsize(path) / 2 ** 20, 1),
+        'pages': pages,
+        'page_size': page_size,
+        'history_read_warm': measure_reads(db, users, args.repeat, args.seed),
+    }
+    if drop_page_cache():
+        result['history_read_cold'] = measure_reads(db, users, args.cold_repeat, args.seed, cold=True)
+    return result
+
+def describe(label, snap):
+    line = f"{label} {snap['file_mb']} MB, history read median warm {snap['history_read_warm']['median_ms']} ms"
+    if 'history_read_cold' in snap:
+        line += f", cold {snap['history_read_cold']['median_ms']} ms"
+    print(line)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scale', type=float, default=1.0)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=200)
+    parser.add_argument('--cold-repeat', type=int, default=20,
+                        help="reads after dropping the OS page cache (needs root on Linux; skipped otherwise)")
+    parser.add_argument('--output', default=os.path.join(harness.RESULTS_DIR, 'storage.json'))
+    args = parser.parse_args(argv)
+
+    source = seed.seed_database(args.scale, args.seed)
+    path = os.path.join(tempfile.mkdtemp(prefix='applyai-storage-'), 'storage.db')
+    shutil.copyfile(source, path)
+    harness.use_app(path)
+    quiet_streamlit()
+    from utils import db
+    db.DB_PATH = path
+    users, _, analyses = seed.counts(args.scale)
+
+    before = snapshot(db, path, users, args)
+    describe("before:", before)
+
+    start = time.perf_counter()
+    db.migrate_analysis_storage(batch_size=20000, log=lambda msg: None)
+    migrate_s = time.perf_counter() - start
+    start = time.perf_counter()
+    with db.get_db() as conn:
+        conn.execute("VACUUM")
+    vacuum_s = time.perf_counter() - start
+    with db.get_db() as conn:
+        postings = conn.execute("SELECT COUNT(*) FROM job_postings").fetchone()[0]
+
+    after = snapshot(db, path, users, args)
+    describe("after: ", after)
+    print(f"migrated {analyses} analyses onto {postings} distinct postings in {migrate_s:.1f}s "
+          f"(+{vacuum_s:.1f}s VACUUM)")
+
+    harness.write_results({
+        'meta': harness.metadata(scale=args.scale, seed=args.seed, analyses=analyses),
+        'before': before,
+        'after': after,
+        'distinct_postings': postings,
+        'migrate_s': round(migrate_s, 2),
+        'vacuum_s': round(vacuum_s, 2),
+    }, args.output)
+    print(f"results written to {args.output}")
+    os.remove(path)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,79 @@
+"""
+Free-text template versus structured tool-use analyses.
+
+For each shape (resumes x bullets per section) reports the prompt and
+response size in tokens (about 4 characters each, counting the tool
+definition as input) and the time to turn the response into the objects the
+UI renders: ``parse_multiple_analyses`` for text, ``validate_analysis`` for
+the tool input. Runs against the stub client, so token counts are estimates.
+
+    python -m benchmarks.bench_structured
+"""
+import argparse
+import os
+import sys
+
+from . import harness, synthetic
+from .run import ANALYSIS_SHAPES, quiet_streamlit
+from .stubs import StubAnthropic
+
+class _Recorder(StubAnthropic):
+    """Stub that keeps the usage of its last response"""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        create = self.messages.create
+
+        def recording_create(**request):
+            response = create(**request)
+            self.last_response = response
+            return response
+        self.messages.create = recording_create
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=200)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default=os.path.join(harness.RESULTS_DIR, 'structured.json'))
+    args = parser.parse_args(argv)
+
+    harness.use_app()
+    quiet_streamlit()
+    from utils import analyze
+    from utils.parsing import parse_multiple_analyses
+    # Compare single requests; bench_routing covers the tiered path
+    analyze.ROUTING = 'large'
+
+    results = {}
+    print(f"{'shape':<22} {'mode':<11} {'in tok':>7} {'out tok':>8} {'parse ms':>9}")
+    for resumes, bullets in ANALYSIS_SHAPES:
+        rng = synthetic.make_rng(args.seed, 'structured', resumes)
+        rows = [(f"resume_{i}.pdf", synthetic.resume_text(rng), 'application/pdf', None, None)
+                for i in range(resumes)]
+        names = [row[0] for row in rows]
+        job = synthetic.job_posting(rng)
+        stub = _Recorder(seed=args.seed, bullets=bullets)
+        analyze.get_client = lambda: stub
+
+        text = analyze.analyze_resume_for_job(rows, job)
+        text_usage = stub.last_response.usage
+        analyze.analyze_resumes_structured(rows, job)
+        tool_usage = stub.last_response.usage
+        data = stub.last_response.content[0].input
+
+        shape = f"resumes={resumes},bullets={bullets}"
+        for mode, usage, parse in (
+            ('text', text_usage, lambda: parse_multiple_analyses(text)),
+            ('structured', tool_usage, lambda: analyze.validate_analysis(data, names)),
+        ):
+            row = harness.measure(parse, repeat=args.repeat)
+            row.update(input_tokens=usage.input_tokens, output_tokens=usage.output_tokens)
+            results[f"{mode}[{shape}]"] = row
+            print(f"{shape:<22} {mode:<11} {usage.input_tokens:>7} {usage.output_tokens:>8} {row['median_ms']:>9.4f}")
+
+    harness.write_results({'meta': harness.metadata(), 'results': results}, args.output)
+    print(f"\nresults written to {args.output}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,93 @@
+"""
+Offline pipeline latency and throughput through the LLM transports.
+
+Runs ``--analyses`` structured analyses (``--resumes`` resumes each)
+through utils.analyze.run_analysis and the real Anthropic client, on
+``--workers`` threads, streamed with a CancelToken like the app does.
+
+- ``synthetic``: SyntheticTransport answers every request with
+  ``--output-tokens`` of output after ``--latency`` seconds, plus
+  ``--token-ms`` per token.
+- ``record``: the same, but through RecordingTransport, which saves a
+  cassette per request.
+- ``replay``: the cassettes, replayed with their recorded timing.
+- ``replay-instant``: the cassettes with no waiting, which is the
+  pipeline's own overhead.
+
+With real cassettes (APPLYAI_LLM_TRANSPORT=record against the API),
+``--cassettes DIR`` replays those instead of recording synthetic ones.
+
+    python -m benchmarks.bench_transport --analyses 40 --workers 4
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from . import harness, synthetic
+from .run import quiet_streamlit
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--analyses', type=int, default=40)
+    parser.add_argument('--resumes', type=int, default=3)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--output-tokens', type=int, default=600)
+    parser.add_argument('--latency', type=float, default=0.3)
+    parser.add_argument('--token-ms', type=float, default=2.0)
+    parser.add_argument('--cassettes', help="replay this cassette directory instead of recording one")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default=os.path.join(harness.RESULTS_DIR, 'transport.json'))
+    args = parser.parse_args(argv)
+
+    harness.use_app(os.path.join(tempfile.mkdtemp(prefix='applyai-transport-'), 'bench.db'))
+    quiet_streamlit()
+    from anthropic import Anthropic, DefaultHttpxClient
+    from utils import analyze, cancellation, llm_transport
+
+    rng = synthetic.make_rng(args.seed, 'transport')
+    resumes = [(f"resume_{i}.pdf", synthetic.resume_text(rng)) for i in range(args.resumes)]
+    postings = [synthetic.job_posting(rng) for _ in range(args.analyses)]
+    cassettes = args.cassettes or tempfile.mkdtemp(prefix='applyai-cassettes-')
+    synthetic_transport = llm_transport.SyntheticTransport(args.output_tokens, args.latency, args.token_ms / 1000)
+    modes = {
+        'synthetic': synthetic_transport,
+        'record': llm_transport.RecordingTransport(cassettes, transport=synthetic_transport),
+        'replay': llm_transport.ReplayTransport(cassettes),
+        'replay-instant': llm_transport.ReplayTransport(cassettes, latency=0),
+    }
+    if args.cassettes:
+        modes = {mode: modes[mode] for mode in ('replay', 'replay-instant')}
+
+    def analyze_one(posting):
+        start = time.perf_counter()
+        analyze.run_analysis(resumes, posting, usage={}, token=cancellation.CancelToken(120))
+        return (time.perf_counter() - start) * 1000
+
+    results = {}
+    print(f"{'mode':<15} {'p50 ms':>8} {'p95 ms':>8} {'analyses/s':>10} {'missing':>8}")
+    for mode, transport in modes.items():
+        analyze.get_client = lambda transport=transport: Anthropic(
+            api_key='bench', http_client=DefaultHttpxClient(transport=transport))
+        missing = llm_transport.stats['missing']
+        start = time.perf_counter()
+        with ThreadPoolExecutor(args.workers) as pool:
+            samples = list(pool.map(analyze_one, postings))
+        wall = time.perf_counter() - start
+        results[mode] = harness.summarize(samples, analyses_per_s=round(len(samples) / wall, 2),
+                                          missing=llm_transport.stats['missing'] - missing)
+        row = results[mode]
+        print(f"{mode:<15} {row['median_ms']:>8.0f} {row['p95_ms']:>8.0f} {row['analyses_per_s']:>10.2f} "
+              f"{row['missing']:>8}")
+
+    meta = harness.metadata(analyses=args.analyses, resumes=args.resumes, workers=args.workers,
+                            output_tokens=args.output_tokens, latency=args.latency, token_ms=args.token_ms,
+                            cassettes=args.cassettes)
+    harness.write_results({'meta': meta, 'results': results}, args.output)
+    print(f"\nresults written to {args.output}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
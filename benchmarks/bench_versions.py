@@ -0,0 +1,92 @@
+"""
+Resume version history over a long edit session: storage per saved edit
+and time to rebuild any version, per snapshot interval.
+
+Each interval gets its own resume, saved ``--edits`` times through
+``db.save_resume`` with one small edit between saves (a bullet rewritten,
+added or removed), the way editor auto-save produces versions. Storing
+every version in full (compressed) is the reference. Rebuild latency is
+measured over ``--samples`` random versions.
+
+    python -m benchmarks.bench_versions --edits 500 --intervals 1 4 16 64
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+from . import harness, synthetic
+from .run import quiet_streamlit
+
+def edit(rng, text):
+    lines = text.splitlines()
+    bullets = [i for i, line in enumerate(lines) if line.startswith('• ')]
+    idx = rng.choice(bullets)
+    action = rng.random()
+    if action < 0.6 or len(bullets) < 4:
+        lines[idx] = f"• {synthetic._bullet(rng)}"
+    elif action < 0.8:
+        lines.insert(idx + 1, f"• {synthetic._bullet(rng)}")
+    else:
+        del lines[idx]
+    return "\n".join(lines)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--edits', type=int, default=500)
+    parser.add_argument('--intervals', type=int, nargs='+', default=[1, 4, 16, 64])
+    parser.add_argument('--entries', type=int, default=6)
+    parser.add_argument('--samples', type=int, default=200)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default=os.path.join(harness.RESULTS_DIR, 'versions.json'))
+    args = parser.parse_args(argv)
+
+    harness.use_app(os.path.join(tempfile.mkdtemp(prefix='applyai-versions-'), 'bench.db'))
+    quiet_streamlit()
+    from utils import db
+    from utils.compression import compress_text
+
+    rng = synthetic.make_rng(args.seed, 'versions')
+    texts = [synthetic.resume_text(rng, entries=args.entries)]
+    for _ in range(args.edits - 1):
+        texts.append(edit(rng, texts[-1]))
+    full_bytes = sum(len(compress_text(text)) for text in texts)
+    print(f"{args.edits} versions of a {len(texts[0])}-character resume; "
+          f"full copies: {full_bytes / len(texts):.0f} bytes per edit")
+
+    results = {'full': {'bytes_per_edit': round(full_bytes / len(texts))}}
+    print(f"{'interval':>8} {'bytes/edit':>11} {'save p50 ms':>12} {'rebuild p50 ms':>15} {'rebuild p95 ms':>15}")
+    for interval in args.intervals:
+        db.RESUME_SNAPSHOT_INTERVAL = interval
+        filename = f"resume_interval{interval}.pdf"
+        save_ms = []
+        for text in texts:
+            start = time.perf_counter()
+            db.save_resume(1, filename, text, 'application/pdf')
+            save_ms.append((time.perf_counter() - start) * 1000)
+        versions = db.get_resume_versions(1, filename)
+        assert len(versions) == len(texts), len(versions)
+        stored = sum(size for _, _, size, _ in versions)
+
+        sample_rng = synthetic.make_rng(args.seed, 'versions', interval)
+        rebuild_ms = []
+        for _ in range(args.samples):
+            version = sample_rng.randint(1, len(texts))
+            start = time.perf_counter()
+            text = db.get_resume_version(1, filename, version)
+            rebuild_ms.append((time.perf_counter() - start) * 1000)
+            assert text == texts[version - 1], version
+        row = harness.summarize(rebuild_ms, interval=interval, bytes_per_edit=round(stored / len(texts)),
+                                save_p50_ms=round(harness.percentile(save_ms, 50), 3))
+        results[f"interval={interval}"] = row
+        print(f"{interval:>8} {row['bytes_per_edit']:>11} {row['save_p50_ms']:>12.2f} "
+              f"{row['median_ms']:>15.2f} {row['p95_ms']:>15.2f}")
+
+    meta = harness.metadata(edits=args.edits, entries=args.entries, samples=args.samples)
+    harness.write_results({'meta': meta, 'results': results}, args.output)
+    print(f"\nresults written to {args.output}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,117 @@
+"""
+Click-to-first-LLM-byte with and without the speculative warm-up.
+
+Each round enters a new job posting, either pasted as text or as a URL
+served by a local HTTP server that answers after ``--fetch-latency``. With
+``warm``, ``warmup.warm_up`` starts when the posting is entered and the
+click comes ``--think`` seconds later; with ``cold`` nothing happens until
+the click. The click runs what the Analyze button does: load resumes,
+``warmup.get_prepared`` and ``run_analysis``. The stub client records when
+the request reaches it, which is as early as a first byte could arrive, so
+the reported time excludes model latency.
+
+    python -m benchmarks.bench_warmup --fetch-latency 0.3 --think 0.5
+"""
+import argparse
+import http.server
+import os
+import sys
+import tempfile
+import threading
+import time
+
+from . import harness, synthetic
+from .run import quiet_streamlit
+from .stubs import StubAnthropic
+
+class _Timed(StubAnthropic):
+    """Stub that remembers when its first request of a round arrived"""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.requested_at = None
+        create = self.messages.create
+
+        def timed_create(**request):
+            if self.requested_at is None:
+                self.requested_at = time.perf_counter()
+            return create(**request)
+        self.messages.create = timed_create
+
+def serve_postings(latency, seed):
+    """Local server returning a different HTML job posting per path"""
+    class Handler(http.server.BaseHTTPRequestHandler):
+        def do_GET(self):
+            time.sleep(latency)
+            posting = synthetic.job_posting(synthetic.make_rng(seed, 'warmup-url', self.path))
+            body = "<html><body><nav>Jobs</nav><main>{}</main><script>track()</script></body></html>".format(
+                "".join(f"<p>{line}</p>" for line in posting.splitlines())).encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/html')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--resumes', type=int, default=3)
+    parser.add_argument('--fetch-latency', type=float, default=0.3, help="seconds the posting URL takes")
+    parser.add_argument('--think', type=float, default=0.5, help="seconds between entering the posting and clicking")
+    parser.add_argument('--repeat', type=int, default=10)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default=os.path.join(harness.RESULTS_DIR, 'warmup.json'))
+    args = parser.parse_args(argv)
+
+    harness.use_app(os.path.join(tempfile.mkdtemp(prefix='applyai-warmup-'), 'bench.db'))
+    quiet_streamlit()
+    from utils import analyze, db, warmup
+
+    rng = synthetic.make_rng(args.seed, 'warmup')
+    db.save_resumes(1, [(f"resume_{i}.pdf", synthetic.resume_text(rng, entries=6), 'application/pdf')
+                        for i in range(args.resumes)])
+    stub = _Timed(seed=args.seed)
+    analyze.get_client = lambda: stub
+    server = serve_postings(args.fetch_latency, args.seed)
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+
+    def click(job_input):
+        stub.requested_at = None
+        clicked = time.perf_counter()
+        resumes = db.get_user_resumes(1)
+        prepared = warmup.get_prepared(1, job_input, resumes)
+        analyze.run_analysis(resumes, prepared['job_content'], prepared['prompt'])
+        return (stub.requested_at - clicked) * 1000
+
+    results = {}
+    print(f"{'posting':<8} {'mode':<5} {'click-to-request p50 ms':>24} {'p95 ms':>8}")
+    for source in ('text', 'url'):
+        for mode in ('cold', 'warm'):
+            samples = []
+            for i in range(args.repeat):
+                if source == 'url':
+                    job_input = f"{base_url}/jobs/{mode}/{i}"
+                else:
+                    job_input = synthetic.job_posting(synthetic.make_rng(args.seed, 'warmup-text', mode, i))
+                if mode == 'warm':
+                    warmup.warm_up(1, job_input, db.get_user_resumes(1))
+                    time.sleep(args.think)
+                samples.append(click(job_input))
+            row = harness.summarize(samples, posting=source, mode=mode)
+            results[f"{source}.{mode}"] = row
+            print(f"{source:<8} {mode:<5} {row['median_ms']:>24.2f} {row['p95_ms']:>8.2f}")
+
+    server.shutdown()
+    meta = harness.metadata(resumes=args.resumes, fetch_latency_s=args.fetch_latency, think_s=args.think)
+    harness.write_results({'meta': meta, 'results': results, 'warmup_stats': dict(warmup.stats)}, args.output)
+    print(f"\nresults written to {args.output}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
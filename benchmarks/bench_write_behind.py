@@ -0,0 +1,107 @@
+"""
+Write throughput: per-call commits versus the write-behind queue.
+
+Each of ``--threads`` workers (a stand-in for concurrent sessions) saves
+``--writes`` analyses and resumes. ``per_call`` is the default path (one
+connection and commit per write), ``per_call_wal`` is the same with the
+database in WAL mode, and ``write_behind`` queues writes for the single
+group-committing writer thread. Throughput counts until every write is
+durable, i.e. including the final flush.
+
+    python -m benchmarks.bench_write_behind --threads 1 8 32
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+from . import harness, synthetic
+from .run import quiet_streamlit
+
+MODES = ('per_call', 'per_call_wal', 'write_behind')
+
+def run_mode(db, mode, threads, writes, payloads):
+    path = os.path.join(tempfile.mkdtemp(prefix='applyai-wb-'), 'bench.db')
+    db.DB_PATH = path
+    db.init_db()
+    if mode == 'per_call_wal':
+        sqlite3.connect(path).execute('PRAGMA journal_mode = WAL').close()
+    db.WRITE_BEHIND = mode == 'write_behind'
+    with db.get_db() as conn:
+        conn.executemany("INSERT INTO users (username, password) VALUES (?, ?)",
+                         ((f"wb{i}", 'password') for i in range(threads)))
+    user_ids = [row[0] for row in db.get_db().execute("SELECT id FROM users WHERE username LIKE 'wb%' ORDER BY id")]
+
+    latencies = [[] for _ in range(threads)]
+    barrier = threading.Barrier(threads + 1)
+
+    def worker(n):
+        uid = user_ids[n]
+        job, analysis, resume = payloads
+        barrier.wait()
+        for i in range(writes):
+            start = time.perf_counter()
+            if i % 4 == 3:
+                db.save_resume(uid, f"resume_{i % 3}.pdf", resume, 'application/pdf')
+            else:
+                db.save_analysis(uid, job, analysis)
+            latencies[n].append((time.perf_counter() - start) * 1000)
+
+    workers = [threading.Thread(target=worker, args=(n,)) for n in range(threads)]
+    for t in workers:
+        t.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for t in workers:
+        t.join()
+    db.flush_writes()
+    elapsed = time.perf_counter() - start
+    stats = {}
+    for writer in db._writers.values():
+        for key, value in writer.stats.items():
+            stats[key] = stats.get(key, 0) + value
+    db.close_writers()
+
+    samples = [ms for per_thread in latencies for ms in per_thread]
+    total = threads * writes
+    row = harness.summarize(samples, threads=threads, writes=total,
+                            writes_per_s=round(total / elapsed, 1), elapsed_s=round(elapsed, 3))
+    row['p99_ms'] = round(harness.percentile(samples, 99), 4)
+    if stats:
+        row['batches'] = stats['batches']
+        row['mean_batch'] = round(stats['writes'] / max(1, stats['batches']), 1)
+    return row
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--threads', type=int, nargs='+', default=[1, 8, 32])
+    parser.add_argument('--writes', type=int, default=200, help="writes per thread")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default=os.path.join(harness.RESULTS_DIR, 'write_behind.json'))
+    args = parser.parse_args(argv)
+
+    harness.use_app(os.path.join(tempfile.mkdtemp(prefix='applyai-wb-'), 'init.db'))
+    quiet_streamlit()
+    from utils import db
+
+    rng = synthetic.make_rng(args.seed, 'write-behind')
+    payloads = (synthetic.job_posting(rng), synthetic.analysis_text(rng, ['resume_0.pdf']), synthetic.resume_text(rng))
+
+    results = {}
+    print(f"{'mode':<14} {'threads':>7} {'writes/s':>10} {'call p50 ms':>12} {'call p99 ms':>12} {'batch':>6}")
+    for threads in args.threads:
+        for mode in MODES:
+            row = run_mode(db, mode, threads, args.writes, payloads)
+            results[f"{mode}[threads={threads}]"] = row
+            print(f"{mode:<14} {threads:>7} {row['writes_per_s']:>10.1f} {row['median_ms']:>12.3f} "
+                  f"{row['p99_ms']:>12.3f} {row.get('mean_batch', 1):>6}")
+
+    harness.write_results({'meta': harness.metadata(writes_per_thread=args.writes), 'results': results}, args.output)
+    print(f"\nresults written to {args.output}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,176 @@
+"""
+Local stand-in for the Message Batches endpoints of the Anthropic API, so
+bulk analysis (utils.batches) runs end to end offline through the real SDK.
+
+Point the client at it with ``Anthropic(base_url=server.url, api_key='x')``,
+or run it on its own and set ANTHROPIC_BASE_URL:
+
+    python -m benchmarks.fake_batches --port 8765 --processing-s 5
+    ANTHROPIC_BASE_URL=http://127.0.0.1:8765 ANTHROPIC_API_KEY=x python app/manage.py batches --wait
+
+Batches stay ``in_progress`` for ``processing_s`` seconds, then end with a
+synthetic analysis (from StubAnthropic) for each request. An
+``error_rate`` share of requests end ``errored`` and a ``schema_failures``
+number of them are missing a required field.
+"""
+import argparse
+import json
+import re
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from . import synthetic
+from .stubs import StubAnthropic
+
+_BATCH = re.compile(r'^/v1/messages/batches/([\w-]+)(/results|/cancel)?$')
+
+def _timestamp(seconds):
+    return datetime.fromtimestamp(seconds, timezone.utc).isoformat().replace('+00:00', 'Z')
+
+def _message(response):
+    """A StubAnthropic response as the API's JSON message"""
+    content = [
+        {'type': 'tool_use', 'id': block.id, 'name': block.name, 'input': block.input}
+        if block.type == 'tool_use' else {'type': 'text', 'text': block.text}
+        for block in response.content
+    ]
+    return {
+        'id': response.id, 'type': 'message', 'role': 'assistant', 'model': response.model,
+        'content': content, 'stop_reason': response.stop_reason, 'stop_sequence': None,
+        'usage': {'input_tokens': response.usage.input_tokens, 'output_tokens': response.usage.output_tokens},
+    }
+
+class FakeBatchesServer:
+    """Threaded HTTP server for ``/v1/messages/batches``; ``url`` is its base URL"""
+
+    def __init__(self, port=0, processing_s=0.5, error_rate=0.0, schema_failures=0, seed=0):
+        self.processing_s = processing_s
+        self.error_rate = error_rate
+        self.stub = StubAnthropic(seed=seed, schema_failures=schema_failures)
+        self.rng = synthetic.make_rng(seed, 'fake-batches')
+        self.batches = {}
+        self.requests = {'create': 0, 'retrieve': 0, 'results': 0}
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(('127.0.0.1', port), self._handler())
+        self.url = f"http://127.0.0.1:{self._server.server_address[1]}"
+        self._thread = threading.Thread(target=self._server.serve_forever, name='fake-batches', daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def create(self, body):
+        batch_id = f"msgbatch_{uuid.uuid4().hex[:24]}"
+        results = []
+        for request in body['requests']:
+            if self.rng.random() < self.error_rate:
+                result = {'type': 'errored', 'error': {'type': 'error', 'error': {
+                    'type': 'overloaded_error', 'message': 'Overloaded'}}}
+            else:
+                result = {'type': 'succeeded', 'message': _message(self.stub.messages.create(**request['params']))}
+            results.append({'custom_id': request['custom_id'], 'result': result})
+        with self._lock:
+            self.batches[batch_id] = {'created': time.time(), 'results': results, 'canceled': None}
+        return self.describe(batch_id)
+
+    def describe(self, batch_id):
+        batch = self.batches[batch_id]
+        ended = batch['canceled'] is not None or time.time() - batch['created'] >= self.processing_s
+        counts = {'processing': 0, 'succeeded': 0, 'errored': 0, 'canceled': 0, 'expired': 0}
+        if ended:
+            for entry in batch['results']:
+                counts['canceled' if batch['canceled'] else entry['result']['type']] += 1
+        else:
+            counts['processing'] = len(batch['results'])
+        return {
+            'id': batch_id, 'type': 'message_batch',
+            'processing_status': 'ended' if ended else 'in_progress',
+            'request_counts': counts,
+            'created_at': _timestamp(batch['created']),
+            'expires_at': _timestamp(batch['created'] + timedelta(days=1).total_seconds()),
+            'ended_at': _timestamp(batch['created'] + self.processing_s) if ended else None,
+            'cancel_initiated_at': _timestamp(batch['canceled']) if batch['canceled'] else None,
+            'archived_at': None,
+            'results_url': f"{self.url}/v1/messages/batches/{batch_id}/results" if ended else None,
+        }
+
+    def results(self, batch_id):
+        batch = self.batches[batch_id]
+        if batch['canceled']:
+            return [{'custom_id': entry['custom_id'], 'result': {'type': 'canceled'}} for entry in batch['results']]
+        return batch['results']
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _send(self, status, body, content_type='application/json'):
+                data = body if isinstance(body, bytes) else json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _not_found(self):
+                self._send(404, {'type': 'error', 'error': {'type': 'not_found_error', 'message': 'Not found'}})
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+                path = self.path.split('?')[0]
+                if path == '/v1/messages/batches':
+                    server.requests['create'] += 1
+                    return self._send(200, server.create(body))
+                match = _BATCH.match(path)
+                if match and match.group(2) == '/cancel' and match.group(1) in server.batches:
+                    server.batches[match.group(1)]['canceled'] = time.time()
+                    return self._send(200, server.describe(match.group(1)))
+                self._not_found()
+
+            def do_GET(self):
+                match = _BATCH.match(self.path.split('?')[0])
+                if not match or match.group(1) not in server.batches:
+                    return self._not_found()
+                batch_id, action = match.groups()
+                if action is None:
+                    server.requests['retrieve'] += 1
+                    return self._send(200, server.describe(batch_id))
+                if action == '/results' and server.describe(batch_id)['processing_status'] == 'ended':
+                    server.requests['results'] += 1
+                    lines = "".join(json.dumps(entry) + "\n" for entry in server.results(batch_id))
+                    return self._send(200, lines.encode(), 'application/binary')
+                self._not_found()
+
+        return Handler
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--processing-s', type=float, default=5.0)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    args = parser.parse_args(argv)
+    server = FakeBatchesServer(args.port, args.processing_s, args.error_rate)
+    print(f"Fake Message Batches API on {server.url}")
+    try:
+        server._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,160 @@
+"""
+Timing, result files and baseline comparison shared by the benchmark scripts.
+"""
+import json
+import os
+import platform
+import re
+import sqlite3
+import statistics
+import sys
+import time
+from datetime import datetime, timezone
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP_DIR = os.path.join(ROOT_DIR, 'app')
+RESULTS_DIR = os.path.join(ROOT_DIR, 'benchmarks', 'results')
+CACHE_DIR = os.path.join(ROOT_DIR, 'benchmarks', '.cache')
+DEFAULT_BASELINE = os.path.join(ROOT_DIR, 'benchmarks', 'baseline.json')
+
+def use_app(db_path=None):
+    """Put the app directory on sys.path and point the data layer at ``db_path``.
+
+    Must be called before anything under ``utils`` is imported, the same way
+    ``streamlit run app/main.py`` makes ``utils`` importable.
+    """
+    if db_path:
+        os.environ['APPLYAI_DB_PATH'] = db_path
+    if APP_DIR not in sys.path:
+        sys.path.insert(0, APP_DIR)
+
+def percentile(samples, pct):
+    """Nearest-rank percentile of a list of numbers"""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered)) - 1))
+    return ordered[rank]
+
+def summarize(samples_ms, **extra):
+    """Reduce timing samples (milliseconds) to the stored statistics"""
+    result = {
+        'runs': len(samples_ms),
+        'min_ms': round(min(samples_ms), 4),
+        'median_ms': round(statistics.median(samples_ms), 4),
+        'mean_ms': round(statistics.fmean(samples_ms), 4),
+        'p95_ms': round(percentile(samples_ms, 95), 4),
+    }
+    result.update(extra)
+    return result
+
+def measure(fn, repeat=20, warmup=2, args_for=None, **extra):
+    """Time ``fn`` ``repeat`` times after ``warmup`` untimed calls.
+
+    ``args_for(i)`` may supply per-iteration positional arguments so that
+    lookups are spread over the dataset instead of hitting one hot row.
+    """
+    for i in range(warmup):
+        fn(*(args_for(i) if args_for else ()))
+    samples = []
+    for i in range(repeat):
+        args = args_for(warmup + i) if args_for else ()
+        start = time.perf_counter()
+        fn(*args)
+        samples.append((time.perf_counter() - start) * 1000)
+    return summarize(samples, **extra)
+
+def _yardstick():
+    rows = [(i, f"user{i}@example.com", json.dumps({'score': i % 100, 'skills': ['python', 'sql'] * 5}))
+            for i in range(3000)]
+    conn = sqlite3.connect(':memory:')
+    conn.execute("CREATE TABLE t (id INTEGER PRIMARY KEY, email TEXT, data TEXT)")
+    conn.executemany("INSERT INTO t VALUES (?, ?, ?)", rows)
+    for _, email, data in conn.execute("SELECT * FROM t ORDER BY email"):
+        re.findall(r'\w+', email)
+        json.loads(data)
+    conn.close()
+
+def calibrate(repeat=5):
+    """Fastest milliseconds of a fixed workload (strings, regex, JSON and
+    SQLite), as a measure of how fast this machine is right now; on shared
+    or throttled machines that changes from minute to minute"""
+    return measure(_yardstick, repeat=repeat)['min_ms']
+
+def metadata(**extra):
+    """Describe the machine and run so results are comparable"""
+    meta = {
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+    }
+    meta.update(extra)
+    return meta
+
+def write_results(results, path):
+    """Write a results document as JSON"""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+
+def load_results(path):
+    """Load a results document, or None when it does not exist"""
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+def machine_factor(current, baseline):
+    """How much slower the calibration workload ran before ``current`` than
+    before ``baseline`` (two results of one benchmark); 1.0 when either
+    lacks ``calibration_ms``"""
+    before, after = baseline.get('calibration_ms'), current.get('calibration_ms')
+    return after / before if before and after else 1.0
+
+def compare(current, baseline, threshold=0.2, metric='median_ms'):
+    """Compare two result documents.
+
+    Baseline values are scaled by machine_factor first, so a baseline
+    recorded on a faster or less loaded machine doesn't read as a
+    regression. Returns a list of ``(name, baseline_value, current_value,
+    ratio, status)`` where status is ``regression`` when the current value
+    is more than ``threshold`` slower, ``improvement`` when it is that much
+    faster, ``new`` or ``missing`` when only one side has the benchmark,
+    else ``ok``.
+    """
+    rows = []
+    cur = current.get('results', {})
+    base = {name: {**row, metric: row[metric] * machine_factor(cur.get(name, {}), row)}
+            for name, row in baseline.get('results', {}).items()}
+    for name in sorted(set(cur) | set(base)):
+        if name not in base:
+            rows.append((name, None, cur[name][metric], None, 'new'))
+            continue
+        if name not in cur:
+            rows.append((name, base[name][metric], None, None, 'missing'))
+            continue
+        before, after = base[name][metric], cur[name][metric]
+        ratio = after / before if before else float('inf')
+        if ratio > 1 + threshold:
+            status = 'regression'
+        elif ratio < 1 - threshold:
+            status = 'improvement'
+        else:
+            status = 'ok'
+        rows.append((name, before, after, ratio, status))
+    return rows
+
+def print_comparison(rows):
+    """Print a comparison table from ``compare``"""
+    print(f"{'benchmark':<48} {'baseline':>12} {'current':>12} {'ratio':>8}  status")
+    for name, before, after, ratio, status in rows:
+        fmt = lambda v: f"{v:12.3f}" if v is not None else f"{'-':>12}"
+        ratio_s = f"{ratio:8.2f}" if ratio is not None else f"{'-':>8}"
+        print(f"{name:<48} {fmt(before)} {fmt(after)} {ratio_s}  {status}")
+
+def print_results(results):
+    """Print a results document as a table"""
+    print(f"{'benchmark':<48} {'median ms':>12} {'p95 ms':>12} {'runs':>6}")
+    for name, row in sorted(results['results'].items()):
+        print(f"{name:<48} {row['median_ms']:12.3f} {row['p95_ms']:12.3f} {row['runs']:6d}")
@@ -0,0 +1,286 @@
+"""
+Concurrent-session load harness for ``app/main.py``.
+
+Drives simulated sessions through login, upload, edit and analyze with
+Streamlit's ``AppTest`` (one process per session) against a fake LLM, stepping up the number of
+concurrent sessions and reporting rerun latency percentiles, time spent
+in database writes (which includes waiting on SQLite's write lock) and
+per-session memory.
+
+    python -m benchmarks.load --concurrency 1 4 16 --llm-latency 0.5
+"""
+import argparse
+import gc
+import os
+import resource
+import sqlite3
+import sys
+import tempfile
+import multiprocessing
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+
+from . import harness, synthetic
+from .run import quiet_streamlit
+from .stubs import StubAnthropic
+
+MAIN_SCRIPT = os.path.join(harness.APP_DIR, 'main.py')
+
+class DbStats:
+    """Thread-safe counters for time spent in database writes"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.write_ms = []
+        self.locked_errors = 0
+
+    def record(self, elapsed_ms):
+        with self._lock:
+            self.write_ms.append(elapsed_ms)
+
+    def locked(self):
+        with self._lock:
+            self.locked_errors += 1
+
+DB_STATS = DbStats()
+WRITE_PREFIXES = ('INSERT', 'UPDATE', 'DELETE', 'REPLACE')
+
+class TimedConnection(sqlite3.Connection):
+    """Connection that records how long write statements and commits block"""
+
+    def _timed(self, fn, *args):
+        start = time.perf_counter()
+        try:
+            return fn(*args)
+        except sqlite3.OperationalError as e:
+            if 'locked' in str(e):
+                DB_STATS.locked()
+            raise
+        finally:
+            DB_STATS.record((time.perf_counter() - start) * 1000)
+
+    def execute(self, sql, *args):
+        if sql.lstrip().upper().startswith(WRITE_PREFIXES):
+            return self._timed(super().execute, sql, *args)
+        return super().execute(sql, *args)
+
+    def executemany(self, sql, *args):
+        return self._timed(super().executemany, sql, *args)
+
+    def commit(self):
+        return self._timed(super().commit)
+
+    def __exit__(self, *exc):
+        # The ``with conn:`` form used by utils.db commits here
+        return self._timed(super().__exit__, *exc)
+
+def instrument_db(db_path):
+    """Point utils.db at ``db_path`` and time every write it performs"""
+    from utils import db
+    db.DB_PATH = db_path
+    db.get_db = lambda user_id=None: sqlite3.connect(db.db_path(user_id), factory=TimedConnection)
+    return db
+
+def deep_sizeof(obj, seen=None):
+    """Approximate retained size of an object graph in bytes"""
+    seen = set() if seen is None else seen
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(deep_sizeof(k, seen) + deep_sizeof(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(deep_sizeof(item, seen) for item in obj)
+    elif hasattr(obj, '__dict__'):
+        size += deep_sizeof(vars(obj), seen)
+    return size
+
+def session_state_bytes(at):
+    """Size of the user-visible session state of an AppTest"""
+    return deep_sizeof(at.session_state.to_dict())
+
+def rss_mb():
+    """Current resident set size of this process in MB"""
+    with open('/proc/self/statm') as f:
+        return int(f.read().split()[1]) * resource.getpagesize() / 2 ** 20
+
+class Session:
+    """One simulated user walking through the app"""
+
+    def __init__(self, index, args):
+        from streamlit.testing.v1 import AppTest
+
+        self.index = index
+        self.args = args
+        self.timings = defaultdict(list)
+        self.rng = synthetic.make_rng(args.seed, 'session', index)
+        self.at = AppTest.from_file(MAIN_SCRIPT, default_timeout=args.timeout)
+
+    def rerun(self, step):
+        start = time.perf_counter()
+        self.at.run()
+        self.timings[step].append((time.perf_counter() - start) * 1000)
+        if self.at.exception:
+            raise RuntimeError(f"session {self.index} {step}: {self.at.exception[0].value}")
+
+    def open(self):
+        # The first run imports the app's modules; keep that one-off cost
+        # out of the rerun latencies
+        self.at.run()
+
+    def login(self):
+        self.at.text_input[0].input(f"load{self.index}")
+        self.at.text_input[1].input('password')
+        self.at.button[0].click()
+        self.rerun('login')
+
+    def upload(self):
+        files = [
+            (f"resume_{i}.pdf", synthetic.resume_pdf(self.rng, self.args.pages), 'application/pdf')
+            for i in range(self.args.resumes)
+        ]
+        self.at.file_uploader(key='pdf_uploader').set_value(files)
+        self.rerun('upload')
+        self.filenames = [name for name, _, _ in files]
+
+    def edit(self):
+        name = self.rng.choice(self.filenames)
+        self.at.button(key=f"view_{name}").click()
+        self.rerun('open_editor')
+        for n in range(self.args.edits):
+            editor = self.at.text_area(key=f"editor_{name}")
+            editor.input(f"{editor.value}\nEdit {n}: {synthetic.resume_text(self.rng, entries=1, bullets=1)}")
+            self.rerun('edit')
+
+    def analyze(self):
+        job = synthetic.job_posting(self.rng)
+        for _ in range(self.args.analyses):
+            self.at.text_area(key='job_posting').input(job)
+            self.at.button(key='analyze').click()
+            self.rerun('analyze')
+            self.rerun('idle')
+
+    def walk(self):
+        self.login()
+        self.upload()
+        self.edit()
+        self.analyze()
+
+def run_session(index, args, db_path, start_at):
+    """Worker process: set up the app, wait for the start signal and walk one session.
+
+    ``AppTest`` keeps Streamlit's runtime in process-wide globals, so each
+    simulated session gets its own process; they still share the database file.
+    """
+    harness.use_app(db_path)
+    quiet_streamlit()
+    instrument_db(db_path)
+    from utils import analyze
+    stub = StubAnthropic(latency=args.llm_latency, seed=args.seed)
+    analyze.get_client = lambda: stub
+
+    session = Session(index, args)
+    session.open()
+    gc.collect()
+    rss_before = rss_mb()
+    time.sleep(max(0.0, start_at - time.time()))
+    session.walk()
+    return {
+        'timings': dict(session.timings),
+        'db_write_ms': DB_STATS.write_ms,
+        'db_locked_errors': DB_STATS.locked_errors,
+        'session_state_bytes': session_state_bytes(session.at),
+        'rss_growth_mb': rss_mb() - rss_before,
+    }
+
+def create_users(db, count):
+    with db.get_db() as conn:
+        conn.executemany(
+            "INSERT OR IGNORE INTO users (username, password) VALUES (?, ?)",
+            ((f"load{i}", 'password') for i in range(count))
+        )
+
+def run_level(concurrency, args, db_path):
+    """Run ``concurrency`` sessions at once and summarize the level"""
+    # Leave time for every worker to import the app before the common start
+    start_at = time.time() + args.startup + 0.25 * concurrency
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=concurrency, mp_context=context) as pool:
+        futures = [pool.submit(run_session, i, args, db_path, start_at) for i in range(concurrency)]
+        sessions = [future.result() for future in futures]
+    wall = time.time() - start_at
+
+    timings = defaultdict(list)
+    for session in sessions:
+        for step, samples in session['timings'].items():
+            timings[step].extend(samples)
+    all_reruns = [ms for samples in timings.values() for ms in samples]
+    writes = [ms for session in sessions for ms in session['db_write_ms']] or [0.0]
+    return {
+        'concurrency': concurrency,
+        'wall_s': round(wall, 3),
+        'reruns': len(all_reruns),
+        'rerun_p50_ms': round(harness.percentile(all_reruns, 50), 3),
+        'rerun_p95_ms': round(harness.percentile(all_reruns, 95), 3),
+        'rerun_p99_ms': round(harness.percentile(all_reruns, 99), 3),
+        'steps': {
+            step: {
+                'p50_ms': round(harness.percentile(samples, 50), 3),
+                'p95_ms': round(harness.percentile(samples, 95), 3),
+                'p99_ms': round(harness.percentile(samples, 99), 3),
+            }
+            for step, samples in sorted(timings.items())
+        },
+        'db_writes': len(writes),
+        'db_write_wait_total_ms': round(sum(writes), 3),
+        'db_write_wait_p99_ms': round(harness.percentile(writes, 99), 3),
+        'db_locked_errors': sum(session['db_locked_errors'] for session in sessions),
+        'session_state_kb_mean': round(
+            sum(session['session_state_bytes'] for session in sessions) / concurrency / 1024, 2),
+        'session_rss_growth_mb_mean': round(
+            sum(session['rss_growth_mb'] for session in sessions) / concurrency, 3),
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 4, 16, 32])
+    parser.add_argument('--llm-latency', type=float, default=0.5, help="seconds the fake LLM takes per call")
+    parser.add_argument('--resumes', type=int, default=3, help="resumes uploaded per session")
+    parser.add_argument('--pages', type=int, default=2, help="pages per uploaded PDF")
+    parser.add_argument('--edits', type=int, default=5, help="editor changes per session")
+    parser.add_argument('--analyses', type=int, default=2, help="analyze clicks per session")
+    parser.add_argument('--timeout', type=float, default=120, help="per-rerun timeout in seconds")
+    parser.add_argument('--startup', type=float, default=5, help="seconds allowed for worker start-up")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--db', help="database file (default: a fresh temporary file)")
+    parser.add_argument('--output', default=os.path.join(harness.RESULTS_DIR, 'load.json'))
+    args = parser.parse_args(argv)
+
+    db_path = args.db or os.path.join(tempfile.mkdtemp(prefix='applyai-load-'), 'load.db')
+    harness.use_app(db_path)
+    quiet_streamlit()
+    create_users(instrument_db(db_path), max(args.concurrency))
+
+    levels = []
+    print(f"{'sessions':>8} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10} {'db wait ms':>11} "
+          f"{'locked':>7} {'state KB':>9} {'RSS +MB':>8}")
+    for concurrency in args.concurrency:
+        level = run_level(concurrency, args, db_path)
+        levels.append(level)
+        print(f"{concurrency:>8} {level['rerun_p50_ms']:>10.1f} {level['rerun_p95_ms']:>10.1f} "
+              f"{level['rerun_p99_ms']:>10.1f} {level['db_write_wait_total_ms']:>11.1f} "
+              f"{level['db_locked_errors']:>7} {level['session_state_kb_mean']:>9.1f} {level['session_rss_growth_mb_mean']:>8.2f}")
+
+    harness.write_results({
+        'meta': harness.metadata(llm_latency_s=args.llm_latency, resumes=args.resumes, pages=args.pages,
+                                 edits=args.edits, analyses=args.analyses),
+        'levels': levels,
+    }, args.output)
+    print(f"\nresults written to {args.output}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
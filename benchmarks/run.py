@@ -0,0 +1,203 @@
+"""
+Run the benchmark suite and compare it against a stored baseline.
+
+    python -m benchmarks.run                      # full scale, compare to baseline.json
+    python -m benchmarks.run --scale 0.01         # quick run on a 100-user database
+    python -m benchmarks.run --save-baseline      # record the current numbers as the baseline
+    python -m benchmarks.run --only parse         # run benchmarks whose name contains "parse"
+
+Exits with status 1 when any benchmark regresses past ``--threshold``.
+"""
+import argparse
+import io
+import logging
+import os
+import sys
+
+from . import harness, seed, synthetic
+from .stubs import StubAnthropic
+
+PDF_PAGES = (1, 10, 50)
+DOCX_PARAGRAPHS = (50, 500, 5000)
+ANALYSIS_SHAPES = ((1, 3), (5, 3), (10, 10))
+# Times a regressed benchmark is run again before it counts
+RETIME_ATTEMPTS = 3
+
+def quiet_streamlit():
+    """Silence the missing-ScriptRunContext warning st.* calls log outside ``streamlit run``"""
+    logging.getLogger('streamlit.runtime.scriptrunner_utils.script_run_context').disabled = True
+
+def bench_extraction(bench, args):
+    from utils import file_processing
+
+    for pages in PDF_PAGES:
+        pdf = synthetic.resume_pdf(synthetic.make_rng(args.seed, 'pdf', pages), pages)
+        bench(f"extract_text_from_pdf[pages={pages}]",
+              lambda: file_processing.extract_text_from_pdf(io.BytesIO(pdf)),
+              repeat=max(3, args.repeat // pages), bytes=len(pdf))
+
+    # The DOCX extractor lives in the services package, which (re)creates
+    # applyai.db in the working directory on import, so import it from scratch space.
+    scratch = os.path.join(harness.CACHE_DIR, 'scratch')
+    os.makedirs(scratch, exist_ok=True)
+    cwd = os.getcwd()
+    os.chdir(scratch)
+    try:
+        sys.path.insert(0, harness.ROOT_DIR)
+        from app.services.resume import extract_text_from_docx
+    except ImportError as e:
+        print(f"skipping DOCX extraction: {e}")
+        return
+    finally:
+        os.chdir(cwd)
+    for paragraphs in DOCX_PARAGRAPHS:
+        docx = synthetic.resume_docx(synthetic.make_rng(args.seed, 'docx', paragraphs), paragraphs)
+        bench(f"extract_text_from_docx[paragraphs={paragraphs}]",
+              lambda: extract_text_from_docx(io.BytesIO(docx)),
+              repeat=max(3, args.repeat * 50 // paragraphs), bytes=len(docx))
+
+def bench_parsing(bench, args):
+    from utils.parsing import parse_multiple_analyses
+    from utils.analyze import validate_analysis
+
+    for resumes, bullets in ANALYSIS_SHAPES:
+        names = [f"resume_{i}.pdf" for i in range(resumes)]
+        text = synthetic.analysis_text(synthetic.make_rng(args.seed, 'analysis', resumes), names, bullets)
+        bench(f"parse_multiple_analyses[resumes={resumes},bullets={bullets}]",
+              lambda: parse_multiple_analyses(text), chars=len(text))
+        data = synthetic.analysis_data(synthetic.make_rng(args.seed, 'analysis', resumes), names, bullets)
+        bench(f"validate_analysis[resumes={resumes},bullets={bullets}]",
+              lambda: validate_analysis(data, names))
+
+def bench_database(bench, args, users):
+    from utils import db
+
+    rng = synthetic.make_rng(args.seed, 'db')
+    user_ids = [rng.randint(2, users + 1) for _ in range(args.repeat * 4)]
+    content = synthetic.resume_text(rng)
+    by_iteration = lambda i: (user_ids[i % len(user_ids)],)
+    counter = iter(range(10 ** 9))
+
+    bench("db.save_resume",
+          lambda uid: db.save_resume(uid, f"bench_{next(counter)}.pdf", content, 'application/pdf'),
+          args_for=by_iteration)
+    bench("db.get_user_resumes", db.get_user_resumes, args_for=by_iteration)
+    bench("db.get_user_analysis_history", db.get_user_analysis_history, args_for=by_iteration)
+
+def bench_pipeline(bench, args, users):
+    from utils import analyze, db
+    from utils.parsing import parse_multiple_analyses
+
+    stub = StubAnthropic(latency=args.llm_latency, seed=args.seed)
+    analyze.get_client = lambda: stub
+    # One request per analysis, as measured before tiered routing
+    analyze.ROUTING = 'large'
+    rng = synthetic.make_rng(args.seed, 'pipeline')
+    job = synthetic.job_posting(rng)
+    user_ids = [rng.randint(2, users + 1) for _ in range(args.repeat * 4)]
+
+    def pipeline(uid):
+        resumes = db.get_user_resumes(uid)
+        text = analyze.analyze_resume_for_job(resumes, job)
+        parse_multiple_analyses(text)
+        db.save_analysis(uid, job, text)
+
+    def structured_pipeline(uid):
+        resumes = db.get_user_resumes(uid)
+        result = analyze.analyze_resumes_structured(resumes, job)
+        db.save_analysis(uid, job, result)
+
+    bench("pipeline.analyze_end_to_end", pipeline,
+          args_for=lambda i: (user_ids[i % len(user_ids)],), llm_latency_s=args.llm_latency)
+    bench("pipeline.analyze_structured_end_to_end", structured_pipeline,
+          args_for=lambda i: (user_ids[i % len(user_ids)],), llm_latency_s=args.llm_latency)
+
+SUITES = {
+    'extraction': bench_extraction,
+    'parsing': bench_parsing,
+    'database': bench_database,
+    'pipeline': bench_pipeline,
+}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scale', type=float, default=1.0, help="database scale; 1.0 = 10k users / 100k resumes / 1M analyses")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--llm-latency', type=float, default=0.0, help="seconds the stub client sleeps per call")
+    parser.add_argument('--only', help="run benchmarks whose name contains this substring")
+    parser.add_argument('--output', default=os.path.join(harness.RESULTS_DIR, 'latest.json'))
+    parser.add_argument('--baseline', default=harness.DEFAULT_BASELINE)
+    parser.add_argument('--save-baseline', action='store_true', help="write results to --baseline as well")
+    parser.add_argument('--threshold', type=float, default=0.2, help="relative slowdown counted as a regression")
+    args = parser.parse_args(argv)
+
+    db_path = seed.seed_database(args.scale, args.seed)
+    harness.use_app(db_path)
+    quiet_streamlit()
+    from utils import db
+    db.DB_PATH = db_path
+    users, resumes, analyses = seed.counts(args.scale)
+
+    results = {
+        'meta': harness.metadata(scale=args.scale, seed=args.seed, users=users,
+                                 resumes=resumes, analyses=analyses),
+        'results': {},
+    }
+
+    timed = {}
+
+    def bench(name, fn, repeat=None, **extra):
+        if args.only and args.only not in name:
+            return
+        timed[name] = (fn, repeat or args.repeat, extra)
+        # Timed right before each benchmark, so compare() can allow for the machine's speed at the time
+        results['results'][name] = row = harness.measure(fn, repeat=repeat or args.repeat,
+                                                         calibration_ms=harness.calibrate(), **extra)
+        print(f"{name:<48} median {row['median_ms']:10.3f} ms  p95 {row['p95_ms']:10.3f} ms")
+
+    for suite in SUITES.values():
+        if suite in (bench_database, bench_pipeline):
+            suite(bench, args, users)
+        else:
+            suite(bench, args)
+
+    harness.write_results(results, args.output)
+    print(f"\nresults written to {args.output}")
+
+    if args.save_baseline:
+        harness.write_results(results, args.baseline)
+        print(f"baseline written to {args.baseline}")
+        return 0
+
+    baseline = harness.load_results(args.baseline)
+    if baseline is None:
+        print("no baseline to compare against; run with --save-baseline to create one")
+        return 0
+    if baseline['meta'].get('scale') != args.scale:
+        print(f"warning: baseline was recorded at scale {baseline['meta'].get('scale')}")
+    if not any('calibration_ms' in row for row in baseline['results'].values()):
+        print("warning: baseline has no calibration_ms; timings compared as recorded")
+    rows = harness.compare(results, baseline, args.threshold, metric='min_ms')
+    # A machine that slows down for a while fails single benchmarks; time those
+    # again, keeping the fastest run relative to its calibration
+    for _ in range(RETIME_ATTEMPTS):
+        regressed = [name for name, *_, status in rows if status == 'regression']
+        if not regressed:
+            break
+        print(f"\ntiming {len(regressed)} regressed benchmark(s) again")
+        for name in regressed:
+            best = results['results'][name]
+            fn, repeat, extra = timed[name]
+            bench(name, fn, repeat, **extra)
+            latest = results['results'][name]
+            if best['min_ms'] / best['calibration_ms'] < latest['min_ms'] / latest['calibration_ms']:
+                results['results'][name] = best
+        harness.write_results(results, args.output)
+        rows = harness.compare(results, baseline, args.threshold, metric='min_ms')
+    print()
+    harness.print_comparison(rows)
+    return 1 if any(status == 'regression' for *_, status in rows) else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
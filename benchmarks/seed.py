@@ -0,0 +1,109 @@
+"""
+Build (or reuse) a seeded benchmark database.
+
+At scale 1.0 the database holds 10k users, 100k resumes and 1M analyses.
+Seeded files are cached under ``benchmarks/.cache`` keyed by scale, seed
+and the current schema, so repeated runs skip the slow part.
+"""
+import hashlib
+import os
+import sqlite3
+import sys
+from datetime import datetime, timedelta
+
+from . import synthetic
+from .harness import APP_DIR, CACHE_DIR, use_app
+
+USERS = 10_000
+RESUMES_PER_USER = 10
+ANALYSES_PER_USER = 100
+POOL_SIZE = 200
+BATCH = 50_000
+
+def _schema_key():
+    with open(os.path.join(APP_DIR, 'utils', 'db.py'), 'rb') as f:
+        return hashlib.sha1(f.read()).hexdigest()[:8]
+
+def database_path(scale, seed):
+    """Cache location for a seeded database"""
+    return os.path.join(CACHE_DIR, f"seed-{scale:g}-{seed}-{_schema_key()}.db")
+
+def counts(scale):
+    """Row counts for a scale factor"""
+    users = max(1, int(USERS * scale))
+    return users, users * RESUMES_PER_USER, users * ANALYSES_PER_USER
+
+def seed_database(scale=1.0, seed=0, force=False, log=print):
+    """Return the path of a seeded database, creating it if needed"""
+    path = database_path(scale, seed)
+    if os.path.exists(path) and not force:
+        return path
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    tmp_path = path + '.tmp'
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+
+    # Let the app create its own schema so the benchmark always matches it
+    use_app(tmp_path)
+    from utils import db
+    db.DB_PATH = tmp_path
+    db.init_db()
+
+    users, _, _ = counts(scale)
+    rng = synthetic.make_rng(seed, 'pool')
+    resumes = [synthetic.resume_text(rng, entries=rng.randint(2, 5)) for _ in range(POOL_SIZE)]
+    jobs = [synthetic.job_posting(rng) for _ in range(POOL_SIZE // 2)]
+    analyses = [synthetic.analysis_text(rng, [f"resume_{i}.pdf"], bullets=2) for i in range(POOL_SIZE)]
+    start = datetime(2025, 1, 1)
+
+    conn = sqlite3.connect(tmp_path)
+    conn.execute('PRAGMA synchronous = OFF')
+    conn.execute('PRAGMA journal_mode = MEMORY')
+    try:
+        conn.executemany(
+            "INSERT INTO users (username, password) VALUES (?, ?)",
+            ((f"user{i}", "password") for i in range(users))
+        )
+        user_ids = [row[0] for row in conn.execute("SELECT id FROM users WHERE username != 'test' ORDER BY id")]
+        conn.commit()
+        log(f"seeded {len(user_ids)} users")
+
+        def resume_rows():
+            for uid in user_ids:
+                for i in range(RESUMES_PER_USER):
+                    ts = str(start + timedelta(minutes=uid * RESUMES_PER_USER + i))
+                    yield (uid, f"resume_{i}.pdf", resumes[(uid + i) % POOL_SIZE], 'application/pdf', ts, ts)
+
+        def analysis_rows():
+            for uid in user_ids:
+                for i in range(ANALYSES_PER_USER):
+                    ts = str(start + timedelta(minutes=uid * ANALYSES_PER_USER + i))
+                    yield (uid, jobs[(uid * 7 + i) % len(jobs)], analyses[(uid + i) % POOL_SIZE], ts)
+
+        _insert_batched(conn, "INSERT INTO resumes (user_id, filename, content, file_type, created_at, updated_at) "
+                        "VALUES (?, ?, ?, ?, ?, ?)", resume_rows())
+        log(f"seeded {len(user_ids) * RESUMES_PER_USER} resumes")
+        _insert_batched(conn, "INSERT INTO analysis_history (user_id, job_post, analysis, created_at) "
+                        "VALUES (?, ?, ?, ?)", analysis_rows())
+        log(f"seeded {len(user_ids) * ANALYSES_PER_USER} analyses")
+        conn.execute('ANALYZE')
+        conn.commit()
+    finally:
+        conn.close()
+    os.replace(tmp_path, path)
+    return path
+
+def _insert_batched(conn, sql, rows):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= BATCH:
+            conn.executemany(sql, batch)
+            batch.clear()
+    if batch:
+        conn.executemany(sql, batch)
+    conn.commit()
+
+if __name__ == '__main__':
+    scale = float(sys.argv[1]) if len(sys.argv) > 1 else 1.0
+    print(seed_database(scale))
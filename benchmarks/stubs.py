@@ -0,0 +1,133 @@
+"""
+Stand-in for the Anthropic client so the analysis pipeline can run offline.
+"""
+import json
+import re
+import threading
+import time
+from types import SimpleNamespace
+
+from . import synthetic
+
+RESUME_HEADER = re.compile(r'^\s*Resume \d+ - (.+?):\s*$', re.MULTILINE)
+
+class _Messages:
+    def __init__(self, owner):
+        self._owner = owner
+
+    def create(self, **request):
+        response, latency, generation = self._respond(**request)
+        if latency or generation:
+            time.sleep(latency + generation)
+        return response
+
+    def stream(self, timeout=None, **request):
+        return _Stream(self._owner, *self._respond(**request))
+
+    def _respond(self, model=None, messages=None, max_tokens=None, tools=None, **kwargs):
+        """The response to a request, its round-trip latency and its generation time"""
+        owner = self._owner
+        owner.calls += 1
+        prompt = "".join(
+            m['content'] if isinstance(m['content'], str) else str(m['content'])
+            for m in messages or []
+        )
+        names = RESUME_HEADER.findall(prompt) or ['Resume']
+        rng = synthetic.make_rng(owner.seed, owner.calls)
+        if tools:
+            data = synthetic.analysis_data(rng, names, owner.bullets)
+            for item in data['analyses']:
+                if owner.low_confidence and rng.random() < owner.low_confidence:
+                    item['confidence'] = 'low'
+            if owner.schema_failures > 0:
+                # Drop a required section so validation fails and forces a retry
+                owner.schema_failures -= 1
+                del data['analyses'][0]['missing']
+            content = [SimpleNamespace(type='tool_use', id=f"toolu_stub_{owner.calls}",
+                                       name=tools[0]['name'], input=data)]
+            output_chars, stop_reason = len(json.dumps(data)), 'tool_use'
+        else:
+            text = synthetic.analysis_text(rng, names, owner.bullets)
+            content = [SimpleNamespace(type='text', text=text)]
+            output_chars, stop_reason = len(text), 'end_turn'
+        latency, token_latency = owner.model_latency.get(model, (owner.latency, owner.token_latency))
+        response = SimpleNamespace(
+            id=f"msg_stub_{owner.calls}",
+            model=model,
+            role='assistant',
+            stop_reason=stop_reason,
+            content=content,
+            # Tool definitions are billed as input too
+            usage=SimpleNamespace(input_tokens=(len(prompt) + len(json.dumps(tools or []))) // 4,
+                                  output_tokens=output_chars // 4),
+        )
+        return response, latency, token_latency * (output_chars // 4)
+
+class _Stream:
+    """``messages.stream`` look-alike: headers after the round trip, then the
+    output in ``CHUNKS`` events spread over the generation time. ``close()``
+    from another thread aborts it, like closing the HTTP response."""
+
+    CHUNKS = 10
+
+    def __init__(self, owner, response, latency, generation):
+        self._owner = owner
+        self._response = response
+        self._latency = latency
+        self._generation = generation
+        self._closed = threading.Event()
+        self._sent = 0
+
+    def __enter__(self):
+        time.sleep(self._latency)
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __iter__(self):
+        yield SimpleNamespace(type='message_start')
+        for self._sent in range(1, self.CHUNKS + 1):
+            if self._closed.wait(self._generation / self.CHUNKS):
+                raise RuntimeError("stream closed")
+            yield SimpleNamespace(type='content_block_delta')
+        self._owner.completed += 1
+
+    def close(self):
+        if not self._closed.is_set() and self._sent < self.CHUNKS:
+            self._owner.aborted += 1
+        self._closed.set()
+
+    @property
+    def current_message_snapshot(self):
+        usage = self._response.usage
+        return SimpleNamespace(content=[], usage=SimpleNamespace(
+            input_tokens=usage.input_tokens, output_tokens=usage.output_tokens * self._sent // self.CHUNKS))
+
+    def get_final_message(self):
+        return self._response
+
+class StubAnthropic:
+    """Minimal ``Anthropic`` look-alike returning synthetic analyses.
+
+    ``latency`` is slept on every call to imitate the network round trip,
+    plus ``token_latency`` per output token to imitate generation;
+    ``model_latency`` maps model names to their own (latency, token_latency).
+    A ``low_confidence`` share of tool-use analyses are marked low confidence.
+    Requests with ``tools`` get a tool_use block; the first
+    ``schema_failures`` of them are missing a required field.
+    """
+
+    def __init__(self, latency=0.0, seed=0, bullets=3, schema_failures=0, token_latency=0.0,
+                 model_latency=None, low_confidence=0.0, **kwargs):
+        self.latency = latency
+        self.token_latency = token_latency
+        self.model_latency = model_latency or {}
+        self.low_confidence = low_confidence
+        self.seed = seed
+        self.bullets = bullets
+        self.schema_failures = schema_failures
+        self.calls = 0
+        self.completed = 0
+        self.aborted = 0
+        self.messages = _Messages(self)
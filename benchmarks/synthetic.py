@@ -0,0 +1,228 @@
+"""
+Deterministic synthetic inputs: resumes, job postings, analyses, PDFs and DOCX files.
+"""
+import io
+import random
+import zipfile
+from xml.sax.saxutils import escape
+
+SKILLS = [
+    "Python", "SQL", "Kubernetes", "Terraform", "React", "TypeScript", "Go",
+    "AWS", "GCP", "Docker", "Spark", "Airflow", "PostgreSQL", "Redis",
+    "GraphQL", "Java", "Rust", "Machine Learning", "Data Modeling", "CI/CD",
+]
+ROLES = [
+    "Software Engineer", "Data Engineer", "Backend Developer", "Platform Engineer",
+    "Machine Learning Engineer", "Site Reliability Engineer", "Analytics Engineer",
+]
+COMPANIES = ["Acme Corp", "Globex", "Initech", "Umbrella", "Hooli", "Stark Industries", "Wayne Enterprises"]
+VERBS = ["Built", "Designed", "Led", "Migrated", "Optimized", "Automated", "Scaled", "Shipped"]
+OBJECTS = [
+    "a streaming ingestion pipeline", "the billing service", "an internal developer portal",
+    "the search ranking model", "a multi-region deployment", "the reporting warehouse",
+    "a feature flag platform", "the customer onboarding flow",
+]
+OUTCOMES = [
+    "cutting latency by 40%", "saving $200k per year", "serving 3M requests per day",
+    "reducing incidents by half", "improving conversion by 12%", "with zero downtime",
+]
+
+def _bullet(rng):
+    return f"{rng.choice(VERBS)} {rng.choice(OBJECTS)} using {rng.choice(SKILLS)}, {rng.choice(OUTCOMES)}."
+
+def resume_text(rng, entries=3, bullets=4):
+    """Generate a plain-text resume with the usual sections"""
+    lines = [
+        f"Jordan {rng.choice('ABCDEFGHIJKLMNOPQRSTUVWXYZ')}. Example",
+        "jordan@example.com | (555) 010-0000",
+        "",
+        "SUMMARY",
+        f"{rng.choice(ROLES)} with {rng.randint(2, 15)} years of experience in "
+        f"{', '.join(rng.sample(SKILLS, 3))}.",
+        "",
+        "EXPERIENCE",
+    ]
+    for _ in range(entries):
+        lines.append(f"{rng.choice(ROLES)} - {rng.choice(COMPANIES)} ({rng.randint(2008, 2020)} - {rng.randint(2021, 2026)})")
+        lines.extend(f"• {_bullet(rng)}" for _ in range(bullets))
+        lines.append("")
+    lines += [
+        "SKILLS",
+        ", ".join(rng.sample(SKILLS, 8)),
+        "",
+        "EDUCATION",
+        "B.S. Computer Science, State University",
+    ]
+    return "\n".join(lines)
+
+def job_posting(rng, requirements=6):
+    """Generate a job posting"""
+    role = rng.choice(ROLES)
+    lines = [
+        f"{role} at {rng.choice(COMPANIES)}",
+        "",
+        f"We are hiring a {role} to join a small team building {rng.choice(OBJECTS)}.",
+        "",
+        "Requirements:",
+    ]
+    lines.extend(f"- {rng.randint(1, 8)}+ years with {skill}" for skill in rng.sample(SKILLS, requirements))
+    lines += ["", "Nice to have:", f"- {rng.choice(SKILLS)}", f"- {rng.choice(SKILLS)}"]
+    return "\n".join(lines)
+
+def analysis_text(rng, resume_names, bullets=3):
+    """Generate an analysis in the format requested by analyze_resume_for_job"""
+    blocks = []
+    for idx, name in enumerate(resume_names, start=1):
+        block = [f"===== RESUME {idx} - {name} =====", f"Match Score: {rng.randint(30, 95)}%", ""]
+        for header in ("Overall Assessment:", "Key Qualifications Match:",
+                       "Missing Skills/Experience:", "Suggested Resume Improvements:"):
+            block.append(header)
+            block.extend(f"• {_bullet(rng)}" for _ in range(bullets))
+            block.append("")
+        block.append("===============================")
+        blocks.append("\n".join(block))
+    if len(resume_names) > 1:
+        blocks.append(f"Comparison: {resume_names[0]} is the strongest fit for this position.")
+    return "\n\n".join(blocks)
+
+def analysis_data(rng, resume_names, bullets=3):
+    """Generate a structured analysis as returned by the record_resume_analysis tool"""
+    analyses = [
+        {
+            'resume_name': name,
+            'match_score': rng.randint(30, 95),
+            **{section: [_bullet(rng) for _ in range(bullets)]
+               for section in ('overall', 'qualifications', 'missing', 'improvements')},
+        }
+        for name in resume_names
+    ]
+    comparison = f"{resume_names[0]} is the strongest fit for this position." if len(resume_names) > 1 else ""
+    return {'analyses': analyses, 'comparison': comparison}
+
+def _pdf_escape(text):
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+def make_pdf(pages, image_bytes=0):
+    """Build a minimal PDF with one Helvetica text stream per page.
+
+    ``pages`` is a list of lists of lines; characters outside Latin-1 are dropped.
+    ``image_bytes`` > 0 also draws an incompressible grayscale image of about
+    that size on every page, like a scanned or designed resume.
+    """
+    objects = []
+    page_ids = []
+    first_page_id = 4
+    per_page = 3 if image_bytes else 2
+    noise = random.Random(len(pages))
+    for idx, lines in enumerate(pages):
+        page_id = first_page_id + idx * per_page
+        page_ids.append(page_id)
+        ops = ["BT", "/F1 10 Tf", "12 TL", "50 760 Td"]
+        for line in lines:
+            line = line.encode("latin-1", "ignore").decode("latin-1")
+            ops.append(f"({_pdf_escape(line)}) Tj T*")
+        ops.append("ET")
+        xobjects = ""
+        if image_bytes:
+            ops.append("q 100 0 0 100 462 642 cm /Im1 Do Q")
+            xobjects = f" /XObject << /Im1 {page_id + 2} 0 R >>"
+            height = max(1, image_bytes // 256)
+            data = noise.randbytes(256 * height)
+            objects.append((page_id + 2, (
+                b"<< /Type /XObject /Subtype /Image /Width 256 /Height %d /ColorSpace /DeviceGray "
+                b"/BitsPerComponent 8 /Length %d >>\nstream\n" % (height, len(data))
+            ) + data + b"\nendstream"))
+        stream = "\n".join(ops).encode("latin-1")
+        objects.append((page_id, (
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            f"/Resources << /Font << /F1 3 0 R >>{xobjects} >> /Contents {page_id + 1} 0 R >>"
+        ).encode("latin-1")))
+        objects.append((page_id + 1, b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream"))
+
+    kids = " ".join(f"{pid} 0 R" for pid in page_ids)
+    objects = [
+        (1, b"<< /Type /Catalog /Pages 2 0 R >>"),
+        (2, f"<< /Type /Pages /Kids [{kids}] /Count {len(page_ids)} >>".encode("latin-1")),
+        (3, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"),
+    ] + sorted(objects)
+
+    out = io.BytesIO()
+    out.write(b"%PDF-1.4\n")
+    offsets = {}
+    for obj_id, body in objects:
+        offsets[obj_id] = out.tell()
+        out.write(b"%d 0 obj\n" % obj_id + body + b"\nendobj\n")
+    xref = out.tell()
+    out.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+    for obj_id in range(1, len(objects) + 1):
+        out.write(b"%010d 00000 n \n" % offsets[obj_id])
+    out.write(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref))
+    return out.getvalue()
+
+def resume_pdf(rng, pages, lines_per_page=55, image_bytes=0):
+    """Build a PDF of ``pages`` pages filled with resume text"""
+    lines = []
+    while len(lines) < pages * lines_per_page:
+        lines.extend(line for line in resume_text(rng, entries=4).splitlines() if line)
+    return make_pdf([lines[i * lines_per_page:(i + 1) * lines_per_page] for i in range(pages)], image_bytes)
+
+_CONTENT_TYPES = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">
+<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>
+<Default Extension="xml" ContentType="application/xml"/>
+<Override PartName="/word/document.xml" ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/>
+<Override PartName="/word/header1.xml" ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.header+xml"/>
+</Types>"""
+
+_ROOT_RELS = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">
+<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="word/document.xml"/>
+</Relationships>"""
+
+_DOCUMENT_RELS = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">
+<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/header" Target="header1.xml"/>
+</Relationships>"""
+
+_W = 'xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main" ' \
+     'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships"'
+
+def _w_paragraph(text):
+    return f"<w:p><w:r><w:t xml:space=\"preserve\">{escape(text)}</w:t></w:r></w:p>"
+
+def make_docx(paragraphs, table=None, header=None):
+    """Build a minimal DOCX with paragraphs, an optional table and an optional header"""
+    body = [_w_paragraph(p) for p in paragraphs]
+    if table:
+        rows = "".join(
+            "<w:tr>" + "".join(f"<w:tc>{_w_paragraph(cell)}</w:tc>" for cell in row) + "</w:tr>"
+            for row in table
+        )
+        body.append(f"<w:tbl>{rows}</w:tbl>")
+    sect = '<w:sectPr><w:headerReference w:type="default" r:id="rId1"/></w:sectPr>' if header else ""
+    document = (
+        f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+        f'<w:document {_W}><w:body>{"".join(body)}{sect}</w:body></w:document>'
+    )
+
+    out = io.BytesIO()
+    with zipfile.ZipFile(out, "w", zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr("[Content_Types].xml", _CONTENT_TYPES)
+        zf.writestr("_rels/.rels", _ROOT_RELS)
+        zf.writestr("word/document.xml", document)
+        if header:
+            zf.writestr("word/_rels/document.xml.rels", _DOCUMENT_RELS)
+            zf.writestr("word/header1.xml", f'<w:hdr {_W}>{_w_paragraph(header)}</w:hdr>')
+    return out.getvalue()
+
+def resume_docx(rng, paragraphs):
+    """Build a DOCX with roughly ``paragraphs`` paragraphs of resume text"""
+    lines = []
+    while len(lines) < paragraphs:
+        lines.extend(line for line in resume_text(rng, entries=4).splitlines() if line)
+    table = [["Skill", "Years"]] + [[skill, str(rng.randint(1, 10))] for skill in rng.sample(SKILLS, 5)]
+    return make_docx(lines[:paragraphs], table=table, header="Jordan Example - Resume")
+
+def make_rng(seed, *salt):
+    """Create a Random seeded from ``seed`` and a salt so each generator is independent"""
+    return random.Random(f"{seed}:{':'.join(map(str, salt))}")
@@ -0,0 +1,8 @@
+import os
+import sys
+import tempfile
+
+# utils.db creates its database on import; keep it out of the app directory
+os.environ.setdefault('APPLYAI_DB_PATH', os.path.join(tempfile.mkdtemp(prefix='applyai-tests-'), 'applyai.db'))
+# The app runs from app/ (streamlit run app/main.py), so its packages import as top-level modules
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'app'))
@@ -0,0 +1,29 @@
+import json
+import sqlite3
+
+from utils import db
+
+def result(name, score, *missing):
+    return json.dumps({'analyses': [{'resume_name': name, 'match_score': score, 'missing': list(missing)}],
+                       'comparison': ''})
+
+def test_rebuild_commits_each_batch_and_keeps_analyses_saved_meanwhile():
+    user_id = 7001
+    for n in range(5):
+        db.save_analysis(user_id, f"posting {n}", result('cv.pdf', 60 + n, 'SQL'))
+    saved = []
+
+    def log(message):
+        conn = sqlite3.connect(db.db_path(user_id), timeout=0, isolation_level=None)
+        # Raises "database is locked" while the rebuild holds the write lock
+        conn.execute("BEGIN IMMEDIATE")
+        conn.execute("ROLLBACK")
+        conn.close()
+        if not saved:
+            saved.append(db.save_analysis(user_id, "posting 5", result('cv.pdf', 90, 'Go')))
+
+    db.rebuild_aggregates(batch_size=2, log=log)
+    rows, skills = db.get_user_aggregates(user_id)
+    assert saved == [True]
+    assert [row[2:] for row in rows] == [(6, 400, 90)]
+    assert sorted(skills) == [('cv.pdf', 'go', 1), ('cv.pdf', 'sql', 5)]
@@ -0,0 +1,19 @@
+import os
+import time
+
+from utils import export
+
+def test_remove_stale_exports_keeps_recent_files(tmp_path, monkeypatch):
+    monkeypatch.setattr(export.tempfile, 'gettempdir', lambda: str(tmp_path))
+    stale = tmp_path / 'applyai-export-old.csv'
+    recent = tmp_path / 'applyai-export-new.csv'
+    other = tmp_path / 'unrelated.csv'
+    for path in (stale, recent, other):
+        path.write_text('x')
+    two_hours_ago = time.time() - 7200
+    os.utime(stale, (two_hours_ago, two_hours_ago))
+    os.utime(other, (two_hours_ago, two_hours_ago))
+
+    assert export.remove_stale_exports(max_age_s=3600) == 1
+    assert not stale.exists()
+    assert recent.exists() and other.exists()
@@ -0,0 +1,20 @@
+import io
+import zipfile
+
+from utils import file_processing
+
+W = 'http://schemas.openxmlformats.org/wordprocessingml/2006/main'
+
+def docx(body):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w') as package:
+        package.writestr('word/document.xml', f'<w:document xmlns:w="{W}"><w:body>{body}</w:body></w:document>')
+    buffer.seek(0)
+    return buffer
+
+def test_text_box_keeps_the_enclosing_paragraph_text():
+    text_box = ('<w:r><w:pict><w:txbxContent><w:p><w:r><w:t>In the box</w:t></w:r></w:p>'
+                '</w:txbxContent></w:pict></w:r>')
+    body = (f'<w:p><w:r><w:t>Before </w:t></w:r>{text_box}<w:r><w:t>after</w:t></w:r></w:p>'
+            '<w:p><w:r><w:t>Next</w:t></w:r></w:p>')
+    assert list(file_processing.iter_docx_blocks(docx(body))) == ['In the box', 'Before after', 'Next']
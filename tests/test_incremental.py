@@ -0,0 +1,27 @@
+import json
+
+import streamlit as st
+
+from utils import db, incremental
+
+POSTING = "Backend engineer, Python and PostgreSQL"
+
+def result(score):
+    return {'analyses': [{'resume_name': 'cv.txt', 'match_score': score, 'missing': []}], 'comparison': ''}
+
+def test_previous_analysis_is_the_saved_one_with_the_resume_versions_it_ran_on():
+    user_id = 7101
+    analyzed = "Jane Doe\nPython developer\n" + "\n".join(f"Project {n}" for n in range(10))
+    db.save_resume(user_id, 'cv.txt', analyzed, 'text/plain')
+    db.save_analysis(user_id, POSTING, json.dumps(result(70)), db.get_user_resumes(user_id))
+    edited = analyzed.replace("Project 3", "Project 3, in PostgreSQL")
+    db.save_resume(user_id, 'cv.txt', edited, 'text/plain')
+    # A new session: nothing cached
+    st.session_state.pop('last_analysis', None)
+
+    previous = incremental.previous_analysis(user_id, POSTING)
+    assert previous['resumes'] == {'cv.txt': analyzed}
+    assert previous['result'] == result(70)
+    assert incremental.plan_update(previous, db.get_user_resumes(user_id), POSTING) == ['cv.txt']
+    assert st.session_state.last_analysis['id'] == db.get_latest_analysis(user_id, POSTING)[0]
+    assert incremental.previous_analysis(user_id, "Another posting") is None
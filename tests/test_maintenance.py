@@ -0,0 +1,19 @@
+import sqlite3
+
+from utils import maintenance
+
+ORPHANED = "NOT EXISTS (SELECT 1 FROM analysis_history a WHERE a.job_hash = job_postings.hash)"
+
+def test_posting_referenced_after_select_is_not_deleted():
+    conn = sqlite3.connect(':memory:', isolation_level=None)
+    conn.executescript("""
+        CREATE TABLE job_postings (hash TEXT PRIMARY KEY, content BLOB);
+        CREATE TABLE analysis_history (id INTEGER PRIMARY KEY, job_hash TEXT);
+        INSERT INTO job_postings VALUES ('kept', 'a'), ('orphan', 'b');
+        INSERT INTO analysis_history (job_hash) VALUES ('kept');
+    """)
+    # A select that still lists 'kept', as one run before the analysis was saved would
+    deleted = maintenance._delete_batches(conn, "SELECT hash FROM job_postings LIMIT ?", (maintenance.DELETE_BATCH,),
+                                          'job_postings', key='hash', recheck=f"AND {ORPHANED}")
+    assert deleted == 1
+    assert conn.execute("SELECT hash FROM job_postings").fetchall() == [('kept',)]
@@ -0,0 +1,9 @@
+from utils.segments import normalize_resume
+
+def test_word_split_at_line_break_is_rejoined():
+    text = "Led the devel-\nopment of billing APIs\nOwned development of the data platform"
+    assert normalize_resume(text).splitlines()[0] == "Led the development of billing APIs"
+
+def test_compound_wrapped_at_line_break_keeps_its_hyphen():
+    text = "Built state-\nof-the-art search as a full-\nstack engineer"
+    assert normalize_resume(text) == "Built state-of-the-art search as a full-stack engineer"
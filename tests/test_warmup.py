@@ -0,0 +1,54 @@
+import socket
+
+import pytest
+import urllib3.util.connection
+
+from utils import warmup
+from utils.errors import ExtractionError
+
+@pytest.mark.parametrize('url', [
+    'http://127.0.0.1:8501/', 'http://169.254.169.254/latest/meta-data', 'http://10.0.0.1/',
+    'http://[::1]/', 'http://[::ffff:127.0.0.1]/', 'file:///etc/passwd',
+])
+def test_internal_urls_are_not_fetched(url, monkeypatch):
+    monkeypatch.setattr(warmup, '_get', lambda *a: pytest.fail("fetched " + url))
+    with pytest.raises(ExtractionError):
+        warmup.fetch_posting(url)
+
+class Redirect:
+    is_redirect = True
+    headers = {'Location': 'http://169.254.169.254/latest/meta-data'}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+def test_redirect_to_internal_url_is_not_followed(monkeypatch):
+    fetched = []
+
+    def get(url, address):
+        fetched.append(url)
+        return Redirect()
+    monkeypatch.setattr(warmup, '_get', get)
+    with pytest.raises(ExtractionError, match="public"):
+        warmup.fetch_posting('http://93.184.216.34/job')
+    assert fetched == ['http://93.184.216.34/job']
+
+def test_fetch_connects_to_the_checked_address(monkeypatch):
+    answers = iter(['93.184.216.34', '127.0.0.1'])
+    connected = []
+
+    def getaddrinfo(host, port, *args, **kwargs):
+        return [(socket.AF_INET, socket.SOCK_STREAM, socket.IPPROTO_TCP, '', (next(answers), port))]
+
+    def create_connection(address, *args, **kwargs):
+        connected.append(address)
+        raise ConnectionRefusedError
+    # The first lookup is public and the next would be internal, as a rebinding DNS server would answer
+    monkeypatch.setattr(socket, 'getaddrinfo', getaddrinfo)
+    monkeypatch.setattr(urllib3.util.connection, 'create_connection', create_connection)
+    with pytest.raises(ExtractionError, match="Could not fetch"):
+        warmup.fetch_posting('http://jobs.example.test/job')
+    assert connected == [('93.184.216.34', 80)]
@@ -0,0 +1,68 @@
+import sqlite3
+import threading
+
+import pytest
+
+from utils.errors import WriteFailed, WriteQueueFull
+from utils.write_behind import WriteBehindQueue
+
+def blocked_queue(path, **kwargs):
+    """A queue whose writer can't start until the returned event is set"""
+    with sqlite3.connect(path) as conn:
+        conn.execute("CREATE TABLE t (key TEXT)")
+    started = threading.Event()
+
+    def connect():
+        started.wait()
+        return sqlite3.connect(path, check_same_thread=False)
+    return WriteBehindQueue(connect, **kwargs), started
+
+def rows(path, key):
+    with sqlite3.connect(path) as conn:
+        return conn.execute("SELECT COUNT(*) FROM t WHERE key = ?", (key,)).fetchone()[0]
+
+def test_later_write_finishing_first_does_not_release_earlier_key(tmp_path):
+    path = str(tmp_path / 'w.db')
+    writes, started = blocked_queue(path)
+    writes.submit('A', "INSERT INTO t VALUES (?)", ('A',))
+    writes.submit('B', "INSERT INTO t VALUES (?)", ('B',))
+
+    # B (write 2) finishing before A must not count A as committed
+    writes._mark_done(2)
+    assert not writes.wait_for('A', timeout=0.05)
+    assert writes.pending() == 1
+
+    started.set()
+    assert writes.wait_for('A', timeout=5)
+    assert rows(path, 'A') == 1
+    writes.close(timeout=5)
+
+def test_rejected_write_does_not_release_earlier_key(tmp_path):
+    path = str(tmp_path / 'w.db')
+    writes, started = blocked_queue(path, max_pending=1, put_timeout=0.01)
+    writes.submit('A', "INSERT INTO t VALUES (?)", ('A',))
+    with pytest.raises(WriteQueueFull):
+        writes.submit('B', "INSERT INTO t VALUES (?)", ('B',))
+    assert not writes.wait_for('A', timeout=0.05)
+    assert rows(path, 'A') == 0
+
+    started.set()
+    assert writes.wait_for('A', timeout=5)
+    assert rows(path, 'A') == 1
+    assert writes.flush(timeout=5)
+    assert writes.pending() == 0
+    writes.close(timeout=5)
+
+def test_failed_write_is_reported_to_its_caller(tmp_path):
+    path = str(tmp_path / 'w.db')
+    writes, started = blocked_queue(path)
+    good = writes.submit('A', "INSERT INTO t VALUES (?)", ('A',))
+    bad = writes.submit('B', "INSERT INTO missing VALUES (?)", ('B',))
+    started.set()
+    assert good.result(timeout=5) == 1
+    with pytest.raises(WriteFailed, match="no such table"):
+        bad.result(timeout=5)
+    assert writes.stats['failed'] == 1
+    assert "no such table" in writes.last_error
+    assert rows(path, 'A') == 1
+    writes.close(timeout=5)